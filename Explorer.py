@@ -1,12 +1,11 @@
 # === Import Required Libraries ===
 import streamlit as st
-from datetime import datetime
 import os
-import json
 import subprocess
 import time
 import base64
-from src.helpers.tracker_utilis import delete_file_from_all_trackers
+from src.helpers.tracker_store import get_tracker_store
+from src.helpers.tracker_utilis import delete_file_from_all_trackers, delete_files_from_all_trackers
 from src.models.file_selector import Selector  # Custom class to handle file selection and metadata
 
 
@@ -48,17 +47,25 @@ def add_logo():
         unsafe_allow_html=True,
     )
 
+def clear_selection_state():
+    # Session keys of the Editor/Report pages that may point at deleted files
+    keys_to_clear = [
+        "experiments_list",
+        "selected_experiment_dropdown",
+        "selected_experiment_for_subdatasets",
+        "selected_subdataset_index",
+        "subdatasets",
+        "current_group",
+        "group_name",
+        "confirm_delete_experiment",
+        "confirm_delete_group",
+    ]
+    for key in keys_to_clear:
+        st.session_state.pop(key, None)
+
 def get_number():
-    # Load file data to get the count
-    TRACKER_FILE = "TRACKERS/file_tracker.json"
-    if os.path.exists(TRACKER_FILE):
-        with open(TRACKER_FILE, "r") as file:
-            file_data = json.load(file)
-    else:
-        file_data = {}
-
-    # Count experiments and display
-    num_experiments = sum(1 for info in file_data.values() if info.get("is_experiment"))
+    # Count experiments and display (file_data is loaded below, before this is called)
+    num_experiments = len(tracker_store.experiment_paths())
     num_docs = sum(1 for info in file_data.values() if info)
     return st.info(f"🧪 **{num_experiments}** Experiments Tracked, from a total of **{num_docs}** documents added.")
 
@@ -90,14 +97,11 @@ with st.sidebar:
 st.title("File Tracker & Experiments")        # Page title at the top
 
 # === Constants and Config ===
-TRACKER_FILE = "TRACKERS/file_tracker.json"   # Path to the JSON file that stores tracked files
+TRACKER_FILE = "TRACKERS/file_tracker.json"   # Tracked files (the TRACKERS directory holds the tracker store)
+tracker_store = get_tracker_store(os.path.dirname(TRACKER_FILE))
 
 # === Load Tracked File Data ===
-if os.path.exists(TRACKER_FILE):
-    with open(TRACKER_FILE, "r") as file:
-        file_data = json.load(file)           # Load existing file tracking data
-else:
-    file_data = {}                            # Initialize empty tracker if file not found
+file_data = tracker_store.load("files")       # Empty if nothing is tracked yet
 
 # # === UI Section: File Picker ===
 # st.header("Add File to Tracker")              # Section header
@@ -118,7 +122,7 @@ with cols_init[0]:
                 is_exp = selector.is_experiment()
 
                 # Save selected file and metadata
-                selector.save_tracker(extra_data={"is_experiment": is_exp})
+                selector.save_tracker(extra_data={"is_experiment": is_exp, "plate_type": selector.plate_type})
 
                 # Show success in sidebar
                 st.sidebar.success(f"File added: {file_path}")
@@ -128,6 +132,7 @@ with cols_init[0]:
                     "metadata": selector.metadata,
                     "note": selector.note,
                     "is_experiment": is_exp,
+                    "plate_type": selector.plate_type,
                 }
 
                 # Refresh the app to reflect changes
@@ -141,10 +146,71 @@ with cols_init[0]:
 with cols_init[1]: get_number()
 
 
+# === Batch Import from a Folder or Glob ===
+with st.expander("📂 Import a folder of plate-reader exports", expanded=False):
+    batch_pattern = st.text_input(
+        "Folder or glob pattern",
+        placeholder="/data/reader_exports or /data/reader_exports/2024-*/*.xlsx",
+        key="batch_import_pattern"
+    )
+    if st.button("Import folder", disabled=not batch_pattern):
+        progress_bar = st.progress(0.0, text="Validating workbooks...")
+
+        def report_progress(done, total, path):
+            progress_bar.progress(done / total, text=f"{done}/{total} validated: {os.path.basename(path)}")
+
+        result = selector.import_batch(batch_pattern, progress=report_progress)
+        st.session_state.batch_import_result = result
+        st.session_state.pop("experiments_list", None)  # Editor reloads its experiment list
+        if result["added"]:
+            st.rerun()
+
+    # Keep the outcome of the last batch visible across the rerun
+    batch_result = st.session_state.get("batch_import_result")
+    if batch_result:
+        st.success(f"Added {len(batch_result['added'])} experiment(s); "
+                   f"{len(batch_result['skipped'])} already tracked.")
+        if batch_result["failed"]:
+            st.warning(f"{len(batch_result['failed'])} file(s) could not be imported:")
+            for failed_path, reason in batch_result["failed"].items():
+                st.write(f"- `{os.path.basename(failed_path)}`: {reason}")
+
+
 # === UI Section: Display Tracked Files ===
 if file_data:
     st.write("### Tracked Files")
 
+    # --- Bulk delete: one pass per tracker for the whole selection ---
+    if "bulk_delete_result" in st.session_state:
+        st.success(f"Deleted {st.session_state.pop('bulk_delete_result')} file(s) from LabReport.")
+    with st.expander("🗑️ Delete several files", expanded=False):
+        to_delete = st.multiselect(
+            "Files to remove from LabReport:",
+            list(file_data),
+            format_func=os.path.basename,
+            key="bulk_delete_selection",
+        )
+        if st.button(f"Delete {len(to_delete)} selected file(s)", disabled=not to_delete, key="bulk_delete"):
+            st.session_state.confirm_bulk_delete = True
+
+        if st.session_state.get("confirm_bulk_delete") and to_delete:
+            st.warning(f"Remove {len(to_delete)} file(s) with their sub-datasets, groups and report metadata? "
+                       "This cannot be undone.")
+            yes_col, no_col = st.columns(2)
+            if yes_col.button("Yes, Delete All", key="bulk_delete_yes"):
+                try:
+                    removed = delete_files_from_all_trackers(to_delete, os.path.dirname(TRACKER_FILE))
+                    clear_selection_state()
+                    st.session_state.pop("confirm_bulk_delete", None)
+                    st.session_state.pop("bulk_delete_selection", None)
+                    st.session_state.bulk_delete_result = removed
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Failed to delete file entries: {e}")
+            elif no_col.button("Cancel", key="bulk_delete_no"):
+                st.session_state.pop("confirm_bulk_delete", None)
+                st.info("Deletion cancelled.")
+
     # Table Header Columns
     cols = st.columns([2, 1, 2, 2, 3])
     cols[0].write("**File Path**")
@@ -199,8 +265,7 @@ if file_data:
         # Update the note if changed
         if note != info["note"]:
             info["note"] = note
-            with open(TRACKER_FILE, "w") as f:
-                json.dump(file_data, f, indent=4)
+            tracker_store.put("files", file_path, info)  # Writes this file's record only
 
 
         # === Actions Menu ===
@@ -234,29 +299,10 @@ if file_data:
 
                 if confirm_yes:
                     try:
-                        delete_file_from_all_trackers(
-                            file_path,
-                            [
-                                "TRACKERS/file_tracker.json",
-                                "TRACKERS/editor_file_tracker.json",
-                                "TRACKERS/report_metadata_tracker.json",
-                            ]
-                        )
+                        delete_file_from_all_trackers(file_path, os.path.dirname(TRACKER_FILE))
 
                         # Clear relevant session state
-                        keys_to_clear = [
-                            "experiments_list",
-                            "selected_experiment_dropdown",
-                            "selected_experiment_for_subdatasets",
-                            "selected_subdataset_index",
-                            "subdatasets",
-                            "current_group",
-                            "group_name",
-                            "confirm_delete_experiment",
-                            "confirm_delete_group",
-                        ]
-                        for key in keys_to_clear:
-                            st.session_state.pop(key, None)
+                        clear_selection_state()
 
                         # Remove confirmation state and refresh
                         st.session_state.pop(confirm_key, None)
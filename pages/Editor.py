@@ -1,8 +1,8 @@
 import streamlit as st
-import json
 import base64
 # Import the Editor class that contains the main experiment editor logic
 from src.models.editorial import Editor
+from src.helpers.tracker_store import get_tracker_store
 
 
 def get_base64_image(image_path):
@@ -55,12 +55,7 @@ with st.sidebar:
 st.header("Manage editions and data visualization")  # Main title
 
 
-with open("TRACKERS/file_tracker.json") as f:
-    tracker_data = json.load(f)
-
-st.session_state.experiments_list = [
-    path for path, info in tracker_data.items() if info.get("is_experiment", False)
-]
+st.session_state.experiments_list = get_tracker_store().experiment_paths()
 
 editor = Editor()  # Initialize the Editor class
 editor.run()       # Run the editor interface
\ No newline at end of file
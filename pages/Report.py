@@ -5,6 +5,8 @@ import datetime
 import os
 import base64
 from src.models.report_creator import ExperimentReportManager
+from src.models.plate_reading import as_frame, modified_frame, modified_plate
+from src.models.group_stats import with_current_statistics
 
 
 
@@ -65,10 +67,7 @@ def main():
 
     # Initialize the manager and load data
     manager = ExperimentReportManager()
-    editor_data = manager.load_json_file("TRACKERS/editor_file_tracker.json")
-    report_data = manager.load_json_file("TRACKERS/report_metadata_tracker.json")
-
-    if not editor_data:
+    if not manager.list_experiments():
         st.warning("No experiment data found.")
         st.stop()
 
@@ -79,7 +78,7 @@ def main():
         st.info("Please select an experiment to continue.")
         st.stop()
 
-    experiment_data = editor_data[selected_experiment]
+    experiment_data = manager.load_editor_entry(selected_experiment)
     subdatasets = {k: v for k, v in experiment_data.items() if k.isdigit() and isinstance(v, dict)}
 
     if not subdatasets:
@@ -91,7 +90,7 @@ def main():
     metadata_fields = {
         "Plate Type": {
             "type": "selectbox",
-            "options": ["96 wells", "48 wells", "24 wells", "12 wells"],
+            "options": ["1536 wells", "384 wells", "96 wells", "48 wells", "24 wells", "12 wells"],
             "default_source": experiment_data.get("plate_type", " "),# "96 wells"),
         },
         "Timepoint": {
@@ -131,12 +130,12 @@ def main():
 
     # Show single metadata
     metadata_key = selected_experiment
-    experiment_entry = report_data.setdefault(selected_experiment, {})
+    experiment_entry = manager.load_report_entry(selected_experiment)
     current_metadata = experiment_entry.setdefault("general_metadata", {})
 
     st.markdown("#### General Metadata Fields")
     if manager.display_metadata_fields(metadata_fields, current_metadata):
-        manager.save_json_file(report_data)
+        manager.save_report_entry(selected_experiment, experiment_entry)
         st.info("Metadata updated.")
 
     st.markdown("#### Custom General Fields")
@@ -145,7 +144,7 @@ def main():
     custom_added = manager.add_custom_metadata_field(current_metadata, metadata_key)
 
     if custom_changed or custom_added:
-        manager.save_json_file(report_data, path="TRACKERS/report_metadata_tracker.json")
+        manager.save_report_entry(selected_experiment, experiment_entry)
         st.info("Custom field changes saved.")
         st.rerun()
 
@@ -208,8 +207,8 @@ def main():
 
     for sub_idx in sorted_indices:
         selected_data = subdatasets[str(sub_idx)]
-        orig_df = pd.DataFrame(selected_data.get("index_subdataset_original", []))
-        mod_df = pd.DataFrame(selected_data.get("index_subdataset", []))
+        orig_df = as_frame(selected_data.get("index_subdataset_original"))
+        mod_df = modified_frame(selected_data)
         groups = selected_data.get("cell_groups", {})
 
         # === Summary ===
@@ -264,7 +263,7 @@ def main():
                 sub_custom_added = manager.add_custom_metadata_field(sub_fields, sub_key)
 
                 if sub_custom_changed or sub_custom_added:
-                    manager.save_json_file(report_data, path="TRACKERS/report_metadata_tracker.json")
+                    manager.save_report_entry(selected_experiment, experiment_entry)
                     st.info("Custom subdataset field changes saved.")
                     st.rerun()
 
@@ -282,8 +281,6 @@ def main():
             # notes = report_data.get("subdataset_custom_fields", {}).get(sub_key, {}).get("notes", "")
             # sub_fields = report_data.get("subdataset_custom_fields", {}).get(sub_key, {})
 
-            experiment_entry = report_data.get(selected_experiment, {})
-
             current_metadata = experiment_entry.get("general_metadata", {})
             subdataset_section = experiment_entry.get("subdataset_metadata", {})
             sub_fields = subdataset_section.get(str(idx), {})
@@ -293,12 +290,15 @@ def main():
             # Combine them: subdataset metadata overrides general metadata if needed
             # metadata = {**current_metadata, **sub_fields}
 
+            plate = modified_plate(s_data)
             all_data.append({
                 #"metadata": current_metadata,
                 "metadata": sub_fields,
-                "original_df": pd.DataFrame(s_data.get("index_subdataset_original", [])),
-                "modified_df": pd.DataFrame(s_data.get("index_subdataset", [])),
-                "cell_groups": s_data.get("cell_groups", {}),
+                "original_df": as_frame(s_data.get("index_subdataset_original")),
+                "modified_df": plate.to_frame() if plate is not None else pd.DataFrame(),
+                "patches": s_data.get("patches"),
+                # Statistics of the current cell values, not the ones saved with the group
+                "cell_groups": with_current_statistics(plate, s_data.get("cell_groups", {})),
                 #"notes": notes
             })
 
@@ -1,54 +1,283 @@
+import numpy as np
 import pandas as pd
+from numpy import nan as NaN
 from pandas import DataFrame
-from typing import Optional
+from typing import Iterator, Optional
+from pydantic import ConfigDict, Field
 from pydantic.dataclasses import dataclass
 
-from openpyxl import load_workbook, worksheet, workbook
+from openpyxl import load_workbook
 
-@dataclass
+from src.models import plate_layout
+from src.models.experiment import PLATE_ROW_RANGES
+from src.models.plate_layout import DEFAULT_PLATE_FORMAT, PLATE_FORMATS
+
+
+@dataclass(config=ConfigDict(arbitrary_types_allowed=True))
 class BoardReading:
-    name : Optional[str] = "NoName"
     wells_data : DataFrame # contains the individual well measurings
-    labels : Optional[list[str]] = [] # may not be possible to determine
+    name : Optional[str] = "NoName" # label found above the plate (e.g. "1h", "top read")
+    labels : list[str] = Field(default_factory=list) # may not be possible to determine
+    first_line : int = 0 # data row (0-based, header excluded) where the plate starts
+    last_line : int = 0 # data row of the plate's last kept row
+    complete : bool = True # False if the sheet ended while the plate was still open
+
 
 class ExcellImporter:
+    """
+    Streams plate readings out of a plate-reader export one plate at a time.
+
+    The workbook is opened in openpyxl read-only mode and rows are consumed
+    with ``iter_rows(values_only=True)``, so only the plate currently being
+    assembled is held in memory. Plate boundaries follow the same rules as
+    ``Experiment.split_into_subdatasets``.
+    """
+
+    def __init__(self, path: str, sheet_name: Optional[str] = None, valid_rows: Optional[list[str]] = None,
+                 start_line: int = 0) -> None:
+        self.path = path
+        self.sheet_name = sheet_name
+        self.valid_rows = valid_rows  # inferred from the first column when not given
+        self.start_line = start_line  # data rows before this one were imported already and are skipped
+        self.columns = []
+        self.current_line = 0
+        self._rows = None
+        self._lookahead = None
+        self._pending_name = "NoName"
+        self._row_index_memo = {}
+
+    def import_complete(self) -> list[BoardReading]:
+        """Read every plate in the sheet and return them as a list."""
+        return list(self.iter_board_readings())
+
+    def iter_board_readings(self) -> Iterator[BoardReading]:
+        """
+        Yield one BoardReading per plate, as soon as its last row has been read.
+        """
+        if self.valid_rows is None:
+            self.valid_rows = self.infer_valid_rows()
+
+        workbook, worksheet = self.__open_file(self.path, self.sheet_name)
+        try:
+            self._rows = worksheet.iter_rows(values_only=True)
+            if self.__find_starting_line() is None:
+                return
+            if self.start_line:
+                # openpyxl skips the earlier rows without building their cells
+                self._rows = worksheet.iter_rows(min_row=self.start_line + 2, values_only=True)
+                self.current_line = self.start_line
+
+            while self.__find_next_table():
+                reading = self.load_board_reading()
+                if reading is not None:
+                    yield reading
+        finally:
+            self._rows = None
+            workbook.close()
+
+    def infer_valid_rows(self) -> list[str]:
+        """
+        Infer the plate row letters from a streamed scan of the first column only.
+        """
+        workbook, worksheet = self.__open_file(self.path, self.sheet_name)
+        try:
+            rows = worksheet.iter_rows(max_col=1, values_only=True)
+            next(rows, None)  # header row
+            codes = np.fromiter((self._row_index(row[0] if row else None) for row in rows), dtype=np.int16)
+        finally:
+            workbook.close()
+
+        plate_type = plate_layout.detect_plate_format(codes) or DEFAULT_PLATE_FORMAT
+        return PLATE_ROW_RANGES[plate_type]
+
+    def sniff(self, stop_after: Optional[int] = 1) -> dict:
+        """
+        Cheap validation: read the sheet dimensions and the first column only,
+        stopping as soon as ``stop_after`` complete plates have been seen.
+        With ``stop_after=None`` the whole first column is scanned and the
+        plate count matches ``Experiment.split_into_subdatasets``.
 
-    def __init__(self) -> None:
+        Returns:
+            dict: "plate_type" (None if no plate was found), "plates", "rows",
+                  "columns" and "complete" (False if the scan stopped early).
+        """
+        workbook, worksheet = self.__open_file(self.path, self.sheet_name)
+        try:
+            n_rows = worksheet.max_row  # from the sheet's dimension record, None if it is missing
+            header = next(worksheet.iter_rows(max_row=1, values_only=True), ())
+            n_cols = len(header)
+
+            format_rows = {n: name for name, (n, _) in PLATE_FORMATS.items()}
+            codes = []
+            found = []           # plate format of every complete plate seen
+            run = -1             # last row of the current run of consecutive labels from A, or -1
+
+            rows = worksheet.iter_rows(min_row=2, max_col=1, values_only=True)
+            for row in rows:
+                code = self._row_index(row[0] if row else None)
+                codes.append(code)
+                if code < 0:
+                    continue
+                if code == run + 1:
+                    run = code
+                    continue
+                # The run is broken: it was a plate if it covered every row of a format
+                if run + 1 in format_rows:
+                    found.append(format_rows[run + 1])
+                    if stop_after is not None and len(found) >= stop_after:
+                        break
+                run = 0 if code == 0 else -1
+            else:
+                codes = np.asarray(codes, dtype=np.int16)
+                plate_type = plate_layout.detect_plate_format(codes)
+                n_plates = 0
+                if plate_type is not None:
+                    n_plates = len(plate_layout.find_plate_blocks(codes, PLATE_FORMATS[plate_type][0]))
+                return {
+                    "plate_type": plate_type if n_plates else None,
+                    "plates": n_plates,
+                    "rows": max(n_rows or 0, len(codes) + 1),
+                    "columns": n_cols,
+                    "complete": True,
+                }
+        finally:
+            workbook.close()
+
+        return {
+            "plate_type": max(found, key=lambda name: PLATE_FORMATS[name][0]),
+            "plates": len(found),
+            "rows": max(n_rows or 0, len(codes) + 1),  # At least the rows scanned (+ header)
+            "columns": n_cols,
+            "complete": False,
+        }
+
+    def __open_file(self, path: str, sheet_name: Optional[str]):
+        workbook = load_workbook(filename=path, read_only=True, data_only=True)
+        worksheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        if (worksheet.max_row, worksheet.max_column) == (1, 1):
+            # Some writers leave the dimension record at "A1"; read-only iteration
+            # would stop there, so read until the last row actually stored instead
+            worksheet.reset_dimensions()
+        return workbook, worksheet
+
+    def __find_starting_line(self) -> Optional[int]:
+        """
+        Consume the header row (as ``read_excel`` would) and return the first data line.
+        """
+        header = next(self._rows, None)
+        if header is None:
+            return None
+
+        self.columns = self._column_names(header)
         self.current_line = 0
-        pass
+        self._lookahead = None
+        return self.current_line
+
+    def __find_next_table(self) -> bool:
+        """
+        Advance to the next row that opens a plate (or a stray closing row).
+
+        Returns:
+            bool: False once the sheet is exhausted.
+        """
+        while True:
+            row = self.__next_row()
+            if row is None:
+                return False
+
+            row_index = self._row_index(row[0])
+            if row_index == 0 or row_index == len(self.valid_rows) - 1:
+                self._lookahead = row
+                return True
+
+            label = self._label(row[0])
+            if label and label != "nan":
+                self._pending_name = label
+
+    def load_board_reading(self) -> Optional[BoardReading]:
+        """
+        Collect the rows of the plate that starts at the current line.
+        """
+        first_line = self.current_line - 1
+        rows, index = [self._lookahead], [first_line]
+        self._lookahead = None
+
+        last_row = len(self.valid_rows) - 1
+
+        # A closing label with no open plate is a plate of its own, as in the split logic
+        if self._row_index(rows[0][0]) != 0:
+            return self._board_reading(rows, index)
 
-    def import_complete(self):
-        line = self.__find_starting_line()
-        
-        while(self.__find_next_table()):
-            self.__load_board_readings()
-            
+        while True:
+            row = self.__next_row()
+            if row is None:
+                # More rows may still be appended to this plate
+                return self._board_reading(rows, index, complete=False)
 
+            row_index = self._row_index(row[0])
+            if row_index == 0:
+                # The next plate starts before this one was closed
+                self._lookahead = row
+                return self._board_reading(rows, index)
+            if row_index == last_row:
+                rows.append(row)
+                index.append(self.current_line - 1)
+                break
+            if 0 < row_index < last_row:
+                rows.append(row)
+                index.append(self.current_line - 1)
 
-    def __open_file(self,path:str, sheet_name:str):
-        pass
+        return self._board_reading(rows, index)
 
+    def __next_row(self) -> Optional[tuple]:
+        if self._lookahead is not None:
+            row, self._lookahead = self._lookahead, None
+            return row
+        row = next(self._rows, None)
+        if row is None:
+            return None
+        self.current_line += 1
+        return self._pad(row)
 
-    def __find_starting_line(self):
-        while(True):
-            pass
-            
-    
-    def __find_next_table(self):
-        pass
+    def _board_reading(self, rows: list[tuple], index: list[int], complete: bool = True) -> BoardReading:
+        wells_data = DataFrame.from_records(rows, columns=self.columns, index=pd.Index(index))
+        labels = [self._label(value) for value in wells_data.iloc[:, 0]]
+        reading = BoardReading(wells_data=wells_data, name=self._pending_name, labels=labels,
+                               first_line=index[0], last_line=index[-1], complete=complete)
+        self._pending_name = "NoName"
+        return reading
 
-    def load_board_reading(self):
-        pass
+    def _pad(self, row: tuple) -> tuple:
+        # Empty cells become NaN, as they would through read_excel
+        width = len(self.columns)
+        values = [NaN if value is None else value for value in row[:width]]
+        return tuple(values) + (NaN,) * (width - len(values))
 
+    def _row_index(self, value) -> int:
+        """Plate row index of a first-column cell (-1 if none), memoized per distinct value."""
+        key = self._label(value)
+        row_index = self._row_index_memo.get(key)
+        if row_index is None:
+            row_index = self._row_index_memo[key] = plate_layout.row_index_of(key)
+        return row_index
 
+    @staticmethod
+    def _label(value) -> str:
+        """String form of a first-column cell, matching ``astype(str).str.strip()``."""
+        if value is None or value != value:
+            return "nan"
+        return str(value).strip()
 
-    ### TEMP ###
-    path = "tests/artifacts/20230224_triton_VVB.xlsx"
-    sheet_name = "Plate 1 - Sheet1 (2)"
-    ############
-    
-    # excell_file = pd.ExcelFile(path)
-    # self.csv_file = pd.read_excel(excell_file, sheet_name=sheet_name).to_csv (sheet_name+".csv", index = None, header=True)
-    wb = load_workbook(filename = path)
-    ws = wb.get_sheet_by_name(sheet_name)
-    print(ws.dimensions)
\ No newline at end of file
+    @staticmethod
+    def _column_names(header: tuple) -> list:
+        """Name header cells like ``read_excel``: blanks become 'Unnamed: i', duplicates get '.n'."""
+        names, seen = [], {}
+        for i, value in enumerate(header):
+            name = f"Unnamed: {i}" if value is None else value
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            names.append(name)
+        return names
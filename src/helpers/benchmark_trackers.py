@@ -0,0 +1,92 @@
+"""
+Compare the tracker serializers (see tracker_codec) on the JSON tracker
+files of a directory: encode and decode time and on-disk size, against the
+original indented JSON. The directory is only read; every serializer writes
+its files into a temporary directory.
+
+Usage:
+    python -m src.helpers.benchmark_trackers [trackers_dir] [repeat]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from src.helpers.tracker_codec import TrackerSerializer, msgpack, zstandard
+from src.helpers.tracker_store import DEFAULT_TRACKERS_DIR, JsonTrackerStore, TRACKER_FILES
+
+
+def serializer_options() -> list[tuple[str, str]]:
+    """Every (format, compression) pair usable in this environment."""
+    compressions = ["none", "gzip"] + (["zstd"] if zstandard is not None else [])
+    formats = ["pretty", "compact"] + (["msgpack"] if msgpack is not None else [])
+    return [(fmt, compression) for fmt in formats for compression in compressions]
+
+
+def benchmark(tracker: str, data: dict, repeat: int = 5) -> list[dict]:
+    """
+    Time every serializer on the content `data` of `tracker` (best of `repeat`
+    runs), then write it with a JSON store into a temporary directory and read
+    it back from there.
+
+    Returns:
+        list[dict]: One row per serializer with "format", "compression",
+                    "bytes" (size of the written file), "encode_ms" and "decode_ms".
+    """
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="tracker_benchmark_") as scratch:
+        for fmt, compression in serializer_options():
+            serializer = TrackerSerializer(fmt, compression)
+            encode_s, decode_s = float("inf"), float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                payload = serializer.encode(data)
+                encode_s = min(encode_s, time.perf_counter() - start)
+                start = time.perf_counter()
+                serializer.decode(payload)
+                decode_s = min(decode_s, time.perf_counter() - start)
+
+            store = JsonTrackerStore(os.path.join(scratch, f"{fmt}_{compression}"), serializer)
+            store.save(tracker, data)
+            if json.dumps(store.load(tracker)) != json.dumps(data):  # Not ==: NaN cells never compare equal
+                raise AssertionError(f"{fmt}/{compression} does not round-trip")
+            rows.append({
+                "format": fmt,
+                "compression": compression,
+                "bytes": os.path.getsize(store.path(tracker)),
+                "encode_ms": encode_s * 1000,
+                "decode_ms": decode_s * 1000,
+            })
+    return rows
+
+
+def report(directory: str = DEFAULT_TRACKERS_DIR, repeat: int = 5) -> str:
+    """Benchmark table for every JSON tracker file found in `directory` (read only)."""
+    lines = []
+    for tracker, filename in TRACKER_FILES.items():
+        # Plain json.load, not a store: opening one may recover or migrate the directory
+        try:
+            with open(os.path.join(directory, filename), "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+        if not data:
+            continue
+        rows = benchmark(tracker, data, repeat)
+        baseline = rows[0]["bytes"]  # pretty / none: the original layout
+        lines.append(f"\n{tracker} ({baseline / 1024:.1f} KB as indented JSON)")
+        lines.append(f"{'format':<9} {'compression':<12} {'size KB':>9} {'ratio':>6} {'encode ms':>10} {'decode ms':>10}")
+        for row in rows:
+            lines.append(
+                f"{row['format']:<9} {row['compression']:<12} {row['bytes'] / 1024:>9.1f} "
+                f"{row['bytes'] / baseline:>6.2f} {row['encode_ms']:>10.2f} {row['decode_ms']:>10.2f}"
+            )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TRACKERS_DIR
+    if not os.path.isdir(target):
+        print(__doc__)
+        sys.exit(1)
+    print(report(target, int(sys.argv[2]) if len(sys.argv) > 2 else 5))
@@ -0,0 +1,175 @@
+import datetime
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+# Column kinds that are written to raw .npy blocks (memory-mappable on load)
+NUMPY_KINDS = "biufcmM"
+OBJECTS_FILE = "objects.json"
+
+# Cells of object columns that JSON cannot hold are stored as {tag: ISO text}
+TEMPORAL_TAGS = {
+    "$datetime": pd.Timestamp,
+    "$date": datetime.date.fromisoformat,
+    "$time": datetime.time.fromisoformat,
+    "$timedelta": pd.Timedelta,
+}
+
+
+def data_dir_for(filepath: str) -> str:
+    """Directory holding the column files that belong to an experiment sidecar."""
+    return os.path.splitext(filepath)[0] + ".data"
+
+
+def write_frame(df: DataFrame, data_dir: str) -> dict:
+    """
+    Write a DataFrame as columnar files and return its layout description.
+
+    Numeric, boolean and datetime columns are stacked into one ``.npy``
+    block per dtype (one row per column, so each column is a contiguous
+    slice). Anything else (labels, mixed cells) goes into a single
+    ``objects.json``, with dates and times tagged so that they come back
+    as dates and times rather than strings. The directory is written next to the target and
+    swapped in at the end, so a crash never leaves a half-written dataset.
+    """
+    tmp_dir = f"{data_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns, objects, blocks = [], {}, {}
+    for i in range(df.shape[1]):
+        values = df.iloc[:, i].to_numpy()
+        if values.dtype.kind in NUMPY_KINDS:
+            block = blocks.setdefault(values.dtype.str, [])
+            columns.append({"kind": "npy", "block": values.dtype.str, "row": len(block)})
+            block.append(values)
+        else:
+            objects[str(i)] = [_encode_cell(v) for v in values.tolist()]
+            columns.append({"kind": "json"})
+
+    block_files = {}
+    for dtype, arrays in blocks.items():
+        file_name = f"block_{len(block_files)}.npy"
+        np.save(os.path.join(tmp_dir, file_name), np.stack(arrays), allow_pickle=False)
+        block_files[dtype] = file_name
+
+    if isinstance(df.index, pd.RangeIndex):
+        index = {"kind": "range", "start": df.index.start, "stop": df.index.stop, "step": df.index.step}
+    else:
+        objects["index"] = [_encode_cell(v) for v in df.index.tolist()]
+        index = {"kind": "json"}
+
+    with open(os.path.join(tmp_dir, OBJECTS_FILE), "w", encoding="utf-8") as file:
+        json.dump(objects, file, ensure_ascii=False, default=str)
+
+    shutil.rmtree(data_dir, ignore_errors=True)
+    os.replace(tmp_dir, data_dir)
+
+    return {
+        "labels": [_json_label(c) for c in df.columns],
+        "columns": columns,
+        "blocks": block_files,
+        "index": index,
+        "n_rows": len(df),
+    }
+
+
+def open_arrays(data_dir: str, layout: dict, mmap: bool = True) -> dict:
+    """
+    Open the stored columns as NumPy arrays keyed by column position.
+
+    Numeric columns come back as views into read-only memory maps when
+    ``mmap`` is set, so nothing is read from disk until values are touched.
+    """
+    with open(os.path.join(data_dir, OBJECTS_FILE), "r", encoding="utf-8") as file:
+        objects = json.load(file, object_hook=_decode_cell)
+
+    blocks = {
+        dtype: np.load(os.path.join(data_dir, file_name), mmap_mode="r" if mmap else None)
+        for dtype, file_name in layout.get("blocks", {}).items()
+    }
+
+    arrays = {}
+    for i, column in enumerate(layout["columns"]):
+        if column["kind"] == "npy":
+            arrays[i] = blocks[column["block"]][column["row"]]
+        else:
+            arrays[i] = np.array([np.nan if v is None else v for v in objects[str(i)]], dtype=object)
+
+    if layout["index"]["kind"] == "json":
+        arrays["index"] = objects["index"]
+    return arrays
+
+
+def read_frame(data_dir: str, layout: dict, mmap: bool = True) -> DataFrame:
+    """Rebuild the DataFrame described by ``layout`` from its column files."""
+    arrays = open_arrays(data_dir, layout, mmap=mmap)
+    return rows_from_arrays(arrays, layout)
+
+
+def rows_from_arrays(arrays: dict, layout: dict, positions: np.ndarray | None = None) -> DataFrame:
+    """
+    Build a DataFrame from already opened arrays, optionally keeping only
+    the rows at ``positions``. Only those rows are read from the memory maps.
+    """
+    index = layout["index"]
+    if index["kind"] == "range":
+        index = pd.RangeIndex(index["start"], index["stop"], index["step"])
+    else:
+        index = pd.Index(arrays["index"])
+
+    columns = range(len(layout["columns"]))
+    if positions is None:
+        data = {i: arrays[i] for i in columns}
+    else:
+        index = index[positions]
+        data = {i: arrays[i][positions] for i in columns}
+
+    # Build by position so duplicate column labels survive the round trip
+    df = DataFrame(data, index=index)
+    df.columns = layout["labels"]
+    return df
+
+
+def _encode_cell(value):
+    """A cell of an object column as JSON: None for missing, tagged ISO text for dates and times."""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (datetime.datetime, np.datetime64)):  # Before date: datetimes are dates too
+        return {"$datetime": pd.Timestamp(value).isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {"$time": value.isoformat()}
+    if isinstance(value, (datetime.timedelta, np.timedelta64)):
+        return {"$timedelta": pd.Timedelta(value).isoformat()}
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value if isinstance(value, (str, int, float, bool)) else str(value)
+
+
+def _decode_cell(obj: dict):
+    """json object_hook: inverse of _encode_cell for tagged cells."""
+    if len(obj) == 1:
+        (tag, text), = obj.items()
+        parse = TEMPORAL_TAGS.get(tag)
+        if parse is not None:
+            return parse(text)
+    return obj
+
+
+def _json_label(label):
+    """Column labels must survive JSON: NumPy scalars become Python ones, anything else a string."""
+    if isinstance(label, np.generic):
+        return label.item()
+    return label if isinstance(label, (str, int, float)) else str(label)
+
+
+def remove_frame(data_dir: str):
+    """Delete the column files of a dataset, if any."""
+    shutil.rmtree(data_dir, ignore_errors=True)
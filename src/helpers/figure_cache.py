@@ -0,0 +1,133 @@
+import hashlib
+import io
+import json
+import math
+import threading
+from collections import OrderedDict
+import streamlit as st
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+FALLBACK_COLOR = "#A0A0A0"  # Bars of groups saved without a color
+
+
+class FigureCache:
+    """
+    In-memory cache of rendered statistics charts, as PNG or SVG bytes.
+
+    Charts are keyed on a hash of what they show (group names, colors and
+    statistic values, metrics, format and layout), so a chart is rendered
+    once per change and every later rerun serves the stored bytes. Figures
+    are drawn on the Agg canvas without going through pyplot, so none is
+    left registered (and leaking) after rendering. Entries are evicted
+    least-recently-used once their total size passes ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> bytes, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()  # Shared across Streamlit sessions
+
+    # ---- PUBLIC API ----
+    def metric_chart(self, rows: list[dict], metric: str, fmt: str = "png") -> bytes:
+        """
+        Bar chart of one metric across groups.
+
+        Args:
+            rows (list[dict]): One dict per group with "Group", "color" and the metric values.
+            metric (str): Statistic to plot (e.g. "Mean").
+            fmt (str): "png" or "svg".
+
+        Returns:
+            bytes: The rendered image.
+        """
+        return self._get(("metric", metric, fmt), rows, lambda: render_charts(rows, [metric], fmt, ncols=1))
+
+    def combined_chart(self, rows: list[dict], metrics: list[str], fmt: str = "png", ncols: int = 3) -> bytes:
+        """One figure with a bar chart per metric, replacing len(metrics) separate renders."""
+        return self._get(("combined", tuple(metrics), fmt, ncols), rows,
+                         lambda: render_charts(rows, metrics, fmt, ncols))
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    # ---- INTERNALS ----
+    def _get(self, layout: tuple, rows: list[dict], render) -> bytes:
+        key = hashlib.blake2b(
+            json.dumps([layout, rows], ensure_ascii=False, default=str).encode("utf-8"), digest_size=16
+        ).hexdigest()
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        image = render()
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = image
+                self._bytes += len(image)
+                self._evict(keep=key)
+        return image
+
+    def _evict(self, keep: str):
+        """Drop least-recently-used charts until the cache fits in max_bytes."""
+        for key in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._bytes -= len(self._entries.pop(key))
+
+
+def render_charts(rows: list[dict], metrics: list[str], fmt: str = "png", ncols: int = 3) -> bytes:
+    """
+    Render one bar chart per metric (groups on the x axis, in their colors) into a
+    single figure, with the Agg canvas.
+
+    Returns:
+        bytes: PNG or SVG image.
+    """
+    ncols = max(1, min(ncols, len(metrics)))
+    nrows = math.ceil(len(metrics) / ncols)
+    fig = Figure(figsize=(4 * ncols, 3 * nrows))
+    FigureCanvasAgg(fig)
+
+    names = [str(row["Group"]) for row in rows]
+    colors = [row.get("color") or FALLBACK_COLOR for row in rows]
+    for i, metric in enumerate(metrics):
+        ax = fig.add_subplot(nrows, ncols, i + 1)
+        ax.bar(names, [row.get(metric, math.nan) for row in rows], color=colors)
+        ax.set_title(f"{metric} by Group", fontsize=11)
+        ax.set_xlabel("Group", fontsize=9)
+        ax.set_ylabel(metric, fontsize=9)
+        ax.grid(axis="y", linestyle="--", alpha=0.6)
+        # Improve x-label readability
+        ax.tick_params(axis="x", labelsize=9, labelrotation=45)
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment("right")
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    """Process-wide FigureCache shared by every session."""
+    return FigureCache()
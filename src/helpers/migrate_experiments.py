@@ -0,0 +1,39 @@
+"""
+One-shot migration of saved experiments from the single-file JSON format
+to the binary sidecar format.
+
+Usage:
+    python -m src.helpers.migrate_experiments [experiments_dir]
+"""
+import glob
+import os
+import sys
+from src.models.experiment import Experiment
+
+
+def migrate_experiments(directory: str = "experiments") -> list[str]:
+    """
+    Rewrite every legacy experiment JSON in `directory` with binary storage.
+    Timestamps and notes are kept as they were.
+
+    Returns:
+        list[str]: Paths of the migrated experiment files.
+    """
+    migrated = []
+    for filepath in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            if not Experiment.is_legacy_file(filepath):
+                continue
+            experiment = Experiment.load(filepath)
+            experiment.filepath = filepath
+            experiment.save(storage="npy", touch=False)
+            migrated.append(filepath)
+        except Exception as e:
+            print(f"Skipped {filepath}: {e}", file=sys.stderr)
+    return migrated
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "experiments"
+    done = migrate_experiments(target)
+    print(f"Migrated {len(done)} experiment(s) in {target}")
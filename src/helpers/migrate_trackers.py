@@ -0,0 +1,86 @@
+"""
+Import the JSON trackers into the SQLite tracker store, or export the store
+back to JSON (e.g. for backups or to switch to the json backend), or split
+the single-file JSON trackers into per-experiment shards (sharded backend).
+
+Importing and sharding archive the migrated JSON files as *.imported (see
+archive_json_trackers): from then on the database or the shards are the
+only copy being updated. A backend started on a directory where the plain
+JSON files are missing reads the archived copies instead, with a warning.
+
+Usage:
+    python -m src.helpers.migrate_trackers import [trackers_dir]
+    python -m src.helpers.migrate_trackers export [trackers_dir] [output_dir]
+    python -m src.helpers.migrate_trackers shard [trackers_dir]
+"""
+import os
+import sys
+from src.helpers.tracker_store import (
+    DB_FILE, DEFAULT_TRACKERS_DIR, SHARDED_TRACKERS, ShardedTrackerStore, SqliteTrackerStore, archive_json_trackers
+)
+
+
+def import_trackers(directory: str = DEFAULT_TRACKERS_DIR) -> list[str]:
+    """
+    Replace the store's content with the JSON trackers found in `directory`,
+    then archive the JSON files.
+
+    Returns:
+        list[str]: Names of the trackers imported.
+    """
+    store = SqliteTrackerStore(os.path.join(directory, DB_FILE))
+    try:
+        imported = store.import_json(directory)
+    finally:
+        store.close()
+    archive_json_trackers(directory, imported)
+    return imported
+
+
+def export_trackers(directory: str = DEFAULT_TRACKERS_DIR, output_dir: str | None = None) -> list[str]:
+    """
+    Write the store's trackers as JSON files into `output_dir` (default: `directory`).
+
+    Returns:
+        list[str]: Paths of the JSON files written.
+    """
+    db_path = os.path.join(directory, DB_FILE)
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"No tracker database at {db_path}")
+    store = SqliteTrackerStore(db_path)
+    try:
+        return store.export_json(output_dir or directory)
+    finally:
+        store.close()
+
+
+def shard_trackers(directory: str = DEFAULT_TRACKERS_DIR) -> list[str]:
+    """
+    Replace the shards with the content of the single-file editor and report
+    trackers in `directory`, then archive those files. The files tracker is
+    not sharded and stays in place.
+
+    Returns:
+        list[str]: Names of the trackers sharded.
+    """
+    store = ShardedTrackerStore(directory)
+    sharded = [tracker for tracker in SHARDED_TRACKERS if store.import_single_file(tracker)]
+    archive_json_trackers(directory, sharded)
+    return sharded
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("import", "export", "shard"):
+        print(__doc__)
+        sys.exit(1)
+
+    target = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_TRACKERS_DIR
+    if sys.argv[1] == "import":
+        done = import_trackers(target)
+        print(f"Imported {', '.join(done) or 'no'} tracker(s) from {target}")
+    elif sys.argv[1] == "shard":
+        done = shard_trackers(target)
+        print(f"Sharded {', '.join(done) or 'no'} tracker(s) in {target}")
+    else:
+        done = export_trackers(target, sys.argv[3] if len(sys.argv) > 3 else None)
+        print(f"Exported {len(done)} tracker file(s)")
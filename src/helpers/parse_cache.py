@@ -0,0 +1,211 @@
+import atexit
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from pandas import DataFrame, read_excel
+import streamlit as st
+
+# Mixed into every digest: bump it whenever the way workbooks are parsed
+# changes, so that entries parsed the old way are no longer served
+PARSER_VERSION = "2"
+
+
+class ParseCache:
+    """
+    Persistent, content-addressed cache of parsed experiment workbooks.
+
+    Each entry holds the full sheet DataFrame, pickled under ``cache_dir``
+    and named by a BLAKE2 digest of the file contents and PARSER_VERSION.
+    A small JSON index maps source paths to digests together with the size
+    and mtime seen at hashing time, so unchanged files are looked up without
+    re-hashing, while edited files get a new digest and are re-parsed.
+    Entries are evicted least-recently-used once the cache grows past
+    ``max_bytes``. Hits only update the access times in memory; the index
+    is written on misses, invalidations and flush().
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir: str = "CACHE/parse_cache", max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()  # Shared across Streamlit sessions
+        self._dirty = False             # Access times changed since the index was written
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    # ---- PUBLIC API ----
+    def load(self, filepath: str) -> DataFrame:
+        """
+        Return the sheet DataFrame of an Excel file, parsing it only if no
+        valid cache entry exists.
+        """
+        with self._lock:
+            return self._load(filepath)
+
+    def _load(self, filepath: str) -> DataFrame:
+        digest = self.digest(filepath)
+        entry = self.index["entries"].get(digest)
+        blob_path = self._blob_path(digest)
+
+        if entry and os.path.exists(blob_path):
+            try:
+                with open(blob_path, "rb") as file:
+                    parsed = pickle.load(file)
+                self.hits += 1
+                entry["last_access"] = time.time()
+                self._dirty = True
+                return parsed["dataframe"]
+            except Exception:
+                # Unreadable entry: drop it and parse again
+                self._remove_entry(digest)
+
+        self.misses += 1
+        dataframe = read_excel(filepath)
+        self._store(digest, filepath, {"dataframe": dataframe})
+        return dataframe
+
+    def digest(self, filepath: str) -> str:
+        """
+        Hash of a file's contents and PARSER_VERSION, reused from the index while
+        the file's size and mtime and the parser version are unchanged.
+        """
+        stats = os.stat(filepath)
+        known = self.index["paths"].get(os.path.abspath(filepath))
+        if (known and known["size"] == stats.st_size and known["mtime_ns"] == stats.st_mtime_ns
+                and known.get("parser_version") == PARSER_VERSION):
+            return known["digest"]
+
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(f"parser {PARSER_VERSION}\n".encode("utf-8"))
+        with open(filepath, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+
+        # The file or the parser changed: its previous parse is stale unless another path shares it
+        if known and known["digest"] != digest:
+            self.index["paths"].pop(os.path.abspath(filepath))
+            if not any(p["digest"] == known["digest"] for p in self.index["paths"].values()):
+                self._remove_entry(known["digest"])
+
+        self.index["paths"][os.path.abspath(filepath)] = {
+            "digest": digest,
+            "size": stats.st_size,
+            "mtime_ns": stats.st_mtime_ns,
+            "parser_version": PARSER_VERSION,
+        }
+        return digest
+
+    def invalidate(self, filepath: str):
+        """Forget the cached parse of a file, e.g. after it was removed from the trackers."""
+        self.invalidate_many([filepath])
+
+    def invalidate_many(self, filepaths: list[str]):
+        """Forget the cached parses of several files, writing the index once."""
+        with self._lock:
+            for filepath in filepaths:
+                self._invalidate(filepath)
+            self._save_index()
+
+    def _invalidate(self, filepath: str):
+        known = self.index["paths"].pop(os.path.abspath(filepath), None)
+        if known and not any(p["digest"] == known["digest"] for p in self.index["paths"].values()):
+            self._remove_entry(known["digest"])
+
+    def clear(self):
+        """Remove every cache entry and reset the counters."""
+        with self._lock:
+            for digest in list(self.index["entries"]):
+                self._remove_entry(digest)
+            self.index = {"paths": {}, "entries": {}}
+            self._save_index()
+            self.hits = 0
+            self.misses = 0
+
+    def flush(self):
+        """Write the access times of the hits since the index was last written."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current on-disk size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.index["entries"]),
+            "bytes": sum(e["bytes"] for e in self.index["entries"].values()),
+        }
+
+    # ---- INTERNALS ----
+    def _store(self, digest: str, filepath: str, parsed: dict):
+        blob_path = self._blob_path(digest)
+        tmp_path = f"{blob_path}.tmp"
+        with open(tmp_path, "wb") as file:
+            pickle.dump(parsed, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, blob_path)
+
+        self.index["entries"][digest] = {
+            "source": os.path.abspath(filepath),
+            "bytes": os.path.getsize(blob_path),
+            "last_access": time.time(),
+        }
+        self._evict(keep=digest)
+        self._save_index()
+
+    def _evict(self, keep: str | None = None):
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        entries = self.index["entries"]
+        total = sum(e["bytes"] for e in entries.values())
+        for digest, entry in sorted(entries.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            total -= entry["bytes"]
+            self._remove_entry(digest)
+
+    def _remove_entry(self, digest: str):
+        self.index["entries"].pop(digest, None)
+        try:
+            os.remove(self._blob_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.pkl")
+
+    def _load_index(self) -> dict:
+        path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as file:
+                    index = json.load(file)
+                index.setdefault("paths", {})
+                index.setdefault("entries", {})
+                return index
+            except (json.JSONDecodeError, OSError):
+                pass  # A broken index only costs re-parsing
+        return {"paths": {}, "entries": {}}
+
+    def _save_index(self):
+        path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.index, file)
+        os.replace(tmp_path, path)
+        self._dirty = False
+
+
+@st.cache_resource
+def get_parse_cache() -> ParseCache:
+    """Process-wide ParseCache shared by every session (and its counters)."""
+    cache = ParseCache()
+    atexit.register(cache.flush)  # Keep the LRU order of the hits across restarts
+    return cache
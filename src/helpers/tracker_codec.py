@@ -0,0 +1,94 @@
+"""
+Serializers for the tracker files: indented JSON (the original layout),
+compact JSON, or MessagePack, each optionally compressed with gzip or zstd.
+
+Decoding recognizes every combination from the payload itself, so changing
+the configuration never makes existing tracker files unreadable: they are
+rewritten in the new format the next time they are saved. MessagePack and
+zstd need the optional "msgpack" and "zstandard" packages.
+
+The serializer applies to every backend: the JSON-family stores encode
+whole tracker files with it, the SQLite store the record of every row.
+"""
+import gzip
+import json
+import os
+
+try:
+    import msgpack  # Optional, only needed for "msgpack" (pip install labreport[msgpack])
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard  # Optional, only needed for "zstd" (pip install labreport[zstd])
+except ImportError:
+    zstandard = None
+
+FORMAT_ENV = "LABREPORT_TRACKER_FORMAT"             # "pretty" (default), "compact" or "msgpack"
+COMPRESSION_ENV = "LABREPORT_TRACKER_COMPRESSION"   # "none" (default), "gzip" or "zstd"
+
+FORMAT_SUFFIXES = {"pretty": ".json", "compact": ".json", "msgpack": ".msgpack"}
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+# Every file suffix a tracker may have been written with
+SUFFIXES = tuple(dict.fromkeys(
+    f + c for f in FORMAT_SUFFIXES.values() for c in COMPRESSION_SUFFIXES.values()
+))
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class TrackerSerializer:
+    """Encodes tracker data to bytes and back, in the configured format and compression."""
+
+    def __init__(self, fmt: str = "pretty", compression: str = "none"):
+        if fmt not in FORMAT_SUFFIXES:
+            raise ValueError(f"Unknown tracker format: {fmt}")
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown tracker compression: {compression}")
+        if fmt == "msgpack" and msgpack is None:
+            raise ValueError("The msgpack format needs the 'msgpack' package")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression needs the 'zstandard' package")
+        self.format = fmt
+        self.compression = compression
+
+    @classmethod
+    def from_env(cls) -> 'TrackerSerializer':
+        """The serializer selected by FORMAT_ENV and COMPRESSION_ENV."""
+        return cls(os.environ.get(FORMAT_ENV, "pretty"), os.environ.get(COMPRESSION_ENV, "none"))
+
+    @property
+    def suffix(self) -> str:
+        return FORMAT_SUFFIXES[self.format] + COMPRESSION_SUFFIXES[self.compression]
+
+    def encode(self, data) -> bytes:
+        if self.format == "msgpack":
+            payload = msgpack.packb(data, use_bin_type=True)
+        elif self.format == "compact":
+            payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        else:
+            payload = json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+
+        if self.compression == "gzip":
+            return gzip.compress(payload, compresslevel=6, mtime=0)  # Same data, same bytes
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(payload)
+        return payload
+
+    @staticmethod
+    def decode(payload: bytes):
+        """Decode a payload written with any format and compression."""
+        if payload.startswith(GZIP_MAGIC):
+            payload = gzip.decompress(payload)
+        elif payload.startswith(ZSTD_MAGIC):
+            if zstandard is None:
+                raise ValueError("Reading a zstd-compressed tracker needs the 'zstandard' package")
+            payload = zstandard.ZstdDecompressor().decompressobj().decompress(payload)
+
+        if payload.lstrip()[:1] in (b"{", b"["):
+            return json.loads(payload.decode("utf-8"))
+        if msgpack is None:
+            raise ValueError("Reading a MessagePack tracker needs the 'msgpack' package")
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
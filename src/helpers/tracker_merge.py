@@ -0,0 +1,113 @@
+"""
+Three-way merge of editor tracker entries, for sessions that saved the same
+experiment concurrently (see TrackerStore.compare_and_swap).
+
+Every experiment entry and every sub-dataset carries a "version" counter
+that a session bumps when it writes changes. If the stored versions still
+match the ones a session started from, its entry is written as is;
+otherwise its changes are merged into the stored entry: sub-dataset by
+sub-dataset, cell by cell for edits and group by group for cell groups.
+Only when both sessions changed the very same cell, group or field does the
+later save win.
+"""
+
+_MISSING = object()
+
+# Sub-dataset fields merged key by key instead of as a whole
+_MAPPING_FIELDS = ("cell_groups", "renamed_columns")
+
+
+def record_versions(entry: dict | None) -> dict:
+    """Version counters of an experiment entry ("" for the experiment itself) and of its sub-datasets."""
+    if not entry:
+        return {}
+    versions = {"": entry.get("version", 0)}
+    for key, value in entry.items():
+        if _is_subdataset(key, value):
+            versions[key] = value.get("version", 0)
+    return versions
+
+
+def merge_entry(base: dict | None, ours: dict, theirs: dict | None) -> dict:
+    """
+    Merge `ours` (edited from `base`) into `theirs` (what is stored now).
+
+    Returns:
+        dict: The merged experiment entry.
+    """
+    base, theirs = base or {}, theirs or {}
+    merged = {}
+    for key in list(theirs) + [k for k in ours if k not in theirs]:
+        b, o, t = base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING)
+        if isinstance(o, dict) and isinstance(t, dict) and _is_subdataset(key, o):
+            value = merge_subdataset(b if isinstance(b, dict) else {}, o, t)
+        else:
+            value = _pick(b, o, t)
+        if value is not _MISSING:
+            merged[key] = value
+    return _versioned(merged, ours, theirs)
+
+
+def merge_subdataset(base: dict, ours: dict, theirs: dict) -> dict:
+    """Field-wise merge of one sub-dataset; patches by cell, groups and renames by name."""
+    merged = {}
+    same_original = ours.get("index_subdataset_original") == theirs.get("index_subdataset_original")
+    for field in list(theirs) + [f for f in ours if f not in theirs]:
+        b, o, t = base.get(field, _MISSING), ours.get(field, _MISSING), theirs.get(field, _MISSING)
+        if field == "version":
+            continue
+        if field == "patches" and same_original and isinstance(o, list) and isinstance(t, list):
+            value = merge_patches(b if isinstance(b, list) else [], o, t)
+        elif field in _MAPPING_FIELDS and isinstance(o, dict) and isinstance(t, dict):
+            value = _merge_mapping(b if isinstance(b, dict) else {}, o, t)
+        else:
+            value = _pick(b, o, t)
+        if value is not _MISSING:
+            merged[field] = value
+    return _versioned(merged, ours, theirs)
+
+
+def merge_patches(base: list, ours: list, theirs: list) -> list:
+    """Merge two cell patch sets cell by cell (cells are keyed by row and column)."""
+    def by_cell(patches):
+        return {(p["row"], p["column"]): p for p in patches}
+
+    merged = _merge_mapping(by_cell(base), by_cell(ours), by_cell(theirs))
+    return [merged[cell] for cell in sorted(merged)]
+
+
+def _merge_mapping(base: dict, ours: dict, theirs: dict) -> dict:
+    merged = {}
+    for key in list(theirs) + [k for k in ours if k not in theirs]:
+        value = _pick(base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING))
+        if value is not _MISSING:
+            merged[key] = value
+    return merged
+
+
+def _versioned(merged: dict, ours: dict, theirs: dict) -> dict:
+    """
+    Give a merged record its version: the one of the side it is identical to,
+    otherwise a version newer than both, so that a session that started from
+    either side sees that the record changed.
+    """
+    content = {key: value for key, value in merged.items() if key != "version"}
+    for side in (theirs, ours):
+        if content == {key: value for key, value in side.items() if key != "version"}:
+            if "version" in side:
+                content["version"] = side["version"]
+            return content
+    content["version"] = max(ours.get("version", 0), theirs.get("version", 0)) + 1
+    return content
+
+
+def _pick(base, ours, theirs):
+    """Keep the side that changed; if both did, ours (the later save) wins."""
+    if ours == base:
+        return theirs
+    return ours
+
+
+def _is_subdataset(key: str, value) -> bool:
+    """Editor tracker entries hold sub-datasets under digit keys, next to experiment-level fields."""
+    return key.isdigit() and isinstance(value, dict)
@@ -0,0 +1,1235 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import streamlit as st
+from src.helpers.tracker_codec import SUFFIXES, TrackerSerializer
+from src.helpers.tracker_merge import _is_subdataset, merge_entry, record_versions
+
+# Logical trackers and the JSON file each one lives in (json backend, import/export)
+TRACKER_FILES = {
+    "files": "file_tracker.json",             # Every tracked file (Explorer / Selector)
+    "editor": "editor_file_tracker.json",     # Sub-datasets, edits and groups per experiment
+    "report": "report_metadata_tracker.json", # Report metadata per experiment
+}
+
+DEFAULT_TRACKERS_DIR = "TRACKERS"
+DB_FILE = "trackers.db"
+JOURNAL_FILE = "trackers.journal.jsonl"
+DELETE_INTENT_FILE = "pending_delete.json"  # Files of a bulk delete in progress (file backends)
+IMPORTED_SUFFIX = ".imported"  # JSON trackers archived by migrate_trackers once migrated
+
+logger = logging.getLogger(__name__)
+
+# Per-experiment trackers the sharded backend splits into one file per experiment
+SHARDED_TRACKERS = ("editor", "report")
+
+# Sections of older report trackers holding entries of several files at once:
+# "experiment_metadata" keyed by file path, "subdataset_metadata" keyed by "<path>_<idx>"
+LEGACY_REPORT_SECTIONS = ("experiment_metadata", "subdataset_metadata")
+
+# "sqlite" (default), "sharded", "journal" or "json"; selects the backend used by get_tracker_store
+BACKEND_ENV = "LABREPORT_TRACKER_BACKEND"
+
+
+class TrackerStore:
+    """
+    Storage for the three trackers. Each tracker is a dict keyed by the
+    tracked file's path, loaded and saved as a whole by the callers.
+    Backends decide how much of it actually has to be written.
+    """
+
+    lazy_entries = False  # True if single entries can be read without loading the whole tracker
+
+    def load(self, tracker: str) -> dict:
+        raise NotImplementedError
+
+    def load_entry(self, tracker: str, filepath: str) -> dict | None:
+        """The entry of one file, or None if the file is not in the tracker."""
+        return self.load(tracker).get(filepath)
+
+    def tracked_paths(self, tracker: str) -> list[str]:
+        """The files a tracker holds entries for, in order."""
+        return list(self.load(tracker))
+
+    def save(self, tracker: str, data: dict):
+        raise NotImplementedError
+
+    def put(self, tracker: str, filepath: str, entry: dict):
+        """Insert or replace the entry of one file."""
+        self.update(tracker, {filepath: entry})
+
+    def update(self, tracker: str, changes: dict):
+        """Insert or replace several entries at once; a None value removes the entry."""
+        data = self.load(tracker)
+        for filepath, entry in changes.items():
+            if entry is None:
+                data.pop(filepath, None)
+            else:
+                data[filepath] = entry
+        self.save(tracker, data)
+
+    def compare_and_swap(self, tracker: str, filepath: str, base: dict | None, entry: dict | None) -> dict | None:
+        """
+        Write the entry of one file that a session edited starting from `base`.
+        If the stored versions (see tracker_merge) still match `base`, `entry`
+        replaces it as is; otherwise another session saved in between and
+        `entry`'s changes are merged into the stored entry. Only writers of the
+        same file wait for each other, and only while the entry is written.
+
+        Returns:
+            dict | None: The entry now stored; None if it was removed, here or
+                         (since `base` was read) by another session.
+        """
+        with _entry_lock(self, tracker, filepath):
+            current = self.load_entry(tracker, filepath)
+            if entry is not None and record_versions(current) != record_versions(base):
+                if current is None and base is not None:
+                    return None  # Removed meanwhile (e.g. deleted in the Explorer): do not bring it back
+                entry = merge_entry(base, entry, current)
+            self.update(tracker, {filepath: entry})
+            return entry
+
+    def delete_files(self, filepaths: list[str]):
+        """Remove files and everything nested that belongs to them, one pass per tracker."""
+        for tracker in TRACKER_FILES:
+            kept = without_files(tracker, self.load(tracker), filepaths)
+            if kept is not None:
+                self.save(tracker, kept)
+
+    def experiment_paths(self) -> list[str]:
+        """Paths of the tracked files that are experiments, in tracking order."""
+        return [path for path, info in self.load("files").items() if info.get("is_experiment", False)]
+
+    def version(self, tracker: str):
+        """
+        Token that changes whenever the stored tracker may have changed, so that a
+        cached copy can be reused while it stays the same. None means "unknown".
+        """
+        return None
+
+    def entry_version(self, tracker: str, filepath: str):
+        """Like version(), for the entry of one file."""
+        return self.version(tracker)
+
+    def close(self):
+        """Release files or connections held by the backend."""
+
+
+class JsonTrackerStore(TrackerStore):
+    """
+    The original layout: one document per tracker. The serializer (see
+    tracker_codec) picks the encoding; by default these are the original
+    pretty-printed JSON files.
+    """
+
+    def __init__(self, directory: str = DEFAULT_TRACKERS_DIR, serializer: TrackerSerializer | None = None):
+        self.directory = directory
+        self.serializer = serializer or TrackerSerializer.from_env()
+        self._warned_archives = set()  # Archived trackers already reported by read_single_file
+        self._recover()
+
+    def path(self, tracker: str) -> str:
+        stem = os.path.splitext(TRACKER_FILES[tracker])[0]
+        return os.path.join(self.directory, stem + self.serializer.suffix)
+
+    def load(self, tracker: str) -> dict:
+        data = self.read_single_file(tracker, include_archived=True)
+        return {} if data is None else data
+
+    def read_single_file(self, tracker: str, include_archived: bool = False):
+        """
+        Decode the single-file tracker. With `include_archived`, a tracker
+        archived by migrate_trackers (see archive_json_trackers) is read when
+        the plain file is missing, with a warning: its content may be older
+        than the backend it was migrated to. Every backend reads its source
+        files through here; only the explicit migrations archive them.
+
+        Returns:
+            The tracker, or None if there is no such file.
+        """
+        path = self.path(tracker)
+        data = self._read(path)
+        if data is not None or not include_archived:
+            return data
+        stem = path[:-len(self.serializer.suffix)]
+        for candidate in [path] + [stem + suffix for suffix in SUFFIXES if stem + suffix != path]:
+            try:
+                with open(candidate + IMPORTED_SUFFIX, "rb") as file:
+                    data = self.serializer.decode(file.read())
+            except FileNotFoundError:
+                continue
+            if candidate not in self._warned_archives:
+                self._warned_archives.add(candidate)
+                logger.warning(
+                    "%s is missing; reading its archived copy %s, which may be older than the "
+                    "store it was migrated to", candidate, candidate + IMPORTED_SUFFIX,
+                )
+            return data
+        return None
+
+    def save(self, tracker: str, data: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        self._write(self.path(tracker), _plain(data))
+
+    def delete_files(self, filepaths: list[str]):
+        """
+        Remove files from every tracker. The tracker files are written one after
+        the other, so the paths are recorded in an intent file first and it is
+        removed once every tracker is written: a delete interrupted by a crash
+        is finished the next time the store is opened.
+        """
+        intent_path = os.path.join(self.directory, DELETE_INTENT_FILE)
+        os.makedirs(self.directory, exist_ok=True)
+        _write_atomic(intent_path, json.dumps({"paths": list(filepaths)}, ensure_ascii=False))
+        self._delete_files(filepaths)
+        _remove(intent_path)
+
+    def version(self, tracker: str):
+        """The file's inode, mtime and size (None while it does not exist)."""
+        try:
+            return _stat_version(os.stat(self.path(tracker)))
+        except FileNotFoundError:
+            return None
+
+    def _delete_files(self, filepaths: list[str]):
+        TrackerStore.delete_files(self, filepaths)
+
+    def _recover(self):
+        """Finish a bulk delete left half-done by a crash (see delete_files)."""
+        try:
+            with open(os.path.join(self.directory, DELETE_INTENT_FILE), "r", encoding="utf-8") as file:
+                paths = json.load(file)["paths"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return
+        self.delete_files(paths)
+
+    def _read(self, path: str):
+        """
+        Decode a tracker file, or the same file written with another serializer
+        (e.g. before the configuration changed). None if neither exists.
+        """
+        stem = path[:-len(self.serializer.suffix)]
+        for candidate in [path] + [stem + suffix for suffix in SUFFIXES if stem + suffix != path]:
+            try:
+                with open(candidate, "rb") as file:
+                    return self.serializer.decode(file.read())
+            except FileNotFoundError:
+                continue
+        return None
+
+    def _write(self, path: str, data):
+        self._write_payload(path, self.serializer.encode(data))
+
+    def _write_payload(self, path: str, payload: bytes):
+        """Atomically write an encoded file and drop copies left by other serializers."""
+        _write_atomic(path, payload)
+        stem = path[:-len(self.serializer.suffix)]
+        for suffix in SUFFIXES:
+            if stem + suffix != path:
+                _remove(stem + suffix)
+
+
+class ShardedTrackerStore(JsonTrackerStore):
+    """
+    The per-experiment trackers (editor, report) split into one compact JSON
+    file per experiment, named by a hash of its path, plus a small index
+    listing the experiments in order. Opening an experiment reads only its
+    own shard, so it costs the same with ten experiments or thousands. The
+    files tracker stays a single JSON document.
+
+    On first use, single-file trackers found in the directory (or their
+    archived copies, see read_single_file) are split into shards; the
+    original files are left in place.
+    """
+
+    lazy_entries = True
+    INDEX_FILE = "index.json"
+
+    def _recover(self):
+        # (tracker, filepath) -> (entry_version, payload) of the shards last read or written,
+        # so that save() compares entries in memory instead of reading every shard back
+        self._shards = {}
+        for tracker in SHARDED_TRACKERS:
+            if not os.path.exists(self._index_path(tracker)):
+                self.import_single_file(tracker, include_archived=True)
+        super()._recover()
+
+    def shard_dir(self, tracker: str) -> str:
+        return os.path.join(self.directory, f"{tracker}_shards")
+
+    def shard_path(self, tracker: str, filepath: str) -> str:
+        digest = hashlib.blake2b(filepath.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.shard_dir(tracker), digest + self.serializer.suffix)
+
+    # ---- PUBLIC API ----
+    def load(self, tracker: str) -> dict:
+        if tracker not in SHARDED_TRACKERS:
+            return super().load(tracker)
+        data = {}
+        for filepath in self.tracked_paths(tracker):
+            entry = self.load_entry(tracker, filepath)
+            if entry is not None:
+                data[filepath] = entry
+        return data
+
+    def load_entry(self, tracker: str, filepath: str) -> dict | None:
+        if tracker not in SHARDED_TRACKERS:
+            return super().load_entry(tracker, filepath)
+        path = self.shard_path(tracker, filepath)
+        try:
+            with open(path, "rb") as file:
+                payload = file.read()
+                self._shards[tracker, filepath] = (_stat_version(os.fstat(file.fileno())), payload)
+        except FileNotFoundError:
+            return self._read(path)  # Written with another serializer, or missing
+        return self.serializer.decode(payload)
+
+    def tracked_paths(self, tracker: str) -> list[str]:
+        if tracker not in SHARDED_TRACKERS:
+            return super().tracked_paths(tracker)
+        try:
+            with open(self._index_path(tracker), "r", encoding="utf-8") as file:
+                return json.load(file)["paths"]
+        except FileNotFoundError:
+            return []
+
+    def save(self, tracker: str, data: dict):
+        if tracker not in SHARDED_TRACKERS:
+            return super().save(tracker, data)
+        data = _plain(data)
+        changes = {filepath: None for filepath in self.tracked_paths(tracker) if filepath not in data}
+        for filepath, entry in data.items():
+            if not self._unchanged(tracker, filepath, entry):
+                changes[filepath] = entry
+        self.update(tracker, changes, order=list(data))
+
+    def update(self, tracker: str, changes: dict, order: list[str] | None = None):
+        """Write the shards of the changed entries only; the index is rewritten if the set of files changed."""
+        if tracker not in SHARDED_TRACKERS:
+            return super().update(tracker, changes)
+        paths = self.tracked_paths(tracker)
+        known = set(paths)
+        os.makedirs(self.shard_dir(tracker), exist_ok=True)
+        for filepath, entry in changes.items():
+            if entry is not None:
+                path, payload = self.shard_path(tracker, filepath), self.serializer.encode(entry)
+                self._write_payload(path, payload)
+                self._shards[tracker, filepath] = (_stat_version(os.stat(path)), payload)
+                if filepath not in known:
+                    paths.append(filepath)
+                    known.add(filepath)
+        removed = {filepath for filepath, entry in changes.items() if entry is None}
+        new_paths = order if order is not None else [p for p in paths if p not in removed]
+        if new_paths != self.tracked_paths(tracker):
+            _write_atomic(self._index_path(tracker), json.dumps({"paths": new_paths}, ensure_ascii=False))
+        for filepath in removed:
+            self._shards.pop((tracker, filepath), None)
+            stem = self.shard_path(tracker, filepath)[:-len(self.serializer.suffix)]
+            for suffix in SUFFIXES:
+                _remove(stem + suffix)
+
+    def _delete_files(self, filepaths: list[str]):
+        kept = without_files("files", super().load("files"), filepaths)
+        if kept is not None:
+            super().save("files", kept)
+        for tracker in SHARDED_TRACKERS:
+            changes = {filepath: None for filepath in filepaths}
+            if tracker == "report":
+                for section in LEGACY_REPORT_SECTIONS:
+                    entry = self.load_entry(tracker, section)
+                    pruned = entry is not None and without_files(tracker, {section: entry}, filepaths)
+                    if pruned:
+                        changes[section] = pruned[section]
+            self.update(tracker, changes)
+
+    def version(self, tracker: str):
+        """Index and shard directory stats; shards are replaced by rename, which updates the directory."""
+        if tracker not in SHARDED_TRACKERS:
+            return super().version(tracker)
+        try:
+            index, shards = os.stat(self._index_path(tracker)), os.stat(self.shard_dir(tracker))
+        except FileNotFoundError:
+            return None
+        return index.st_mtime_ns, index.st_size, shards.st_ino, shards.st_mtime_ns
+
+    def entry_version(self, tracker: str, filepath: str):
+        if tracker not in SHARDED_TRACKERS:
+            return super().entry_version(tracker, filepath)
+        try:
+            return _stat_version(os.stat(self.shard_path(tracker, filepath)))
+        except FileNotFoundError:
+            return None
+
+    def import_single_file(self, tracker: str, include_archived: bool = False) -> bool:
+        """
+        Split the single-file tracker into shards, replacing the current shards.
+        `include_archived` is passed on to read_single_file.
+
+        Returns:
+            bool: False if there is no single-file tracker to import.
+        """
+        data = self.read_single_file(tracker, include_archived)
+        if data is None:
+            return False
+        self.save(tracker, data)
+        return True
+
+    def _unchanged(self, tracker: str, filepath: str, entry: dict) -> bool:
+        """
+        Whether the shard already holds `entry`: compared with the payload last
+        read or written while the shard is unchanged on disk, read back otherwise.
+        """
+        known = self._shards.get((tracker, filepath))
+        if known is not None and known[0] == self.entry_version(tracker, filepath):
+            return known[1] == self.serializer.encode(entry)
+        return entry == self.load_entry(tracker, filepath)
+
+    def _index_path(self, tracker: str) -> str:
+        return os.path.join(self.shard_dir(tracker), self.INDEX_FILE)
+
+
+class JournalTrackerStore(JsonTrackerStore):
+    """
+    JSON trackers with an append-only mutation journal.
+
+    The JSON tracker files are the snapshot. A save is diffed against the
+    state in memory and only the mutations are appended to the journal, one
+    JSONL record each, then fsync'd: updating a note is a ("files", [path,
+    "note"]) set, adding a group a ("editor", [path, idx, "cell_groups",
+    name]) set, editing cell values or renaming columns a set of that plate's
+    "values" / "column_labels", and deleting files one "delete_files" record.
+    At startup the snapshot is loaded and the journal replayed. Once the
+    journal passes `compact_bytes`, a background thread writes a new snapshot
+    and starts a fresh journal.
+    """
+
+    MAX_DEPTH = 4  # Deeper changes are journaled as a set of the whole value at this depth
+
+    def __init__(self, directory: str = DEFAULT_TRACKERS_DIR, compact_bytes: int = 8 * 1024 * 1024,
+                 serializer: TrackerSerializer | None = None):
+        super().__init__(directory, serializer)
+        self.compact_bytes = compact_bytes
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self._lock = threading.RLock()  # Shared across Streamlit sessions
+        self._compact_lock = threading.Lock()  # One compaction at a time
+        self._compactor = None
+        self._mutations = 0  # Bumped by every applied record, see version()
+        os.makedirs(directory, exist_ok=True)
+
+        self._data = {tracker: JsonTrackerStore.load(self, tracker) for tracker in TRACKER_FILES}
+        rotated = self._rotated_path()
+        if os.path.exists(rotated):
+            # A compaction was interrupted: its journal is not in every snapshot yet
+            self._replay(rotated)
+            self._replay(self.journal_path)
+            self.compact()
+        else:
+            self._replay(self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _recover(self):
+        """Nothing to finish: deletes are single journal records, and __init__ replays the journal."""
+
+    # ---- PUBLIC API ----
+    def load(self, tracker: str) -> dict:
+        with self._lock:
+            return copy.deepcopy(self._data[tracker])
+
+    def save(self, tracker: str, data: dict):
+        with self._lock:
+            records = [
+                {"tracker": tracker, **op}
+                for op in self._diff(self._data[tracker], _plain(data), [])
+            ]
+            self._append(records)
+
+    def update(self, tracker: str, changes: dict):
+        with self._lock:
+            current = self._data[tracker]
+            records = []
+            for filepath, entry in changes.items():
+                if entry is None:
+                    if filepath in current:
+                        records.append({"tracker": tracker, "op": "del", "path": [filepath]})
+                elif filepath not in current:
+                    records.append({"tracker": tracker, "op": "set", "path": [filepath], "value": entry})
+                else:
+                    records.extend(
+                        {"tracker": tracker, **op}
+                        for op in self._diff(current[filepath], entry, [filepath])
+                    )
+            self._append(records)
+
+    def delete_files(self, filepaths: list[str]):
+        """Remove files from every tracker with a single journal record (no intent file needed)."""
+        with self._lock:
+            if any(without_files(t, data, filepaths) is not None for t, data in self._data.items()):
+                self._append([{"op": "delete_files", "paths": list(filepaths)}])
+
+    def experiment_paths(self) -> list[str]:
+        with self._lock:
+            return [path for path, info in self._data["files"].items() if info.get("is_experiment", False)]
+
+    def version(self, tracker: str):
+        """The state lives in memory: it only changes through this store's own mutations."""
+        return self._mutations
+
+    def compact(self):
+        """
+        Write the current state as the new snapshot and start an empty journal.
+        The old journal is only removed once every snapshot file has been replaced.
+        """
+        with self._compact_lock:
+            self._compact()
+
+    def _compact(self):
+        with self._lock:
+            payloads = {tracker: self.serializer.encode(data) for tracker, data in self._data.items()}
+            journal = getattr(self, "_journal", None)
+            rotated = self._rotated_path()
+            if journal is not None:
+                journal.close()
+                if not os.path.exists(rotated):
+                    os.replace(self.journal_path, rotated)
+                else:
+                    _append_file(rotated, self.journal_path)
+                self._journal = open(self.journal_path, "w", encoding="utf-8")
+            elif os.path.exists(self.journal_path):
+                _append_file(rotated, self.journal_path)
+                open(self.journal_path, "w").close()
+
+        for tracker, payload in payloads.items():
+            self._write_payload(self.path(tracker), payload)
+        if os.path.exists(rotated):
+            os.remove(rotated)
+
+    def close(self):
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            self._journal.close()
+
+    # ---- JOURNAL ----
+    def _append(self, records: list[dict]):
+        if not records:
+            return
+        self._journal.write("".join(_dumps(record) + "\n" for record in records))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        for record in records:
+            self._apply(copy.deepcopy(record))
+
+        if self._journal.tell() >= self.compact_bytes and (
+            self._compactor is None or not self._compactor.is_alive()
+        ):
+            self._compactor = threading.Thread(target=self.compact, name="tracker-compaction", daemon=True)
+            self._compactor.start()
+
+    def _replay(self, path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as file:
+            offset = 0
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    # Torn last record of an interrupted write: drop it before appending again
+                    file.truncate(offset)
+                    break
+                self._apply(record)
+                offset += len(line)
+
+    def _apply(self, record: dict):
+        """Apply one journal record to the state in memory. Replaying a record twice is harmless."""
+        self._mutations += 1
+        if record["op"] == "delete_files":
+            for tracker, data in self._data.items():
+                kept = without_files(tracker, data, record["paths"])
+                if kept is not None:
+                    self._data[tracker] = kept
+            return
+
+        *parents, key = record["path"]
+        target = self._data[record["tracker"]]
+        for part in parents:
+            target = target.setdefault(part, {})
+        if record["op"] == "set":
+            target[key] = record["value"]
+        else:
+            target.pop(key, None)
+
+    @classmethod
+    def _diff(cls, old: dict, new: dict, path: list) -> list[dict]:
+        """Set/del operations turning `old` into `new`, recursing into nested dicts up to MAX_DEPTH."""
+        ops = [{"op": "del", "path": path + [key]} for key in old if key not in new]
+        for key, value in new.items():
+            if key in old and old[key] == value:
+                continue
+            if (key in old and isinstance(old[key], dict) and isinstance(value, dict)
+                    and len(path) + 1 < cls.MAX_DEPTH):
+                ops.extend(cls._diff(old[key], value, path + [key]))
+            else:
+                ops.append({"op": "set", "path": path + [key], "value": value})
+        return ops
+
+    def _rotated_path(self) -> str:
+        return self.journal_path + ".old"
+
+
+class SqliteTrackerStore(TrackerStore):
+    """
+    Trackers kept in one local SQLite database, normalized into files,
+    experiments, subdatasets, groups and report metadata tables.
+
+    Callers still load and save whole trackers, but a save only writes the
+    rows whose content changed since the last load/save: editing one note
+    or saving one group touches a single row. Every save runs in one
+    transaction.
+
+    Row records are compact JSON text by default. A serializer with
+    MessagePack or compression (see tracker_codec) stores them as encoded
+    blobs instead; rows of either kind are read back, and a tracker's rows
+    are rewritten in the configured encoding the next time it is saved.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            filepath TEXT PRIMARY KEY,
+            is_experiment INTEGER NOT NULL DEFAULT 0,
+            position INTEGER NOT NULL,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_files_is_experiment ON files (is_experiment);
+        CREATE TABLE IF NOT EXISTS experiments (
+            filepath TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            record TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS subdatasets (
+            filepath TEXT NOT NULL,
+            idx TEXT NOT NULL,
+            record TEXT NOT NULL,
+            PRIMARY KEY (filepath, idx)
+        );
+        CREATE TABLE IF NOT EXISTS groups (
+            filepath TEXT NOT NULL,
+            idx TEXT NOT NULL,
+            name TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            record TEXT NOT NULL,
+            PRIMARY KEY (filepath, idx, name)
+        );
+        CREATE TABLE IF NOT EXISTS report_metadata (
+            filepath TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            record TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: str, import_from: str | None = None, serializer: TrackerSerializer | None = None):
+        """
+        Open (or create) the database. When it is created and `import_from`
+        holds JSON trackers, they are imported once.
+        """
+        self.db_path = db_path
+        self.serializer = serializer or TrackerSerializer.from_env()
+        self._lock = threading.RLock()  # One connection shared across Streamlit sessions
+        self._rows = {}                 # tracker -> {row key: serialized row} as last synced
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        created = not os.path.exists(db_path)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+
+        if created and import_from:
+            imported = self.import_json(import_from, include_archived=True)
+            if imported:
+                logger.warning(
+                    "Imported the %s tracker(s) into %s, which is now authoritative; the JSON files "
+                    "are left in place but no longer updated", ", ".join(imported), db_path,
+                )
+
+    # ---- PUBLIC API ----
+    def load(self, tracker: str) -> dict:
+        with self._lock:
+            rows = self._read_rows(tracker)
+            self._rows[tracker] = rows
+            return self._assemble(tracker, rows)
+
+    def save(self, tracker: str, data: dict):
+        with self._lock:
+            known = self._rows.get(tracker)
+            if known is None:
+                known = self._read_rows(tracker)
+            rows = self._keep_positions(self._split(tracker, data), known)
+            self._write_changes(rows, known)
+            self._rows[tracker] = rows
+
+    def update(self, tracker: str, changes: dict):
+        """Insert, replace or (None) remove entries, writing only their changed rows."""
+        with self._lock:
+            known = self._rows.get(tracker)
+            if known is None:
+                known = self._read_rows(tracker)
+            own = {key: row for key, row in known.items() if key[1] in changes}
+            entries = {filepath: entry for filepath, entry in changes.items() if entry is not None}
+            rows = self._keep_positions(self._split(tracker, entries), known)
+            self._write_changes(rows, own)
+            synced = {key: row for key, row in known.items() if key[1] not in changes}
+            synced.update(rows)
+            self._rows[tracker] = synced
+
+    def delete_files(self, filepaths: list[str]):
+        """Remove files and everything that depends on them, in one transaction."""
+        with self._lock, self._transaction():
+            params = [(p,) for p in filepaths]
+            for table in ("files", "experiments", "subdatasets", "groups", "report_metadata"):
+                self._conn.executemany(f"DELETE FROM {table} WHERE filepath = ?", params)
+            for section in LEGACY_REPORT_SECTIONS:
+                row = self._conn.execute(
+                    "SELECT record FROM report_metadata WHERE filepath = ?", (section,)
+                ).fetchone()
+                kept = row and without_files("report", {section: self._decode(row[0])}, filepaths)
+                if kept:
+                    self._conn.execute(
+                        "UPDATE report_metadata SET record = ? WHERE filepath = ?",
+                        (self._encode(kept[section]), section),
+                    )
+            self._rows.clear()
+
+    def experiment_paths(self) -> list[str]:
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT filepath FROM files WHERE is_experiment = 1 ORDER BY position"
+            )
+            return [filepath for (filepath,) in cursor]
+
+    def version(self, tracker: str):
+        """
+        SQLite's data_version, which changes when another connection commits;
+        this store's own writes are known to the cache that issued them.
+        """
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def import_json(self, directory: str, include_archived: bool = False) -> list[str]:
+        """
+        Load the JSON tracker files found in `directory`, replacing the stored trackers.
+        The files are left untouched (see archive_json_trackers); `include_archived`
+        is passed on to JsonTrackerStore.read_single_file.
+
+        Returns:
+            list[str]: Names of the trackers imported.
+        """
+        source = JsonTrackerStore(directory)
+        imported = []
+        for tracker in TRACKER_FILES:
+            data = source.read_single_file(tracker, include_archived)
+            if data is None:
+                continue
+            self.save(tracker, data)
+            imported.append(tracker)
+        return imported
+
+    def export_json(self, directory: str) -> list[str]:
+        """
+        Write every tracker back to its JSON file in `directory`.
+
+        Returns:
+            list[str]: Paths written.
+        """
+        os.makedirs(directory, exist_ok=True)
+        written = []
+        for tracker, file_name in TRACKER_FILES.items():
+            path = os.path.join(directory, file_name)
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(self.load(tracker), file, ensure_ascii=False, indent=4)
+            written.append(path)
+        return written
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---- ROW MAPPING ----
+    @staticmethod
+    def _keep_positions(rows: dict, known: dict) -> dict:
+        """
+        Rows keep the position they were stored with and new rows go last,
+        so removing one entry does not renumber (and rewrite) all the others.
+        """
+        next_position = max((row[0] for row in known.values()), default=-1) + 1
+        kept = {}
+        for key, row in rows.items():
+            if key in known:
+                position = known[key][0]
+            else:
+                position, next_position = next_position, next_position + 1
+            kept[key] = (position,) + row[1:]
+        return kept
+
+    def _encode(self, value) -> str | bytes:
+        """A row record: JSON text, unless the serializer packs or compresses."""
+        if self.serializer.format == "msgpack" or self.serializer.compression != "none":
+            return self.serializer.encode(value)
+        return _dumps(value)
+
+    @staticmethod
+    def _decode(record: str | bytes):
+        return json.loads(record) if isinstance(record, str) else TrackerSerializer.decode(record)
+
+    # Row keys are (table, filepath[, idx[, name]]); rows are (position, record text)
+    def _split(self, tracker: str, data: dict) -> dict:
+        rows = {}
+        for position, (filepath, entry) in enumerate(_plain(data).items()):
+            if tracker == "files":
+                rows[("files", filepath)] = (position, self._encode(entry), bool(entry.get("is_experiment", False)))
+            elif tracker == "report":
+                rows[("report_metadata", filepath)] = (position, self._encode(entry))
+            else:
+                experiment = {k: v for k, v in entry.items() if not _is_subdataset(k, v)}
+                rows[("experiments", filepath)] = (position, self._encode(experiment))
+                for idx, sub_data in entry.items():
+                    if not _is_subdataset(idx, sub_data):
+                        continue
+                    groups = sub_data.get("cell_groups")
+                    record = dict(sub_data)
+                    if isinstance(groups, dict):
+                        record["cell_groups"] = {}  # Filled back from the groups table
+                        for g_position, (name, group) in enumerate(groups.items()):
+                            rows[("groups", filepath, idx, name)] = (g_position, self._encode(group))
+                    rows[("subdatasets", filepath, idx)] = (0, self._encode(record))
+        return rows
+
+    def _assemble(self, tracker: str, rows: dict) -> dict:
+        if tracker != "editor":
+            ordered = sorted(rows.items(), key=lambda item: item[1][0])
+            return {key[1]: self._decode(row[1]) for key, row in ordered}
+
+        data = {}
+        for key, row in sorted(rows.items(), key=lambda item: item[1][0]):
+            if key[0] == "experiments":
+                data[key[1]] = self._decode(row[1])
+        subdatasets = sorted((key for key in rows if key[0] == "subdatasets"), key=lambda key: int(key[2]))
+        for key in subdatasets:
+            data.setdefault(key[1], {})[key[2]] = self._decode(rows[key][1])
+        groups = sorted((key for key in rows if key[0] == "groups"), key=lambda key: rows[key][0])
+        for key in groups:
+            sub_data = data.get(key[1], {}).get(key[2])
+            if sub_data is not None:
+                sub_data.setdefault("cell_groups", {})[key[3]] = self._decode(rows[key][1])
+        return data
+
+    def _read_rows(self, tracker: str) -> dict:
+        rows = {}
+        if tracker == "files":
+            for filepath, position, record, is_experiment in self._conn.execute(
+                "SELECT filepath, position, record, is_experiment FROM files"
+            ):
+                rows[("files", filepath)] = (position, record, bool(is_experiment))
+        elif tracker == "report":
+            for filepath, position, record in self._conn.execute(
+                "SELECT filepath, position, record FROM report_metadata"
+            ):
+                rows[("report_metadata", filepath)] = (position, record)
+        else:
+            for filepath, position, record in self._conn.execute(
+                "SELECT filepath, position, record FROM experiments"
+            ):
+                rows[("experiments", filepath)] = (position, record)
+            for filepath, idx, record in self._conn.execute("SELECT filepath, idx, record FROM subdatasets"):
+                rows[("subdatasets", filepath, idx)] = (0, record)
+            for filepath, idx, name, position, record in self._conn.execute(
+                "SELECT filepath, idx, name, position, record FROM groups"
+            ):
+                rows[("groups", filepath, idx, name)] = (position, record)
+        return rows
+
+    def _write_changes(self, rows: dict, previous: dict):
+        """Write the rows that differ from `previous` and drop the ones that disappeared, in one transaction."""
+        changed = {key: row for key, row in rows.items() if previous.get(key) != row}
+        removed = [key for key in previous if key not in rows]
+        if not changed and not removed:
+            return
+        with self._transaction():
+            for key in removed:
+                self._delete_row(key)
+            for key, row in changed.items():
+                self._write_row(key, row)
+
+    def _write_row(self, key: tuple, row: tuple):
+        table = key[0]
+        if table == "files":
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (filepath, is_experiment, position, record) VALUES (?, ?, ?, ?)",
+                (key[1], int(row[2]), row[0], row[1]),
+            )
+        elif table in ("experiments", "report_metadata"):
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {table} (filepath, position, record) VALUES (?, ?, ?)",
+                (key[1], row[0], row[1]),
+            )
+        elif table == "subdatasets":
+            self._conn.execute(
+                "INSERT OR REPLACE INTO subdatasets (filepath, idx, record) VALUES (?, ?, ?)",
+                (key[1], key[2], row[1]),
+            )
+        else:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO groups (filepath, idx, name, position, record) VALUES (?, ?, ?, ?, ?)",
+                (key[1], key[2], key[3], row[0], row[1]),
+            )
+
+    def _delete_row(self, key: tuple):
+        table = key[0]
+        if table == "subdatasets":
+            self._conn.execute("DELETE FROM subdatasets WHERE filepath = ? AND idx = ?", key[1:])
+        elif table == "groups":
+            self._conn.execute("DELETE FROM groups WHERE filepath = ? AND idx = ? AND name = ?", key[1:])
+        else:
+            self._conn.execute(f"DELETE FROM {table} WHERE filepath = ?", (key[1],))
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+
+class TrackerView(dict):
+    """
+    Copy-on-write view of a cached tracker. Entries are shared with the cache
+    until they are first read through the view, which replaces them with a
+    private deep copy, so a session can mutate what it loaded without
+    affecting the cache or other sessions. Only the entries a page actually
+    touches get copied.
+    """
+
+    __slots__ = ("_private",)
+
+    def __init__(self, shared: dict):
+        super().__init__(shared)
+        self._private = set()
+
+    def _own(self, key):
+        if key not in self._private and dict.__contains__(self, key):
+            dict.__setitem__(self, key, copy.deepcopy(dict.__getitem__(self, key)))
+            self._private.add(key)
+
+    def __getitem__(self, key):
+        self._own(key)
+        return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._private.add(key)
+
+    def get(self, key, default=None):
+        self._own(key)
+        return dict.get(self, key, default)
+
+    def setdefault(self, key, default=None):
+        self._own(key)
+        self._private.add(key)
+        return dict.setdefault(self, key, default)
+
+    def pop(self, key, *default):
+        self._own(key)
+        self._private.discard(key)
+        return dict.pop(self, key, *default)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._private.discard(key)
+
+    def values(self):
+        for key in list(dict.keys(self)):
+            self._own(key)
+        return dict.values(self)
+
+    def items(self):
+        for key in list(dict.keys(self)):
+            self._own(key)
+        return dict.items(self)
+
+    def copy(self) -> 'TrackerView':
+        return TrackerView(self)
+
+    def cache_entries(self) -> dict:
+        """The view's content for the cache: shared entries as they are, copies of the touched ones."""
+        return {
+            key: copy.deepcopy(value) if key in self._private else value
+            for key, value in dict.items(self)
+        }
+
+
+class CachedTrackerStore(TrackerStore):
+    """
+    Keeps the parsed trackers of a backend in memory, shared by every session
+    and rerun. A tracker is only read again when the backend's version token
+    (file inode/mtime, SQLite data_version) changes, and load() hands out
+    copy-on-write TrackerViews of the cached dict. Writes go to the backend
+    and update the cache with copies of the changed entries only. With a
+    lazy backend (sharded), single entries are cached on their own.
+    """
+
+    def __init__(self, backend: TrackerStore):
+        self.backend = backend
+        self.lazy_entries = backend.lazy_entries
+        self._lock = threading.RLock()
+        self._cache = {}    # tracker -> (version, dict)
+        self._entries = {}  # (tracker, filepath) -> (version, entry), lazy backends only
+
+    def load(self, tracker: str) -> dict:
+        return TrackerView(self._cached(tracker))
+
+    def load_entry(self, tracker: str, filepath: str) -> dict | None:
+        if not self.lazy_entries:
+            return copy.deepcopy(self._cached(tracker).get(filepath))
+        with self._lock:
+            version = self.backend.entry_version(tracker, filepath)
+            cached = self._entries.get((tracker, filepath))
+            if cached is None or version is None or cached[0] != version:
+                cached = (version, self.backend.load_entry(tracker, filepath))
+                self._entries[(tracker, filepath)] = cached
+            return copy.deepcopy(cached[1])
+
+    def tracked_paths(self, tracker: str) -> list[str]:
+        if not self.lazy_entries:
+            return list(self._cached(tracker))
+        return self.backend.tracked_paths(tracker)
+
+    def save(self, tracker: str, data: dict):
+        with self._lock:
+            self.backend.save(tracker, data)
+            entries = data.cache_entries() if isinstance(data, TrackerView) else copy.deepcopy(dict(data))
+            self._cache[tracker] = (self.backend.version(tracker), entries)
+            self._forget_entries(tracker)
+
+    def update(self, tracker: str, changes: dict):
+        with self._lock:
+            current = self._current(tracker)
+            self.backend.update(tracker, changes)
+            self._forget_entries(tracker, changes)
+            if current is None:
+                return
+            data = dict(current)
+            for filepath, entry in changes.items():
+                if entry is None:
+                    data.pop(filepath, None)
+                else:
+                    data[filepath] = copy.deepcopy(entry)
+            self._cache[tracker] = (self.backend.version(tracker), data)
+
+    def delete_files(self, filepaths: list[str]):
+        with self._lock:
+            current = {tracker: self._current(tracker) for tracker in list(self._cache)}
+            self.backend.delete_files(filepaths)
+            self._entries.clear()
+            for tracker, data in current.items():
+                if data is None:
+                    continue
+                kept = without_files(tracker, data, filepaths)
+                self._cache[tracker] = (self.backend.version(tracker), data if kept is None else kept)
+
+    def experiment_paths(self) -> list[str]:
+        return [path for path, info in self._cached("files").items() if info.get("is_experiment", False)]
+
+    def version(self, tracker: str):
+        return self.backend.version(tracker)
+
+    def close(self):
+        self.backend.close()
+
+    def entry_version(self, tracker: str, filepath: str):
+        return self.backend.entry_version(tracker, filepath)
+
+    def __getattr__(self, name):
+        # Backend-specific helpers (import_json, export_json, close, ...)
+        return getattr(self.backend, name)
+
+    def _cached(self, tracker: str) -> dict:
+        """The shared parsed tracker, read again only if the backend's version changed."""
+        with self._lock:
+            version = self.backend.version(tracker)
+            cached = self._cache.get(tracker)
+            if cached is None or version is None or cached[0] != version:
+                cached = (version, _plain(self.backend.load(tracker)))
+                self._cache[tracker] = cached
+            return cached[1]
+
+    def _current(self, tracker: str) -> dict | None:
+        """
+        The cached tracker if it is up to date, so a write can patch it.
+        Stale or missing caches are dropped instead (and for lazy backends
+        a whole tracker is never loaded just to be patched).
+        """
+        cached = self._cache.get(tracker)
+        if cached is not None and cached[0] is not None and cached[0] == self.backend.version(tracker):
+            return cached[1]
+        if not self.lazy_entries:
+            return self._cached(tracker)
+        self._cache.pop(tracker, None)
+        return None
+
+    def _forget_entries(self, tracker: str, filepaths=None):
+        for key in list(self._entries):
+            if key[0] == tracker and (filepaths is None or key[1] in filepaths):
+                del self._entries[key]
+
+
+class _Transaction:
+    """BEGIN/COMMIT around a block, rolling back on error."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+_ENTRY_LOCKS = {}
+_ENTRY_LOCKS_GUARD = threading.Lock()
+
+
+def _entry_lock(store: TrackerStore, tracker: str, filepath: str) -> threading.Lock:
+    """The lock serializing compare-and-swap writes of one entry of one store."""
+    with _ENTRY_LOCKS_GUARD:
+        return _ENTRY_LOCKS.setdefault((id(store), tracker, filepath), threading.Lock())
+
+
+def without_files(tracker: str, data: dict, filepaths: list[str]) -> dict | None:
+    """
+    A tracker without the entries of `filepaths`, including what the legacy report
+    sections hold for them. `data` itself is not modified.
+
+    Returns:
+        dict | None: The remaining entries, or None if nothing belonged to the files.
+    """
+    removed = set(filepaths)
+    data = _plain(data)
+    kept = {key: value for key, value in data.items() if key not in removed}
+    changed = len(kept) != len(data)
+
+    if tracker == "report":
+        for section in LEGACY_REPORT_SECTIONS:
+            entries = kept.get(section)
+            if not isinstance(entries, dict):
+                continue
+            pruned = {key: value for key, value in entries.items() if not _belongs_to(key, removed)}
+            if len(pruned) != len(entries):
+                kept[section] = pruned
+                changed = True
+
+    return kept if changed else None
+
+
+def _belongs_to(key: str, removed: set) -> bool:
+    """Whether a legacy report key ("<path>" or "<path>_<idx>") belongs to a removed file."""
+    prefix, _, idx = key.rpartition("_")
+    return key in removed or (idx.isdigit() and prefix in removed)
+
+
+def _plain(data: dict) -> dict:
+    """Plain dict with the same entries; reads a TrackerView without copying them (read-only use)."""
+    return dict(data) if isinstance(data, TrackerView) else data
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _write_atomic(path: str, content: str | bytes):
+    """
+    Replace a file through a synced temporary file, so readers never see a partial
+    write. Every writer gets its own temporary file, in the target's directory.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    directory, name = os.path.split(path)
+    with tempfile.NamedTemporaryFile(dir=directory or ".", prefix=f".{name}.", suffix=".tmp", delete=False) as file:
+        try:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        except BaseException:
+            file.close()
+            _remove(file.name)
+            raise
+    try:
+        try:
+            os.chmod(file.name, os.stat(path).st_mode & 0o777)  # Keep the replaced file's permissions
+        except FileNotFoundError:
+            pass
+        os.replace(file.name, path)
+    except BaseException:
+        _remove(file.name)
+        raise
+
+
+def archive_json_trackers(directory: str, trackers) -> list[str]:
+    """
+    Rename the single-file JSON trackers of `trackers` in `directory` with
+    IMPORTED_SUFFIX, once another backend holds their content, so that no
+    stale copy is left where the json backend and the tools would read it.
+    Only the explicit migrations do this; backends importing on first use
+    leave the files in place.
+
+    Returns:
+        list[str]: Paths of the archived files.
+    """
+    archived = []
+    for tracker in trackers:
+        stem = os.path.join(directory, os.path.splitext(TRACKER_FILES[tracker])[0])
+        for path in (stem + suffix for suffix in SUFFIXES):
+            if os.path.exists(path):
+                os.replace(path, path + IMPORTED_SUFFIX)
+                archived.append(path + IMPORTED_SUFFIX)
+    return archived
+
+
+def _stat_version(stats: os.stat_result) -> tuple:
+    """Inode, mtime and size: changes whenever a file is rewritten (see version())."""
+    return stats.st_ino, stats.st_mtime_ns, stats.st_size
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _append_file(target: str, source: str):
+    with open(source, "r", encoding="utf-8") as src, open(target, "a", encoding="utf-8") as dst:
+        dst.write(src.read())
+
+
+def open_tracker_store(directory: str = DEFAULT_TRACKERS_DIR, backend: str | None = None) -> TrackerStore:
+    """Create the tracker store configured for `directory` (see BACKEND_ENV)."""
+    backend = backend or os.environ.get(BACKEND_ENV, "sqlite")
+    if backend == "json":
+        return JsonTrackerStore(directory)
+    if backend == "journal":
+        return JournalTrackerStore(directory)
+    if backend == "sharded":
+        return ShardedTrackerStore(directory)
+    if backend == "sqlite":
+        return SqliteTrackerStore(os.path.join(directory, DB_FILE), import_from=directory,
+                                  serializer=TrackerSerializer.from_env())
+    raise ValueError(f"Unknown tracker backend: {backend}")
+
+
+@st.cache_resource
+def get_tracker_store(directory: str = DEFAULT_TRACKERS_DIR, backend: str | None = None) -> TrackerStore:
+    """Process-wide, cached tracker store for `directory`, shared by every session and rerun."""
+    return CachedTrackerStore(open_tracker_store(directory, backend))
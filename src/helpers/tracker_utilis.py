@@ -1,19 +1,33 @@
-import json, os
 import streamlit as st
+from src.helpers.parse_cache import get_parse_cache
+from src.helpers.tracker_store import DEFAULT_TRACKERS_DIR, get_tracker_store
 
 
-def delete_file_from_all_trackers(filepath: str, trackers: list[str]):
+def delete_files_from_all_trackers(filepaths, trackers_dir: str = DEFAULT_TRACKERS_DIR) -> int:
     """
-    Remove a file entry from multiple tracker JSON files.
+    Remove a set of files from every tracker in one pass per tracker, together with
+    everything that depends on them: editor sub-datasets and groups, report general
+    and sub-dataset metadata, and their cached parses.
+
+    Returns:
+        int: Number of the files that were tracked.
+    """
+    filepaths = list(dict.fromkeys(filepaths))
+    if not filepaths:
+        return 0
+    store = get_tracker_store(trackers_dir)
+    files = store.load("files")
+    tracked = sum(1 for filepath in filepaths if filepath in files)
+    store.delete_files(filepaths)
+    get_parse_cache().invalidate_many(filepaths)
+    return tracked
+
+
+def delete_file_from_all_trackers(filepath: str, trackers_dir: str = DEFAULT_TRACKERS_DIR):
+    """
+    Remove a file entry from every tracker (files, editor and report metadata).
     """
-    for tracker in trackers:
-        if os.path.exists(tracker):
-            with open(tracker, "r") as f:
-                data = json.load(f)
-            if filepath in data:
-                del data[filepath]
-                with open(tracker, "w") as f:
-                    json.dump(data, f, indent=4)
+    delete_files_from_all_trackers([filepath], trackers_dir)
 
 
 
@@ -0,0 +1,138 @@
+"""
+Selection of many cells at once, by range or pattern, for building cell
+groups in the Editor.
+
+A selection is one or more clauses separated by ";", whose cells are
+combined. A clause names rows and/or columns: without rows it covers every
+row, without columns every column.
+
+    B3:D5                  rectangle from well B3 to well D5
+    rows B-G / row C,E     whole rows (ranges and comma lists)
+    columns 3-5 / col 2    whole columns, by position (1 = first data column) or label
+    columns 3-5 rows B-G   the rectangle where both apply
+    every _a               columns whose label ends with "_a" (e.g. replicates)
+    columns *_a            columns whose label matches a glob pattern
+    all                    every data cell
+
+Rows and columns are resolved into boolean masks and the selected cells
+come out of their outer product, so a selection costs the same whatever
+the number of cells it covers.
+"""
+import fnmatch
+import re
+import numpy as np
+from src.models.plate_layout import letter_to_index
+
+_RECTANGLE = re.compile(r"^([A-Z]{1,2})(\d+)\s*:\s*([A-Z]{1,2})(\d+)$", re.IGNORECASE)
+_KEYWORD = re.compile(r"\b(rows?|columns?|cols?|every)\s+", re.IGNORECASE)
+
+
+class SelectionError(ValueError):
+    """A selection that cannot be read."""
+
+
+def select_cells(text: str, columns: list, n_rows: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Cells of a sub-dataset DataFrame named by a selection (see module docstring).
+
+    Args:
+        text (str): The selection.
+        columns (list): The DataFrame's column labels; the first one holds the
+            row labels and is never selected.
+        n_rows (int): Number of rows of the DataFrame.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Row and column positions in the DataFrame,
+        row by row, without duplicates.
+
+    Raises:
+        SelectionError: If a clause cannot be read or names nothing on this plate.
+    """
+    selected = np.zeros((n_rows, len(columns)), dtype=bool)
+    clauses = [clause.strip() for clause in text.split(";") if clause.strip()]
+    if not clauses:
+        raise SelectionError("Enter a range or pattern, e.g. B3:D5 or rows B-G")
+    for clause in clauses:
+        rows, cols = _clause_masks(clause, columns, n_rows)
+        selected |= np.outer(rows, cols)
+    selected[:, 0] = False  # The row-label column
+    return np.nonzero(selected)
+
+
+def _clause_masks(clause: str, columns: list, n_rows: int) -> tuple[np.ndarray, np.ndarray]:
+    rows = np.ones(n_rows, dtype=bool)
+    cols = np.ones(len(columns), dtype=bool)
+    if clause.lower() == "all":
+        return rows, cols
+
+    rectangle = _RECTANGLE.match(clause)
+    if rectangle:
+        first_row, first_col, last_row, last_col = rectangle.groups()
+        rows = _row_mask(f"{first_row}-{last_row}", n_rows)
+        cols = _column_mask(f"{first_col}-{last_col}", columns)
+        return rows, cols
+
+    parts = _KEYWORD.split(clause)
+    if parts[0].strip():
+        raise SelectionError(f"Cannot read '{clause}'")
+    for keyword, spec in zip(parts[1::2], parts[2::2]):
+        keyword, spec = keyword.lower(), spec.strip()
+        if keyword.startswith("row"):
+            rows &= _row_mask(spec, n_rows)
+        elif keyword == "every":
+            cols &= _glob_mask(f"*{spec}", columns)
+        else:
+            cols &= _column_mask(spec, columns)
+    return rows, cols
+
+
+def _row_mask(spec: str, n_rows: int) -> np.ndarray:
+    mask = np.zeros(n_rows, dtype=bool)
+    for item in _items(spec):
+        first, _, last = item.partition("-")
+        start, stop = letter_to_index(first), letter_to_index(last or first)
+        if start < 0 or stop < 0:
+            raise SelectionError(f"'{item}' is not a row or row range (e.g. B or B-G)")
+        start, stop = min(start, stop), max(start, stop)
+        if start >= n_rows:
+            raise SelectionError(f"Row '{first.strip().upper()}' is not on this plate")
+        mask[start:stop + 1] = True
+    return mask
+
+
+def _column_mask(spec: str, columns: list) -> np.ndarray:
+    mask = np.zeros(len(columns), dtype=bool)
+    labels = [str(column).strip() for column in columns]
+    for item in _items(spec):
+        if any(char in item for char in "*?["):
+            mask |= _glob_mask(item, columns)
+            continue
+        if item in labels:
+            mask[labels.index(item)] = True
+            continue
+        first, _, last = item.partition("-")
+        if not (first.strip().isdigit() and (last or first).strip().isdigit()):
+            raise SelectionError(f"'{item}' is not a column, column range (e.g. 3-5) or pattern")
+        start, stop = sorted((int(first), int(last or first)))
+        if start < 1 or start >= len(columns):
+            raise SelectionError(f"Column {start} is not on this plate")
+        mask[start:stop + 1] = True  # Position 0 holds the row labels
+    return mask
+
+
+def _glob_mask(pattern: str, columns: list) -> np.ndarray:
+    pattern = pattern.strip().lower()
+    mask = np.fromiter(
+        (fnmatch.fnmatchcase(str(column).strip().lower(), pattern) for column in columns),
+        dtype=bool, count=len(columns),
+    )
+    if not mask[1:].any():
+        raise SelectionError(f"No column matches '{pattern}'")
+    return mask
+
+
+def _items(spec: str) -> list[str]:
+    items = [item.strip() for item in spec.split(",") if item.strip()]
+    if not items:
+        raise SelectionError("Missing rows or columns after a keyword")
+    return items
@@ -0,0 +1,109 @@
+"""
+Undo/redo history of the cell edits of one sub-dataset.
+
+The edits of a sub-dataset are its patch set (see PlateReading.diff). A
+history step stores only the cells that step changed, each as the pair of
+patches before and after it; unchanged cells and patch dicts are shared
+with the current state rather than copied. Memory therefore grows with the
+number of cells edited, not with the plate size times the number of steps,
+and moving one step back or forth touches only that step's cells.
+"""
+
+
+class EditHistory:
+    """Linear undo/redo history over the patch set of one sub-dataset."""
+
+    def __init__(self, patches: list[dict] | None = None, max_steps: int = 200):
+        self._state = {_cell(p): p for p in patches or []}  # cell -> current patch
+        self._steps = []        # [{cell: (patch before, patch after)}], None = no patch
+        self._position = 0      # Number of steps applied
+        self.max_steps = max_steps
+
+    # ---- STATE ----
+    @property
+    def position(self) -> int:
+        return self._position
+
+    def __len__(self) -> int:
+        """Number of recorded steps (the position ranges over 0..len)."""
+        return len(self._steps)
+
+    @property
+    def can_undo(self) -> bool:
+        return self._position > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self._position < len(self._steps)
+
+    def patches(self) -> list[dict]:
+        """The patch set at the current position, ordered by cell."""
+        return [self._state[cell] for cell in sorted(self._state)]
+
+    def step_sizes(self) -> list[int]:
+        """Number of cells changed by each step."""
+        return [len(step) for step in self._steps]
+
+    # ---- RECORDING ----
+    def record(self, patches: list[dict]) -> bool:
+        """
+        Record `patches` as the new current state. Steps that were undone are
+        dropped, as in any editor.
+
+        Returns:
+            bool: False if nothing changed (no step was added).
+        """
+        new_state = {_cell(p): p for p in patches}
+        step = {}
+        for cell in self._state.keys() | new_state.keys():
+            before, after = self._state.get(cell), new_state.get(cell)
+            if before != after:
+                step[cell] = (before, after)
+        if not step:
+            return False
+
+        del self._steps[self._position:]
+        self._steps.append(step)
+        if len(self._steps) > self.max_steps:
+            del self._steps[0]
+        self._position = len(self._steps)
+        self._state = new_state
+        return True
+
+    # ---- NAVIGATION ----
+    def undo(self) -> list[dict] | None:
+        """Step back; returns the patch set there, or None if there is nothing to undo."""
+        if not self.can_undo:
+            return None
+        self._position -= 1
+        self._apply(self._steps[self._position], 0)
+        return self.patches()
+
+    def redo(self) -> list[dict] | None:
+        """Step forward again; returns the patch set there, or None if there is nothing to redo."""
+        if not self.can_redo:
+            return None
+        self._apply(self._steps[self._position], 1)
+        self._position += 1
+        return self.patches()
+
+    def goto(self, position: int) -> list[dict]:
+        """Move to any recorded position (0 = before the first step) and return its patch set."""
+        position = max(0, min(position, len(self._steps)))
+        while self._position > position:
+            self.undo()
+        while self._position < position:
+            self.redo()
+        return self.patches()
+
+    def _apply(self, step: dict, side: int):
+        for cell, pair in step.items():
+            patch = pair[side]
+            if patch is None:
+                self._state.pop(cell, None)
+            else:
+                self._state[cell] = patch
+
+
+def _cell(patch: dict) -> tuple[int, int]:
+    return int(patch["row"]), int(patch["column"])
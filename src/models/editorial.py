@@ -5,31 +5,48 @@ import json
 import os
 from datetime import datetime
 import time
-import matplotlib.pyplot as plt
 import re
 import numpy as np
 import html as _html
+import hashlib
+import copy
 from st_table_select_cell import st_table_select_cell  # For interactive cell selection
-from src.models.experiment import Experiment           # Custom class for experiment file parsing
+from src.models.experiment import Experiment, PLATE_ROW_RANGES  # Custom class for experiment file parsing
+from src.models import plate_layout                   # Plate formats and row-label helpers
+from src.models.plate_reading import PlateReading, has_edits, modified_plate, patch_cells  # Dense plate + cell patches
+from src.models.edit_history import EditHistory       # Undo/redo of cell edits
+from src.models.highlight import DEFAULT_PALETTE, highlight_mask  # Group colors per cell, shared with the report
+from src.models.group_stats import GroupStatistics, batch_statistics  # Live group statistics
+from src.models.cell_selection import SelectionError, select_cells  # Range / pattern cell selection
+from src.helpers.parse_cache import get_parse_cache    # Persistent cache of parsed workbooks
+from src.helpers.tracker_store import get_tracker_store  # Tracker backend (SQLite by default)
+from src.helpers.figure_cache import get_figure_cache    # Rendered statistics charts
 
 class Editor:
     def __init__(self):
         """Initialize the Editor page with configuration, constants, and trackers."""
 
-        # === File paths for tracking ===
-        self.TRACKER_FILE = "TRACKERS/file_tracker.json"         # Original tracker
-        self.TRACKER_FILE_E = "TRACKERS/editor_file_tracker.json"  # Editor-specific tracker
+        # === Trackers ===
+        self.TRACKERS_DIR = "TRACKERS"                           # Files tracker + editor tracker
+        self.tracker_store = get_tracker_store(self.TRACKERS_DIR)
 
         # === Plate type inference based on row labels ===
         self.PLATE_ROW_RANGES_MAP = {
-            tuple(["A", "B", "C"]): "12 wells",
-            tuple(["A", "B", "C", "D"]): "24 wells",
-            tuple(["A", "B", "C", "D", "E", "F"]): "48 wells",
-            tuple(["A", "B", "C", "D", "E", "F", "G", "H"]): "96 wells"
+            tuple(rows): plate_type for plate_type, rows in PLATE_ROW_RANGES.items()
         }
 
-        # Load editor-specific file tracker (per experiment)
-        self.file_data = self.load_tracker()
+        # Parsed workbooks are shared across reruns and sessions
+        self.parse_cache = get_parse_cache()
+
+        # Editor tracker entries, loaded one experiment at a time (see load_experiment)
+        self.file_data = {}
+
+        # Unit of work: save_tracker() only marks the tracker dirty, flush_tracker()
+        # writes the experiments whose content hash changed, once per rerun
+        self._dirty = False
+        self._snapshots = {}                       # experiment -> content hashes when first tracked
+        self._bases = {}                           # experiment -> entry when first tracked (merge base)
+        self._loaded_experiments = set()           # experiments read from the tracker
 
         # Load main experiment list into session state if not already present
         if "experiments_list" not in st.session_state:
@@ -37,72 +54,149 @@ class Editor:
 
     # === Tracker Handling ===
     def save_tracker(self):
-        """Safely saves editor tracker file to disk."""
+        """Marks the editor tracker as modified; the write happens once, in flush_tracker()."""
+        self._dirty = True
+
+    def track_experiment(self, experiment):
+        """Load an experiment's tracker entry and remember its content before it gets edited."""
+        self.load_experiment(experiment)
+        if experiment not in self._snapshots:
+            entry = self.file_data.get(experiment)
+            self._snapshots[experiment] = self.entry_hashes(entry)
+            self._bases[experiment] = copy.deepcopy(entry)
+
+    @staticmethod
+    def entry_hashes(entry):
+        """
+        Content hash of every key of an experiment entry (one per subdataset).
+
+        Returns:
+            dict | None: key -> digest, None if the experiment is not in the tracker.
+        """
+        if entry is None:
+            return None
+        return {
+            key: hashlib.blake2b(
+                json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                digest_size=16,
+            ).hexdigest()
+            for key, value in entry.items()
+        }
+
+    @staticmethod
+    def bump_versions(entry, before, after):
+        """
+        Increment the version counter of an edited experiment entry and of each of
+        its subdatasets whose content hash changed (`before` / `after` from entry_hashes).
+        """
+        before = before or {}
+        for key, digest in after.items():
+            sub_data = entry[key]
+            if key.isdigit() and isinstance(sub_data, dict) and before.get(key) != digest:
+                sub_data["version"] = sub_data.get("version", 0) + 1
+        entry["version"] = entry.get("version", 0) + 1
+
+    def flush_tracker(self):
+        """
+        Safely writes the experiments modified since the last flush.
+        Only tracked experiments and experiments added or removed during the run are
+        compared; those whose content hashes are unchanged are not written at all.
+        Each one is written with compare-and-swap: if another session saved the same
+        experiment meanwhile, both sessions' edits are merged (see tracker_merge).
+        """
+        if not self._dirty:
+            return
+        self._dirty = False
+
+        candidates = set(self._snapshots) | (set(self.file_data) ^ self._loaded_experiments)
         try:
-            with open(self.TRACKER_FILE_E, "w", encoding='utf-8') as file:
-                json.dump(self.file_data, file, ensure_ascii=False, indent=4, separators=(",", ":"))
+            for experiment in candidates:
+                entry = self.file_data.get(experiment)
+                hashes = self.entry_hashes(entry)
+                before = self._snapshots.get(experiment)
+                if experiment in self._snapshots and hashes == before:
+                    continue
+                if entry is not None:
+                    self.bump_versions(entry, before, hashes)
+                stored = self.tracker_store.compare_and_swap(
+                    "editor", experiment, self._bases.get(experiment), entry
+                )
+                if stored is None:
+                    self.file_data.pop(experiment, None)
+                else:
+                    self.file_data[experiment] = stored
+                self._snapshots[experiment] = self.entry_hashes(stored)
+                self._bases[experiment] = copy.deepcopy(stored)
         except TypeError as e:
             st.error(f"JSON Serialization Error: {e}")
             st.json(self.file_data)  # Display problematic data
+            return
         except Exception as e:
             st.error(f"Error saving tracker: {e}")
+            return
 
-    def load_tracker(self):
-        """Loads editor tracker from disk, handles corruption."""
-        if os.path.exists(self.TRACKER_FILE_E):
-            try:
-                with open(self.TRACKER_FILE_E, "r") as file:
-                    return json.load(file)
-            except json.JSONDecodeError:
-                st.error("Editor file tracker corrupted. Resetting.")
-                os.remove(self.TRACKER_FILE_E)
-                return {}
-            except Exception as e:
-                st.error(f"Error loading tracker: {e}")
-                return {}
-        return {}
+        self._loaded_experiments = set(self.file_data)
+
+    def load_experiment(self, experiment):
+        """Loads one experiment's editor tracker entry into file_data (only that one is read)."""
+        if experiment in self.file_data or experiment in self._loaded_experiments:
+            return
+        try:
+            entry = self.tracker_store.load_entry("editor", experiment)
+        except json.JSONDecodeError:
+            st.error("Editor tracker entry corrupted. Resetting.")
+            self.tracker_store.put("editor", experiment, {})
+            entry = {}
+        except Exception as e:
+            st.error(f"Error loading tracker: {e}")
+            return
+        if entry is not None:
+            self.file_data[experiment] = entry
+            self._loaded_experiments.add(experiment)
 
     def load_experiment_list(self):
-        """Loads experiments from the main tracker file into session state."""
-        if os.path.exists(self.TRACKER_FILE):
-            try:
-                with open(self.TRACKER_FILE, "r") as file:
-                    tracker_data = json.load(file)
-                    # st.write("Loaded tracker data:", tracker_data)  # Add this line ################# DEBUG
-                st.session_state.experiments_list = [
-                    path for path, info in tracker_data.items()
-                    if info.get("is_experiment", False)
-                ]
-            except json.JSONDecodeError:
-                st.error(f"Main tracker '{self.TRACKER_FILE}' corrupted.")
-                st.session_state.experiments_list = []
-            except Exception as e:
-                st.error(f"Error loading main tracker: {e}")
-                st.session_state.experiments_list = []
-        else:
+        """Loads experiments from the main tracker into session state."""
+        try:
+            st.session_state.experiments_list = self.tracker_store.experiment_paths()
+        except json.JSONDecodeError:
+            st.error("Main tracker corrupted.")
+            st.session_state.experiments_list = []
+        except Exception as e:
+            st.error(f"Error loading main tracker: {e}")
             st.session_state.experiments_list = []
 
     # === Utility Methods ===
     def index_to_letter(self, idx):
         """Convert numeric index (e.g., row number) to Excel-style letter."""
-        letters = ""
-        while idx >= 0:
-            letters = chr(65 + (idx % 26)) + letters
-            idx = (idx // 26) - 1
-        return letters
+        return plate_layout.index_to_letter(idx)
 
     def calculate_statistics(self, group_df):
-        """Calculate statistical metrics from a selected group of cells."""
-        numeric_values = pd.to_numeric(group_df["value"], errors="coerce").dropna()
-        if not numeric_values.empty:
-            return {
-                "Mean": numeric_values.mean(),
-                "Standard Deviation": numeric_values.std(),
-                "Coefficient of Variation": numeric_values.std() / numeric_values.mean(),
-                "Min": numeric_values.min(),
-                "Max": numeric_values.max(),
-            }
-        return {"Error": "No numerical data found for statistics"}
+        """
+        Calculate statistical metrics from a selected group of cells.
+        Accepts the group's cell records as a DataFrame or the numeric values directly
+        (e.g. from PlateReading.cell_values).
+        """
+        if isinstance(group_df, pd.DataFrame):
+            numeric_values = pd.to_numeric(group_df["value"], errors="coerce").to_numpy(dtype=float)
+        else:
+            numeric_values = np.asarray(group_df, dtype=float)
+        return batch_statistics([numeric_values])[0]
+
+    def refresh_group_statistics(self, exp, sub_idx, sub_data, plate):
+        """
+        Recompute the saved groups' statistics from the plate's current values, so edits
+        made in the data editor show up everywhere (only groups whose cells changed are
+        recomputed; see GroupStatistics).
+        """
+        groups = sub_data.get("cell_groups", {})
+        if not groups or plate is None:
+            return
+        engines = st.session_state.setdefault("group_statistics", {})
+        engine = engines.setdefault((exp, str(sub_idx)), GroupStatistics())
+        for g_name, stats in engine.compute(plate, groups).items():
+            if groups[g_name].get("stats") != stats:
+                groups[g_name]["stats"] = dict(stats)
+                self.save_tracker()
 
     def safe_key(self, name):
         """Sanitize a string to use as a Streamlit widget key."""
@@ -110,7 +204,14 @@ class Editor:
 
     # === Main Run Method ===
     def run(self):
-        """Main function to render the Editor UI."""
+        """Main function to render the Editor UI; tracker changes are written once at the end."""
+        try:
+            self._render()
+        finally:
+            # Also runs when st.rerun()/st.stop() interrupt the script
+            self.flush_tracker()
+
+    def _render(self):
         st.write("---")
         selected_experiment_col, delete_button_col = st.columns([0.8, 0.2])
 
@@ -131,10 +232,12 @@ class Editor:
 
         # Confirm delete flow
         if "confirm_delete_experiment" in st.session_state:
+            self.track_experiment(st.session_state.confirm_delete_experiment)
             self.confirm_delete_experiment(st.session_state.confirm_delete_experiment)
         else:
             st.write("---")
             if selected_experiment:
+                self.track_experiment(selected_experiment)
                 # This is the crucial check: only run initialization for a NEWLY selected experiment.
                 if "selected_experiment_for_subdatasets" not in st.session_state or \
                    st.session_state.selected_experiment_for_subdatasets != selected_experiment:
@@ -143,28 +246,62 @@ class Editor:
                 self.edit_experiment(selected_experiment)
 
     def add_all_subdatasets(self, selected_experiment):
-        """Initializes and saves ALL subdatasets for a given experiment to the tracker."""
-        experiment = Experiment.create_experiment_from_file(selected_experiment)
-        df = experiment.dataframe
-        st.session_state.subdatasets, valid_rows = Experiment.split_into_subdatasets(df)
+        """
+        Initializes and saves ALL subdatasets for a given experiment to the tracker.
+        Only plates appended to the workbook since the last import are parsed;
+        subdatasets already in the tracker keep their edits and groups.
+        """
+        new_plates = self.import_appended_subdatasets(selected_experiment)
+        st.session_state.subdatasets = self.tracked_subdatasets(selected_experiment)
         st.session_state.selected_experiment_for_subdatasets = selected_experiment
         st.session_state.selected_subdataset_index = 0
 
-        self.file_data.setdefault(selected_experiment, {})
+        valid_rows = self.file_data[selected_experiment]["ingest"]["valid_rows"]
         inferred_plate = self.PLATE_ROW_RANGES_MAP.get(tuple(valid_rows), "Unknown wells")
         self.file_data[selected_experiment]["plate_type"] = inferred_plate
-
-        # Pre-populate ALL subdatasets into the tracker.
-        for idx, sub_df in enumerate(st.session_state.subdatasets):
-            self.file_data[selected_experiment].setdefault(str(idx), {
-                "index_subdataset": sub_df.reset_index(drop=True).to_dict(orient="records"),
-                "index_subdataset_original": sub_df.reset_index(drop=True).to_dict(orient="records"),
-                "cell_groups": {},
-                "others": "",
-                "renamed_columns": {},
-            })
         self.save_tracker()
         st.info(f"Inferred plate: **{inferred_plate}**")
+        if new_plates:
+            st.success(f"Imported {new_plates} new sub-dataset(s).")
+
+    def import_appended_subdatasets(self, selected_experiment):
+        """
+        Add the plates appended to the workbook since the last import to the tracker.
+
+        Returns:
+            int: Number of sub-datasets added.
+        """
+        entry = self.file_data.setdefault(selected_experiment, {})
+        start, subdatasets, entry["ingest"] = Experiment.import_appended_subdatasets(
+            selected_experiment, entry.get("ingest")
+        )
+
+        added = 0
+        for idx, sub_df in enumerate(subdatasets, start=start):
+            plate = PlateReading.from_frame(sub_df.reset_index(drop=True)).to_dict()
+            sub_data = entry.get(str(idx))
+            if sub_data is None:
+                added += 1
+            elif sub_data.get("cell_groups") or has_edits(sub_data):
+                continue  # Edited by the user: keep it as it is
+            entry[str(idx)] = {
+                "index_subdataset_original": plate,
+                "patches": [],
+                "cell_groups": {},
+                "others": sub_data.get("others", "") if sub_data else "",
+                "renamed_columns": sub_data.get("renamed_columns", {}) if sub_data else {},
+            }
+        return added
+
+    def tracked_subdatasets(self, selected_experiment):
+        """The experiment's subdatasets as stored in the tracker, in plate order."""
+        entry = self.file_data.get(selected_experiment, {})
+        plates = []
+        for idx in sorted((int(k) for k in entry if k.isdigit())):
+            sub_data = entry[str(idx)]
+            stored = sub_data.get("index_subdataset_original") or sub_data.get("index_subdataset")
+            plates.append(PlateReading.load(stored) or PlateReading.from_frame(pd.DataFrame()))
+        return plates
 
 
     # === Experiment Deletion Confirmation ===
@@ -197,32 +334,15 @@ class Editor:
             self.save_tracker()
 
         # Load experiment object and display data
-        experiment = Experiment.create_experiment_from_file(selected_experiment)
+        experiment = Experiment.create_experiment_from_file(selected_experiment, cache=self.parse_cache)
         df = experiment.dataframe
 
         st.write("## Original Dataset")
         st.dataframe(df)
 
-        # Split into subdatasets if needed
+        # Split into subdatasets if needed (only appended plates are parsed)
         if "subdatasets" not in st.session_state or st.session_state.selected_experiment_for_subdatasets != selected_experiment:
-            st.session_state.subdatasets, valid_rows = Experiment.split_into_subdatasets(df)
-            st.session_state.selected_experiment_for_subdatasets = selected_experiment
-            st.session_state.selected_subdataset_index = 0
-
-            # Infer plate type
-            inferred_plate = self.PLATE_ROW_RANGES_MAP.get(tuple(valid_rows), "Unknown wells")
-            self.file_data[selected_experiment]["plate_type"] = inferred_plate
-            self.save_tracker()
-            st.info(f"Inferred plate: **{inferred_plate}**")
-
-        # ✅ NEW: initialize *all* subdatasets in the tracker
-        for i, sub in enumerate(st.session_state.subdatasets):
-            self.file_data[selected_experiment].setdefault(str(i), {
-                "index_subdataset": sub.reset_index(drop=True).to_dict(orient="records"),
-                "cell_groups": {},
-                "others": "",
-                "renamed_columns": {},
-            })
+            self.add_all_subdatasets(selected_experiment)
 
         # Select subdataset
         selected_index = st.selectbox(
@@ -235,20 +355,19 @@ class Editor:
 
         # Create data structure if not present
         sub_data = self.file_data[selected_experiment].setdefault(str(selected_index), {
-            "index_subdataset": [],
+            "patches": [],
             "cell_groups": {},
             "others": "",
             "renamed_columns": {},
         })
         self.save_tracker()
 
-        # Load subdataset into memory
-        saved_records = sub_data.get("index_subdataset")
-        sub_df = pd.DataFrame(saved_records) if saved_records else st.session_state.subdatasets[selected_index].reset_index(drop=True)
-
-        # Rename columns
+        # Load subdataset into memory: the original plate with the user's patches applied,
+        # kept in the session while the data editor's edits are patched into it
+        editor_key = f"editor_{selected_index}_{selected_experiment}"
+        editor_plate = self.editor_plate(editor_key, sub_data, selected_index)
+        sub_df = editor_plate["frame"]
         renamed = sub_data.get("renamed_columns", {})
-        sub_df = sub_df.rename(columns=renamed)
 
         # Column renaming UI
         with st.expander("🔤 Rename Columns using uniq names: example_a and example_b"):
@@ -278,8 +397,15 @@ class Editor:
                 sub_df = sub_df.rename(columns=new_names)
 
                 # Save original for later comparison
-                sub_data["index_subdataset_original"] = sub_df.to_dict(orient="records")
+                original = PlateReading.from_frame(sub_df)
+                sub_data["index_subdataset_original"] = original.to_dict()
+                sub_data["patches"] = []
+                sub_data.pop("index_subdataset", None)
                 self.save_tracker()
+                # Patches of the old plate no longer apply: start a new history
+                st.session_state.get("edit_histories", {}).pop((selected_experiment, str(selected_index)), None)
+                editor_plate = self.editor_plate(editor_key, sub_data, selected_index)
+                sub_df = editor_plate["frame"]
 
         # === Data Editor UI ===
         st.subheader(f"Sub-dataset {selected_index+1}")
@@ -295,21 +421,207 @@ class Editor:
             sub_df,
             height=320,
             use_container_width=True,
-            key=f"editor_{selected_index}_{selected_experiment}"
+            key=editor_key
         )
-        sub_data["index_subdataset"] = edited_df.to_dict(orient="records")
-        self.save_tracker()
+        edited_plate = self.store_editor_delta(editor_key, sub_data, editor_plate, edited_df)
+        self.edit_history_controls(selected_experiment, selected_index, sub_data, editor_key)
+        self.refresh_group_statistics(selected_experiment, selected_index, sub_data, edited_plate)
 
         # === Handle Cell Selection & Grouping ===
-        self.handle_cell_selection(selected_experiment, selected_index, edited_df, sub_data)
+        self.handle_cell_selection(selected_experiment, selected_index, edited_df, sub_data, edited_plate)
 
         # === Show saved groups and stats ===
-        self.display_saved_groups(selected_experiment, selected_index, sub_data)
+        self.display_saved_groups(selected_experiment, selected_index, sub_data, edited_plate)
 
         self.statistic_graphics(sub_data) ####### chamar aqui o método
 
 
-    def handle_cell_selection(self, exp, sub_idx, df, sub_data):
+    def editor_plate(self, editor_key, sub_data, sub_idx):
+        """
+        The typed plates behind a sub-dataset's data editor, kept in the session:
+        the original plate, the edited plate (patched in place as edits come in)
+        and the DataFrame the widget was created from. They are rebuilt only when
+        the stored patches or column names were changed by something other than
+        this data editor (undo, another session, renaming).
+
+        Returns:
+            dict: "original", "plate", "frame", "base_patches" (the edits already in
+                  the frame), "applied" (the widget's edited cells applied to "plate"),
+                  "written" (the patches last stored), "renamed" and "columns".
+        """
+        plates = st.session_state.setdefault("editor_plates", {})
+        cached = plates.get(editor_key)
+        renamed = sub_data.get("renamed_columns", {})
+        if cached is not None and cached["written"] == sub_data.get("patches") and cached["renamed"] == renamed:
+            return cached
+        if cached is not None:
+            st.session_state.pop(editor_key, None)  # Its edited rows refer to the old frame
+
+        original = PlateReading.load(sub_data.get("index_subdataset_original")) or st.session_state.subdatasets[sub_idx]
+        if "patches" in sub_data:
+            plate = original.apply_patches(sub_data["patches"])
+        else:
+            plate = modified_plate(sub_data) or original.apply_patches([])
+        frame = plate.to_frame().rename(columns=renamed)
+        cached = {
+            "original": original,
+            "plate": plate,
+            "frame": frame,
+            "base_patches": list(sub_data.get("patches", [])),
+            "applied": set(),  # Cells of edited_rows applied to "plate" so far
+            "written": sub_data.get("patches"),
+            "renamed": dict(renamed),
+            "columns": {str(name): j for j, name in enumerate(frame.columns)},  # As named in edited_rows
+        }
+        plates[editor_key] = cached
+        return cached
+
+    def store_editor_delta(self, editor_key, sub_data, editor_plate, edited_df):
+        """
+        Store only the cells the data editor reports as edited (its "edited_rows"
+        state) as patches, and apply them in place to the cached edited plate, so an
+        edit costs O(edited cells) instead of converting and diffing whole plates.
+        Added or deleted rows change the plate's shape and fall back to store_edits.
+
+        Returns:
+            PlateReading: The edited plate.
+        """
+        state = st.session_state.get(editor_key) or {}
+        if "patches" not in sub_data or state.get("added_rows") or state.get("deleted_rows"):
+            edited_plate = PlateReading.from_frame(edited_df)
+            self.store_edits(sub_data, editor_plate["original"], edited_plate)
+            self.save_tracker()
+            st.session_state["editor_plates"].pop(editor_key, None)
+            return edited_plate
+
+        columns = editor_plate["columns"]
+        cells = {
+            (int(row), columns[str(column)]): value
+            for row, changes in state.get("edited_rows", {}).items()
+            for column, value in changes.items()
+            if str(column) in columns
+        }
+        plate = editor_plate["plate"]
+        for (row, column), value in cells.items():
+            plate.set_cell(row, column, value)
+        # Cells reverted in the widget leave edited_rows: back to the value the frame was built with
+        reverted = editor_plate["applied"] - cells.keys()
+        if reverted:
+            base = {(p["row"], p["column"]): p["new"] for p in editor_plate["base_patches"]}
+            for row, column in reverted:
+                plate.set_cell(row, column, base.get((row, column), editor_plate["original"].cell(row, column)))
+        editor_plate["applied"] = set(cells)
+
+        patches = patch_cells(editor_plate["original"], editor_plate["base_patches"], cells)
+        if "index_subdataset_original" not in sub_data:
+            sub_data["index_subdataset_original"] = editor_plate["original"].to_dict()
+            self.save_tracker()
+        if patches != sub_data["patches"]:
+            sub_data["patches"] = patches
+            self.save_tracker()
+        editor_plate["written"] = patches
+        return plate
+
+    def store_edits(self, sub_data, original, edited_plate):
+        """
+        Keep the user's edits as a cell-level patch set against the original plate,
+        which is stored once. Legacy entries holding a full edited copy are converted.
+        """
+        patches = original.diff(edited_plate)
+        if patches is None:
+            # The shape changed: no cell-level patch possible, keep the whole plate
+            sub_data["index_subdataset"] = edited_plate.to_dict()
+            sub_data.pop("patches", None)
+            return
+        if "index_subdataset_original" not in sub_data:
+            sub_data["index_subdataset_original"] = original.to_dict()
+        sub_data["patches"] = patches
+        sub_data.pop("index_subdataset", None)
+
+    def edit_history(self, exp, sub_idx, sub_data):
+        """The session's undo/redo history of a sub-dataset's cell edits, created on first use."""
+        histories = st.session_state.setdefault("edit_histories", {})
+        key = (exp, str(sub_idx))
+        if key not in histories:
+            histories[key] = EditHistory(sub_data.get("patches"))
+        return histories[key]
+
+    def edit_history_controls(self, exp, sub_idx, sub_data, editor_key):
+        """Record the current edits and offer undo, redo and jumping to any earlier step."""
+        if "patches" not in sub_data:
+            return  # The plate's shape was changed: there is no cell-level history
+        history = self.edit_history(exp, sub_idx, sub_data)
+        history.record(sub_data["patches"])
+        if not len(history):
+            return
+
+        target = None
+        col_undo, col_redo, col_jump = st.columns([0.15, 0.15, 0.7])
+        with col_undo:
+            if st.button("↶ Undo", disabled=not history.can_undo, key=f"undo_{sub_idx}_{exp}"):
+                target = history.undo()
+        with col_redo:
+            if st.button("↷ Redo", disabled=not history.can_redo, key=f"redo_{sub_idx}_{exp}"):
+                target = history.redo()
+        with col_jump:
+            sizes = history.step_sizes()
+            step = st.selectbox(
+                "Edit history:",
+                range(len(history) + 1),
+                index=history.position,
+                # Step 0 is where the history starts (the edits stored when the session began,
+                # or the oldest step kept), not necessarily the unedited plate
+                format_func=lambda k: "Start of history" if k == 0 else f"Step {k} ({sizes[k - 1]} cell(s))",
+                key=f"history_{sub_idx}_{exp}_{history.position}_{len(history)}",
+            )
+            if step != history.position:
+                target = history.goto(step)
+
+        if target is not None:
+            sub_data["patches"] = target
+            self.save_tracker()
+            # The data editor would otherwise re-apply its own pending edits on top
+            st.session_state.pop(editor_key, None)
+            st.rerun()
+
+    def current_group_members(self):
+        """
+        Set of the (row, column) cells in the unsaved group, for O(1) membership checks.
+        Rebuilt whenever the group was replaced (e.g. cleared) since it was last used.
+        """
+        members = st.session_state.get("current_group_members")
+        if members is None or len(members) != len(st.session_state.current_group):
+            members = {(c["row"], c["column"]) for c in st.session_state.current_group}
+            st.session_state.current_group_members = members
+        return members
+
+    def add_cells_to_group(self, df, rows, cols):
+        """
+        Add cells, given as row and column positions in `df`, to the unsaved group,
+        skipping the ones it already holds.
+
+        Returns:
+            list[dict]: The cell records added.
+        """
+        members = self.current_group_members()
+        columns = {}  # Only the columns of new cells are read, as arrays (no copy for numeric ones)
+        added = []
+        for row, col in zip(rows, cols):
+            info = {"row": self.index_to_letter(int(row)), "column": df.columns[col]}
+            if (info["row"], info["column"]) in members:
+                continue
+            if col not in columns:
+                columns[col] = df.iloc[:, col].to_numpy()
+            val = columns[col][row]
+            if isinstance(val, np.generic):
+                val = val.item()
+            info = {"value": val if isinstance(val, (int, float)) else str(val), **info}
+            members.add((info["row"], info["column"]))
+            added.append(info)
+        st.session_state.current_group.extend(added)
+        return added
+
+    def handle_cell_selection(self, exp, sub_idx, df, sub_data, plate=None):
         """Handle UI and logic for selecting individual cells and grouping them."""
         st.subheader("Select Cells to Create Groups")
         st.info("To clear selection to a new group, click clear selection, then select the first cell of the new group and click clear selection again. Then proceed normally.")
@@ -323,18 +635,28 @@ class Editor:
         # Cell selection logic
         selected_cell = st_table_select_cell(df)
         if selected_cell:
-            row = int(selected_cell['rowId'])
-            col = df.columns[selected_cell['colIndex']]
-            val = df.iat[row, selected_cell['colIndex']]
-            val = val.item() if isinstance(val, np.generic) else str(val)
-            info = {
-                "value": val,
-                "row": self.index_to_letter(row),
-                "column": col,
-            }
-            if info not in st.session_state.current_group:
-                st.session_state.current_group.append(info)
-                st.success(f"Added {info}")
+            added = self.add_cells_to_group(df, [int(selected_cell['rowId'])], [selected_cell['colIndex']])
+            if added:
+                st.success(f"Added {added[0]}")
+
+        # Many cells at once: ranges, whole rows/columns and column patterns
+        with st.expander("Select a range or pattern of cells"):
+            spec = st.text_input(
+                "Cells:",
+                key=f"range_selection_{sub_idx}_{exp}",
+                placeholder="B3:D5; rows B-G; columns 3-5 rows B-G; every _a",
+                help="Clauses separated by ';'. Rows by letter (B, B-G, A,C,E), columns by position "
+                     "(3, 3-5) or name, 'every _a' for columns ending in _a, 'columns *_a' for a "
+                     "pattern, 'all' for the whole plate.",
+            )
+            if st.button("Add to group", key=f"add_range_{sub_idx}_{exp}", disabled=not spec):
+                try:
+                    rows, cols = select_cells(spec, list(df.columns), len(df))
+                except SelectionError as e:
+                    st.error(str(e))
+                else:
+                    added = self.add_cells_to_group(df, rows, cols)
+                    st.success(f"Added {len(added)} cell(s)")
 
         # Display current (unsaved) group (keep visible while unsaved)
         if st.session_state.current_group:
@@ -351,17 +673,13 @@ class Editor:
                         if st.session_state.group_name in groups:
                             st.error(f"Group '{st.session_state.group_name}' exists.")
                         else:
-                            stats = self.calculate_statistics(pd.DataFrame(st.session_state.current_group))
+                            if plate is not None:
+                                stats = self.calculate_statistics(plate.cell_values(st.session_state.current_group))
+                            else:
+                                stats = self.calculate_statistics(pd.DataFrame(st.session_state.current_group))
 
                             # ----- color assignment (persistent) -----
-                            color_palette = [
-                                "#FFB3BA", "#FFDFBA", "#FFFFBA", "#BAFFC9", "#BAE1FF",
-                                "#E6B3FF", "#FFD9E6", "#C2FFAD", "#BFFCC6", "#AFCBFF",
-                                "#FFE6AA", "#FFBFA3", "#F3B0C3", "#A3F7BF", "#B2F0E6",
-                                "#F6E6B4", "#E0C3FC", "#FFD5CD", "#C9FFD5", "#D5F4E6",
-                                "#A1EAFB", "#FFCCE5", "#D1C4E9", "#C5E1A5", "#F8BBD0",
-                                "#FFF59D", "#B39DDB", "#80CBC4", "#FFAB91", "#CE93D8"
-                            ]
+                            color_palette = DEFAULT_PALETTE
                             used_colors = [g.get("color") for g in groups.values() if isinstance(g, dict) and "color" in g]
                             available_colors = [c for c in color_palette if c not in used_colors]
                             group_color = available_colors[0] if available_colors else color_palette[len(groups) % len(color_palette)]
@@ -386,7 +704,7 @@ class Editor:
                     st.rerun()
 
 
-    def display_saved_groups(self, exp, sub_idx, sub_data):
+    def display_saved_groups(self, exp, sub_idx, sub_data, plate=None):
         """
         Display saved groups and their statistics with delete option.
         Shows: [Selection (cells) - collapsed], [Highlighted full sub-dataset], [Statistics].
@@ -402,10 +720,8 @@ class Editor:
         # Use the saved colors for each group.
         try:
             # Build a single combined styled DataFrame for this subdataset
-            styled_full = self.highlight_grouped_cells(
-                pd.DataFrame(sub_data.get("index_subdataset", [])) if sub_data.get("index_subdataset") else pd.DataFrame(st.session_state.subdatasets[sub_idx]).reset_index(drop=True),
-                groups
-            )
+            plate = plate or modified_plate(sub_data) or st.session_state.subdatasets[sub_idx]
+            styled_full = self.highlight_grouped_cells(plate.to_frame(), groups)
             st.subheader("Highlighted Selected Groups")
             st.dataframe(styled_full, use_container_width=True)
 
@@ -495,32 +811,11 @@ class Editor:
             return sub_df if isinstance(sub_df, pd.DataFrame) else pd.DataFrame()
 
         # Normalize sub_df index to RangeIndex so row index matches row letter conversion
-        sub_df = sub_df.reset_index(drop=True).copy()
-
-        # style_map DataFrame
-        style_df = pd.DataFrame('', index=sub_df.index, columns=sub_df.columns)
-
-        # default fallback palette (used if a group misses a color)
-        default_palette = [
-            "#FFB3BA", "#FFDFBA", "#FFFFBA", "#BAFFC9", "#BAE1FF",
-            "#E6B3FF", "#FFD9E6", "#C2FFAD", "#BFFCC6", "#AFCBFF",
-            "#FFE6AA", "#FFBFA3", "#F3B0C3", "#A3F7BF", "#B2F0E6",
-            "#F6E6B4", "#E0C3FC", "#FFD5CD", "#C9FFD5", "#D5F4E6",
-            "#A1EAFB", "#FFCCE5", "#D1C4E9", "#C5E1A5", "#F8BBD0",
-            "#FFF59D", "#B39DDB", "#80CBC4", "#FFAB91", "#CE93D8"
-        ]
+        sub_df = sub_df.reset_index(drop=True)
 
-        for i, (group_name, g_data) in enumerate(cell_groups.items()):
-            color = g_data.get("color", default_palette[i % len(default_palette)])
-            for cell in g_data.get("cells", []):
-                try:
-                    row_idx = ord(cell["row"]) - 65
-                    col_name = cell["column"]
-                    if col_name in style_df.columns and 0 <= row_idx < len(style_df):
-                        style_df.loc[row_idx, col_name] = f'background-color: {color}'
-                except Exception:
-                    # ignore if row/col not found
-                    continue
+        # Color of every cell, resolved once per set of groups (see highlight.py)
+        mask = highlight_mask(cell_groups, sub_df.columns, len(sub_df))
+        style_df = pd.DataFrame(mask.css(), index=sub_df.index, columns=sub_df.columns)
 
         # apply style map
         return sub_df.style.apply(lambda _: style_df, axis=None)
@@ -558,12 +853,12 @@ class Editor:
             st.info("No groups saved.")
             return
 
-        # Gather all stats into a DataFrame for easy plotting
+        # Gather the stats (and each group's color) of every group for plotting
         stats_data = []
         for g_name, g_data in groups.items():
             stats = g_data.get("stats", {})
             if stats and "Error" not in stats:
-                row = {"Group": g_name}
+                row = {"Group": g_name, "color": g_data.get("color")}
                 row.update(stats)
                 stats_data.append(row)
 
@@ -571,54 +866,27 @@ class Editor:
             st.warning("No valid numerical statistics found.")
             return
 
-        stats_df = pd.DataFrame(stats_data).set_index("Group")
-
         # --- Collapsible visualizations ---
         st.subheader("📊 Statistical Comparisons")
 
-        # Define the metrics to visualize (order matters here)
-        metrics = ["Mean", "Standard Deviation", "Coefficient of Variation", "Min", "Max"]
+        # Define the metrics to visualize (order matters here), skipping those not computed
+        metrics = [
+            m for m in ["Mean", "Standard Deviation", "Coefficient of Variation", "Min", "Max"]
+            if any(m in row for row in stats_data)
+        ]
+
+        # Charts are rendered once per change of the stats or colors and served from the cache
+        figures = get_figure_cache()
+        combined = st.toggle("Show all metrics in one chart", value=False, key="combined_stat_charts")
+        if combined:
+            with st.expander("Show metric comparisons", expanded=False):
+                st.image(figures.combined_chart(stats_data, metrics))
+            return
 
         # Create a column per metric so expanders align horizontally
         cols = st.columns(len(metrics))
 
         for i, metric in enumerate(metrics):
-            # Skip metrics not present in the assembled stats_df
-            if metric not in stats_df.columns:
-                continue
-
             with cols[i]:
                 with st.expander(f"Show {metric} comparison", expanded=False):
-                    # local import to avoid relying on module-level plt import
-                    import matplotlib.pyplot as plt
-
-                    fig, ax = plt.subplots(figsize=(4, 3))
-
-                    # Ensure colors follow the order of stats_df rows (groups)
-                    # If the group's color is missing, fallback to a neutral gray.
-                    colors = []
-                    for grp in stats_df.index.astype(str):
-                        color = groups.get(grp, {}).get("color")
-                        if color is None:
-                            # fallback: try to find by substring match (in case keys differ)
-                            found = False
-                            for gname, ginfo in groups.items():
-                                if gname == grp or str(gname) == str(grp):
-                                    color = ginfo.get("color")
-                                    found = True
-                                    break
-                            if not found:
-                                color = "#A0A0A0"
-                        colors.append(color)
-
-                    # Draw bar chart
-                    ax.bar(stats_df.index.astype(str), stats_df[metric], color=colors)
-                    ax.set_title(f"{metric} by Group", fontsize=11)
-                    ax.set_xlabel("Group", fontsize=9)
-                    ax.set_ylabel(metric, fontsize=9)
-                    ax.grid(axis="y", linestyle="--", alpha=0.6)
-
-                    # Improve x-label readability
-                    plt.xticks(rotation=45, ha="right", fontsize=9)
-                    plt.tight_layout()
-                    st.pyplot(fig)
+                    st.image(figures.metric_chart(stats_data, metric))
@@ -1,18 +1,17 @@
 from datetime import datetime
 import json
 import os
-from pydantic import BaseModel, Field, field_serializer
+from pydantic import BaseModel, Field, PrivateAttr, field_serializer
+import numpy as np
 import pandas as pd
 from pandas import DataFrame, read_excel
 import streamlit as st
+from src.helpers import column_store
+from src.models import plate_layout
+from src.models.plate_layout import DEFAULT_PLATE_FORMAT, PLATE_FORMATS, PLATE_ROW_LABELS
 
 # Constant used to map row labels to plate types
-PLATE_ROW_RANGES = {
-    "12 wells": ["A", "B", "C"],
-    "24 wells": ["A", "B", "C", "D"],
-    "48 wells": ["A", "B", "C", "D", "E", "F"],
-    "96 wells": ["A", "B", "C", "D", "E", "F", "G", "H"]
-}
+PLATE_ROW_RANGES = PLATE_ROW_LABELS
 
 class Experiment(BaseModel):
     """
@@ -44,70 +43,58 @@ class Experiment(BaseModel):
     def split_into_subdatasets(df: DataFrame) -> tuple[list[DataFrame], list[str]]:
         """
         Automatically split a long experimental DataFrame into separate sub-datasets
-        based on inferred plate layout (12, 24, 48, or 96 wells).
+        based on inferred plate layout (12, 24, 48, 96, 384 or 1536 wells).
         
         Returns:
             - list of sub-DataFrames
             - valid row letters for inferred plate type
         """
-        # Infer plate type based on max row letter in column 0
-        first_col_letters = df.iloc[:, 0].astype(str).str.strip().str[0].str.upper().unique()
-        actual_row_letters = sorted([l for l in first_col_letters if 'A' <= l <= 'H'])
+        blocks, inferred_plate_type = Experiment.locate_plates(df.iloc[:, 0])
 
         # Default fallback if no rows detected
-        inferred_plate_type = "96 wells"
-        if not actual_row_letters:
+        if inferred_plate_type is None:
             st.warning("Could not infer plate type. Defaulting to 96 wells.")
-        else:
-            max_letter = actual_row_letters[-1]
-            if max_letter <= 'C':
-                inferred_plate_type = "12 wells"
-            elif max_letter <= 'D':
-                inferred_plate_type = "24 wells"
-            elif max_letter <= 'F':
-                inferred_plate_type = "48 wells"
-
-        valid_rows = PLATE_ROW_RANGES[inferred_plate_type]
-
-        # Subdataset collection logic
-        subdatasets = []
-        subdataset = pd.DataFrame(columns=df.columns)
-        start_flag = False
 
-        for _, row in df.iterrows():
-            first_value = str(row.iloc[0]).strip()
+        subdatasets = [Experiment._take_rows(df, positions) for positions in blocks]
+        return subdatasets, PLATE_ROW_RANGES[inferred_plate_type or DEFAULT_PLATE_FORMAT]
 
-            if first_value.startswith(valid_rows[0]):
-                if not subdataset.empty:
-                    subdatasets.append(subdataset)
-                subdataset = pd.DataFrame(columns=df.columns)
-                subdataset = pd.concat([subdataset, row.to_frame().T])
-                start_flag = True
-
-            elif first_value.startswith(valid_rows[-1]):
-                subdataset = pd.concat([subdataset, row.to_frame().T])
-                subdatasets.append(subdataset)
-                subdataset = pd.DataFrame(columns=df.columns)
-                start_flag = False
-
-            elif start_flag and first_value[0] in valid_rows:
-                subdataset = pd.concat([subdataset, row.to_frame().T])
+    @staticmethod
+    def locate_plates(first_column: pd.Series) -> tuple[list[np.ndarray], str | None]:
+        """
+        Detect the plate format and every plate's rows from the first column alone.
+        Row labels (A..H, A..P, A..AF, or well ids such as "B7") are resolved
+        once per distinct value through the precomputed plate_layout index.
 
-        if not subdataset.empty:
-            subdatasets.append(subdataset)
+        Returns:
+            - list of integer row-position arrays, one per plate, in sheet order
+            - inferred plate type, or None if no row label was found
+        """
+        codes = plate_layout.row_codes(first_column)
+        plate_type = plate_layout.detect_plate_format(codes)
+        n_rows, _ = PLATE_FORMATS[plate_type or DEFAULT_PLATE_FORMAT]
+        return plate_layout.find_plate_blocks(codes, n_rows), plate_type
 
-        return subdatasets, valid_rows
+    @staticmethod
+    def _take_rows(df: DataFrame, positions: np.ndarray) -> DataFrame:
+        """
+        Select a block of rows, using a cheap slice when the rows are contiguous.
+        """
+        first, last = int(positions[0]), int(positions[-1])
+        if last - first + 1 == len(positions):
+            return df.iloc[first:last + 1]
+        return df.iloc[positions]
 
     # ---- FACTORY METHODS ----
     @classmethod
-    def create_experiment_from_file(cls, filepath: str) -> 'Experiment':
+    def create_experiment_from_file(cls, filepath: str, cache=None) -> 'Experiment':
         """
         Initialize an Experiment from an Excel file path.
         The experiment name is derived from the file name.
+        If a ParseCache is given, the parsed sheet is taken from it.
         """
         name = os.path.basename(filepath).split(".")[0]  # Strip path and extension
         try:
-            dataframe = read_excel(filepath)
+            dataframe = cache.load(filepath) if cache is not None else read_excel(filepath)
         except Exception as e:
             raise ValueError(f"Error reading Excel file {filepath}: {e}")
 
@@ -118,6 +105,72 @@ class Experiment(BaseModel):
             note=""
         )
 
+    @staticmethod
+    def stream_subdatasets_from_file(filepath: str, sheet_name: str | None = None) -> tuple[list[DataFrame], list[str]]:
+        """
+        Read only the plates of an Excel file, one plate at a time, without
+        loading the whole sheet into a DataFrame first.
+
+        Returns the same shape as split_into_subdatasets:
+            - list of sub-DataFrames
+            - valid row letters for inferred plate type
+        """
+        # Local import: the importer builds on this module
+        from src.file_manager.excell_importer.excell_importer import ExcellImporter
+
+        try:
+            importer = ExcellImporter(filepath, sheet_name=sheet_name)
+            subdatasets = [reading.wells_data for reading in importer.iter_board_readings()]
+        except Exception as e:
+            raise ValueError(f"Error reading Excel file {filepath}: {e}")
+
+        return subdatasets, importer.valid_rows
+
+    @staticmethod
+    def import_appended_subdatasets(filepath: str, ingested: dict | None = None) -> tuple[int, list[DataFrame], dict]:
+        """
+        Read only the plates appended to a workbook since the previous import,
+        e.g. while a kinetic run is still writing to it.
+
+        `ingested` is the state returned by the previous call (None imports
+        everything). It records the data row to resume from, the number of
+        plates already imported and the plate rows in use. A trailing plate
+        that was still open last time is read again, since rows may have been
+        added to it.
+
+        Returns:
+            - index of the first returned plate (0 if the file was rewritten and read again)
+            - list of sub-DataFrames
+            - the new ingestion state
+        """
+        # Local import: the importer builds on this module
+        from src.file_manager.excell_importer.excell_importer import ExcellImporter
+
+        stats = os.stat(filepath)
+        if ingested and ingested.get("size") == stats.st_size and ingested.get("mtime_ns") == stats.st_mtime_ns:
+            return ingested["plates"], [], ingested
+        if ingested and ingested.get("size", 0) > stats.st_size:
+            ingested = None  # The file was rewritten, not appended to
+
+        ingested = ingested or {"next_line": 0, "plates": 0, "valid_rows": None}
+        start = ingested["plates"]
+        state = {"next_line": ingested["next_line"], "plates": start, "valid_rows": ingested["valid_rows"]}
+        try:
+            importer = ExcellImporter(filepath, valid_rows=state["valid_rows"], start_line=state["next_line"])
+            readings = list(importer.iter_board_readings())
+        except Exception as e:
+            raise ValueError(f"Error reading Excel file {filepath}: {e}")
+
+        for reading in readings:
+            if not reading.complete:
+                state["next_line"] = reading.first_line  # Re-read once more rows arrive
+                break
+            state["next_line"] = reading.last_line + 1
+            state["plates"] += 1
+
+        state.update(valid_rows=importer.valid_rows, size=stats.st_size, mtime_ns=stats.st_mtime_ns)
+        return start, [reading.wells_data for reading in readings], state
+
     @classmethod
     def create_experiment_from_bytes(cls, bytes_data: bytes, name: str) -> 'Experiment':
         """
@@ -136,20 +189,39 @@ class Experiment(BaseModel):
         )
 
     # ---- PERSISTENCE ----
-    def save(self):
+    def save(self, storage: str = "npy", touch: bool = True):
         """
-        Save the experiment to its JSON file.
-        This includes serialized DataFrame and metadata.
+        Save the experiment to disk.
+
+        With the default "npy" storage, the JSON file at `filepath` is a small
+        sidecar (name, dates, note, column layout) and the DataFrame goes to a
+        `<name>.data/` directory with one .npy file per numeric column.
+        "json" keeps the previous single-file format.
         """
-        self.last_modified = str(datetime.now())  # Update modification time
-        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        if touch:
+            self.last_modified = str(datetime.now())  # Update modification time
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+
+        if storage == "json":
+            with open(self.filepath, "w", encoding='utf-8') as file:
+                json.dump(self.model_dump(), file, ensure_ascii=False, indent=4)
+            column_store.remove_frame(column_store.data_dir_for(self.filepath))
+            return
+
+        if storage != "npy":
+            raise ValueError(f"Unknown storage format: {storage}")
+
+        record = self.model_dump(exclude={"dataframe"})
+        record["storage"] = "npy"
+        record["dataframe"] = column_store.write_frame(self.dataframe, column_store.data_dir_for(self.filepath))
         with open(self.filepath, "w", encoding='utf-8') as file:
-            json.dump(self.model_dump(), file, ensure_ascii=False, indent=4)
+            json.dump(record, file, ensure_ascii=False, indent=4)
 
     @classmethod
-    def load(cls, filepath: str) -> 'Experiment':
+    def load(cls, filepath: str, mmap: bool = True) -> 'Experiment':
         """
-        Load an experiment from disk. Deserializes DataFrame from saved JSON.
+        Load an experiment from disk.
+        Reads both the binary sidecar format and older single-file JSON experiments.
         """
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"Experiment file not found: {filepath}")
@@ -157,6 +229,11 @@ class Experiment(BaseModel):
         with open(filepath, "r", encoding='utf-8') as file:
             data = json.load(file)
 
+        if data.pop("storage", "json") == "npy":
+            data["dataframe"] = column_store.read_frame(
+                column_store.data_dir_for(filepath), data["dataframe"], mmap=mmap
+            )
+        else:
             # Deserialize DataFrame from 'split' format JSON
             json_data = json.loads(data["dataframe"])
             data["dataframe"] = DataFrame(
@@ -165,9 +242,15 @@ class Experiment(BaseModel):
                 columns=json_data['columns']
             )
 
-            data.setdefault("note", "")  # Ensure backward compatibility
+        data.setdefault("note", "")  # Ensure backward compatibility
 
-            return cls.model_validate(data)
+        return cls.model_validate(data)
+
+    @staticmethod
+    def is_legacy_file(filepath: str) -> bool:
+        """True if the experiment file still embeds its DataFrame as a JSON string."""
+        with open(filepath, "r", encoding='utf-8') as file:
+            return json.load(file).get("storage", "json") != "npy"
 
     # ---- UTILITIES ----
     def rename(self, new_name: str):
@@ -189,7 +272,161 @@ class Experiment(BaseModel):
         # Clean up old file
         if os.path.exists(old_filepath) and old_filepath != new_filepath:
             os.remove(old_filepath)
+            column_store.remove_frame(column_store.data_dir_for(old_filepath))
 
     # You may add a delete method later if needed
     # def delete(self):
     #     os.remove(self.filepath)
+
+
+class LazyExperiment(BaseModel):
+    """
+    Metadata-only view of a saved experiment.
+
+    Opening one reads just the JSON sidecar (name, dates, note, filepath).
+    The DataFrame, or a single plate of it, is read from the column files
+    the first time it is asked for. Renames and note edits only touch the
+    sidecar, so their cost does not depend on the size of the data.
+    """
+
+    name: str
+    filepath: str
+    creation_date: str = ""
+    last_modified: str = ""
+    note: str = ""
+    storage: str = "json"  # "npy" for the binary sidecar format, "json" for legacy files
+
+    _layout: dict | None = PrivateAttr(default=None)
+    _dataframe: DataFrame | None = PrivateAttr(default=None)
+    _arrays: dict | None = PrivateAttr(default=None)
+    _plate_blocks: list | None = PrivateAttr(default=None)
+
+    # ---- FACTORY METHODS ----
+    @classmethod
+    def open(cls, filepath: str) -> 'LazyExperiment':
+        """Read the metadata of a saved experiment without touching its data."""
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"Experiment file not found: {filepath}")
+
+        with open(filepath, "r", encoding='utf-8') as file:
+            data = json.load(file)
+
+        lazy = cls(
+            name=data["name"],
+            filepath=filepath,
+            creation_date=data.get("creation_date", ""),
+            last_modified=data.get("last_modified", ""),
+            note=data.get("note", ""),
+            storage=data.get("storage", "json"),
+        )
+        if lazy.storage == "npy":
+            lazy._layout = data["dataframe"]
+        return lazy
+
+    @classmethod
+    def scan(cls, directory: str = "experiments") -> list['LazyExperiment']:
+        """List every saved experiment in a directory, metadata only."""
+        if not os.path.isdir(directory):
+            return []
+        return [
+            cls.open(os.path.join(directory, file_name))
+            for file_name in sorted(os.listdir(directory))
+            if file_name.endswith(".json")
+        ]
+
+    # ---- DATA ACCESS ----
+    @property
+    def is_loaded(self) -> bool:
+        return self._dataframe is not None
+
+    @property
+    def dataframe(self) -> DataFrame:
+        """Full DataFrame, read from disk on first access."""
+        if self._dataframe is None:
+            if self.storage == "npy":
+                self._dataframe = column_store.rows_from_arrays(self._open_arrays(), self._layout)
+            else:
+                self._dataframe = Experiment.load(self.filepath).dataframe
+        return self._dataframe
+
+    @property
+    def plate_count(self) -> int:
+        return len(self._find_plates())
+
+    def plate(self, index: int) -> DataFrame:
+        """
+        One plate of the experiment. With binary storage only the first column
+        and that plate's rows are read.
+        """
+        blocks = self._find_plates()
+        if self.storage != "npy" or self._dataframe is not None:
+            return Experiment._take_rows(self.dataframe, blocks[index])
+        return column_store.rows_from_arrays(self._open_arrays(), self._layout, blocks[index])
+
+    def to_experiment(self) -> Experiment:
+        """Materialize a regular Experiment (loads the data)."""
+        return Experiment(
+            name=self.name,
+            dataframe=self.dataframe,
+            filepath=self.filepath,
+            creation_date=self.creation_date,
+            last_modified=self.last_modified,
+            note=self.note,
+        )
+
+    # ---- METADATA UPDATES ----
+    def rename(self, new_name: str):
+        """
+        Rename the experiment by moving its files; the data is not rewritten.
+        """
+        old_filepath = self.filepath
+        new_filepath = os.path.join(os.path.dirname(old_filepath), f"{new_name}.json")
+        if new_filepath == old_filepath:
+            return
+        if os.path.exists(new_filepath):
+            raise ValueError(f"Experiment with name '{new_name}' already exists.")
+
+        old_data_dir = column_store.data_dir_for(old_filepath)
+        if os.path.isdir(old_data_dir):
+            os.replace(old_data_dir, column_store.data_dir_for(new_filepath))
+            self._arrays = None  # Memory maps point at the old location
+        os.replace(old_filepath, new_filepath)
+
+        self.name = new_name
+        self.filepath = new_filepath
+        self.save_metadata()
+
+    def update_note(self, note: str):
+        """Change the note and persist it."""
+        self.note = note
+        self.save_metadata()
+
+    def save_metadata(self):
+        """
+        Write name, dates and note back to the sidecar.
+        Legacy single-file experiments still carry their data in the same file.
+        """
+        self.last_modified = str(datetime.now())
+        with open(self.filepath, "r", encoding='utf-8') as file:
+            record = json.load(file)
+        record.update(self.model_dump(include={"name", "filepath", "creation_date", "last_modified", "note"}))
+
+        tmp_path = f"{self.filepath}.tmp"
+        with open(tmp_path, "w", encoding='utf-8') as file:
+            json.dump(record, file, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.filepath)
+
+    # ---- INTERNALS ----
+    def _open_arrays(self) -> dict:
+        if self._arrays is None:
+            self._arrays = column_store.open_arrays(column_store.data_dir_for(self.filepath), self._layout)
+        return self._arrays
+
+    def _find_plates(self) -> list:
+        if self._plate_blocks is None:
+            if self.storage == "npy" and self._dataframe is None and self._layout["columns"]:
+                first_column = pd.Series(self._open_arrays()[0])
+            else:
+                first_column = self.dataframe.iloc[:, 0]
+            self._plate_blocks, _ = Experiment.locate_plates(first_column)
+        return self._plate_blocks
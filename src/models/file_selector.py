@@ -1,5 +1,6 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-import json
+import glob
 import os
 import time
 from tkinter import Tk
@@ -7,7 +8,54 @@ from tkinter.filedialog import askopenfilename
 from pydantic import BaseModel, Field
 import pandas as pd
 import streamlit as st
-from src.models.experiment import Experiment
+from src.file_manager.excell_importer.excell_importer import ExcellImporter
+from src.helpers.tracker_store import get_tracker_store
+
+
+EMPTY_SHEET = "Sheet is empty or has fewer than 2 columns."
+NO_PLATE_FORMAT = "File does not match any known plate format."
+
+
+def sniff_workbook(file_path: str, stop_after: int | None = 1) -> dict:
+    """
+    Validate a workbook from its sheet dimensions and first column only,
+    without parsing the measurements (see ExcellImporter.sniff).
+
+    Returns:
+        dict: "filepath", "is_experiment", "plates", "plate_type" and "error" (None if valid).
+    """
+    result = {"filepath": file_path, "is_experiment": False, "plates": 0, "plate_type": None, "error": None}
+    try:
+        sniffed = ExcellImporter(file_path).sniff(stop_after=stop_after)
+        if not sniffed["rows"] or sniffed["rows"] < 2 or sniffed["columns"] < 2:
+            result["error"] = EMPTY_SHEET
+        elif not sniffed["plates"]:
+            result["error"] = NO_PLATE_FORMAT
+        else:
+            result["is_experiment"] = True
+            result["plates"] = sniffed["plates"]
+            result["plate_type"] = sniffed["plate_type"]
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def inspect_workbook(file_path: str) -> dict:
+    """
+    Validate one workbook and count its plates. Runs inside worker processes,
+    so it must stay free of Streamlit UI calls and return only plain data.
+
+    The workbook is not split here: the whole first column is scanned with
+    the same plate detection as Experiment.split_into_subdatasets, which
+    gives the same format and plate count without parsing the measurements
+    or sending DataFrames back from the workers. An import only records
+    files in the tracker; the plates are split when the Editor opens the
+    experiment.
+
+    Returns:
+        dict: "filepath", "is_experiment", "plates", "plate_type" and "error" (None if valid).
+    """
+    return sniff_workbook(file_path, stop_after=None)
 
 
 class Selector(BaseModel):
@@ -18,12 +66,14 @@ class Selector(BaseModel):
     Attributes:
         filepath (str | None): Absolute path to the selected file.
         name (str): File name without directory.
-        dataframe (pd.DataFrame | None): Loaded data if the file is validated.
+        dataframe (pd.DataFrame | None): Loaded data, if any (validation no longer parses the sheet).
+        plate_type (str | None): Plate format found by the last validation.
+        plates (int): Complete plates seen by the last validation (it stops at the first one).
         metadata (dict): Dictionary containing file system metadata (e.g., size, timestamps).
         note (str): Optional user-supplied note.
         creation_date (str): Timestamp when file was first loaded.
         last_modified (str): Timestamp of the last metadata update.
-        tracker_file (str): Path to the persistent file metadata tracker (JSON).
+        tracker_file (str): Path to the file metadata tracker; its directory selects the tracker store.
     """
 
     class Config:
@@ -35,11 +85,13 @@ class Selector(BaseModel):
     filepath: str | None = None                         # Absolute path to selected file
     name: str = ""                                      # File name without path
     dataframe: pd.DataFrame | None = None               # Loaded DataFrame if file is valid
+    plate_type: str | None = None                       # Plate format found by is_experiment
+    plates: int = 0                                     # Plates seen by is_experiment
     metadata: dict = Field(default_factory=dict)        # File metadata (size, timestamps)
     note: str = ""                                      # Optional user note
     creation_date: str = Field(default_factory=lambda: datetime.now().isoformat())  # First loaded time
     last_modified: str = Field(default_factory=lambda: datetime.now().isoformat())  # Last modified or accessed time
-    tracker_file: str = "final_LabReport/TRACKERS/file_tracker.json"  # Path to JSON tracking file
+    tracker_file: str = "final_LabReport/TRACKERS/file_tracker.json"  # Tracker location (its directory holds the store)
 
     # --------------------------
     # Instance Methods
@@ -89,10 +141,14 @@ class Selector(BaseModel):
         """
         Validates whether the selected Excel file represents a recognizable experiment.
 
+        The check sniffs the sheet dimensions and the first column in read-only
+        mode and stops at the first complete plate; the measurements are only
+        parsed later, when the experiment is opened.
+
         Validation steps:
         - File must be `.xlsx`
-        - File must load into a non-empty DataFrame with at least 2 columns
-        - File must match a known plate format (12, 24, 48, or 96 wells)
+        - Sheet must be non-empty with at least 2 columns
+        - File must match a known plate format (12 to 1536 wells)
 
         Returns:
             bool: True if file is a valid experiment, False otherwise.
@@ -101,24 +157,17 @@ class Selector(BaseModel):
         if not self.filepath or not self.filepath.endswith(".xlsx"):
             return False
 
-        try:
-            experiment = Experiment.create_experiment_from_file(self.filepath)
-            df = experiment.dataframe
-
-            if df.empty or df.shape[1] < 2:
-                return False
+        result = sniff_workbook(self.filepath)
+        self.plate_type = result["plate_type"]
+        self.plates = result["plates"]
 
-            subdatasets, plate_type = Experiment.split_into_subdatasets(df)
-            if subdatasets:
-                self.dataframe = df
-                return True
-
-            st.warning("File does not match any known plate format.")
-            return False
-
-        except Exception as e:
-            st.error(f"Error processing file: {e}")
-            return False
+        if result["is_experiment"]:
+            return True
+        if result["error"] == NO_PLATE_FORMAT:
+            st.warning(result["error"])
+        elif result["error"] != EMPTY_SHEET:
+            st.error(f"Error processing file: {result['error']}")
+        return False
 
     def save_tracker(self, extra_data: dict | None = None):
         """
@@ -140,21 +189,92 @@ class Selector(BaseModel):
         if extra_data:
             record.update(extra_data)
 
-        # Load existing tracker file if it exists
-        if os.path.exists(self.tracker_file):
-            with open(self.tracker_file, "r") as f:
-                file_data = json.load(f)
-        else:
-            file_data = {}
+        # Use the full filepath as the key; only this file's record is written
+        self._tracker_store().put("files", self.filepath, record)
+
+        st.success(f"Tracker updated for {self.filepath}")
 
-        # Use the full filepath as the dictionary key
-        file_data[self.filepath] = record
+    @staticmethod
+    def expand_batch_pattern(pattern: str) -> list[str]:
+        """
+        Resolve a folder or glob pattern into the list of .xlsx files to import.
+        Excel lock files (``~$name.xlsx``) are ignored.
+        """
+        pattern = os.path.expanduser(pattern.strip())
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.xlsx")
+        paths = glob.glob(pattern, recursive=True)
+        return sorted(
+            os.path.abspath(p) for p in paths
+            if p.endswith(".xlsx") and not os.path.basename(p).startswith("~$") and os.path.isfile(p)
+        )
+
+    def import_batch(self, pattern: str, max_workers: int | None = None, progress=None) -> dict:
+        """
+        Sniff every workbook matching `pattern` in a process pool (see
+        inspect_workbook: plate format and count, no measurements are parsed),
+        then register all valid experiments in the tracker with a single write.
+        The plates are split later, when the Editor opens the experiment.
 
-        # Write updated tracker to file
-        with open(self.tracker_file, "w") as f:
-            json.dump(file_data, f, indent=4)
+        Args:
+            pattern (str): Folder or glob pattern (e.g. "exports/2024-*/*.xlsx").
+            max_workers (int, optional): Worker processes; defaults to the CPU count.
+            progress (callable, optional): Called as progress(done, total, filepath) after each file.
 
-        st.success(f"Tracker updated for {self.filepath}")
+        Returns:
+            dict: "added" (list of paths), "skipped" (already tracked) and "failed" ({path: reason}).
+        """
+        file_data = self._read_tracker()
+
+        candidates = self.expand_batch_pattern(pattern)
+        skipped = [p for p in candidates if p in file_data]
+        pending = [p for p in candidates if p not in file_data]
+
+        results = []
+        if pending:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = {pool.submit(inspect_workbook, p): p for p in pending}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        results.append(future.result())
+                    except Exception as e:  # e.g. a worker crashed
+                        results.append({"filepath": futures[future], "is_experiment": False, "error": str(e)})
+                    if progress:
+                        progress(done, len(pending), futures[future])
+
+        added, failed = [], {}
+        now = datetime.now().isoformat()
+        for result in sorted(results, key=lambda r: r["filepath"]):
+            file_path = result["filepath"]
+            if not result["is_experiment"]:
+                failed[file_path] = result["error"]
+                continue
+            file_data[file_path] = {
+                "filepath": file_path,
+                "name": os.path.basename(file_path),
+                "metadata": self.get_file_metadata(file_path),
+                "note": "",
+                "creation_date": now,
+                "last_modified": now,
+                "is_experiment": True,
+                "plate_type": result["plate_type"],
+                "plates": result["plates"],
+            }
+            added.append(file_path)
+
+        if added:
+            self._write_tracker(file_data)
+
+        return {"added": added, "skipped": skipped, "failed": failed}
+
+    def _tracker_store(self):
+        return get_tracker_store(os.path.dirname(self.tracker_file))
+
+    def _read_tracker(self) -> dict:
+        return self._tracker_store().load("files")
+
+    def _write_tracker(self, file_data: dict):
+        self._tracker_store().save("files", file_data)
 
     def force_refresh(self):
         """
@@ -0,0 +1,138 @@
+"""
+Statistics of the cell groups of a plate, computed from the plate's current
+values rather than from the values copied into a group when it was saved.
+
+All groups of a plate are gathered with one take over the value matrix and
+summarized together on a NaN-padded (groups x cells) matrix. GroupStatistics
+keeps the last result of every group and recomputes only the groups whose
+cells or cell values changed since.
+"""
+import warnings
+import numpy as np
+from src.models.plate_layout import ROW_LABEL_INDEX, letter_to_index
+from src.models.plate_reading import PlateReading
+
+# In display order
+STAT_NAMES = [
+    "Mean", "Standard Deviation", "Coefficient of Variation", "Min", "Max",
+    "Median", "SEM", "MAD", "n",
+]
+
+NO_DATA = {"Error": "No numerical data found for statistics"}
+
+
+def batch_statistics(samples: list[np.ndarray]) -> list[dict]:
+    """
+    Statistics of several samples at once (NaNs are ignored), as dicts keyed by
+    STAT_NAMES; NO_DATA for samples without a number. Standard deviation is the
+    sample one (ddof=1), MAD the median absolute deviation from the median.
+    """
+    if not samples:
+        return []
+    width = max(len(sample) for sample in samples)
+    matrix = np.full((len(samples), max(width, 1)), np.nan)
+    for i, sample in enumerate(samples):
+        matrix[i, :len(sample)] = sample
+
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN rows and single values
+        n = np.count_nonzero(~np.isnan(matrix), axis=1)
+        mean = np.nanmean(matrix, axis=1)
+        std = np.nanstd(matrix, axis=1, ddof=1)
+        median = np.nanmedian(matrix, axis=1)
+        columns = {
+            "Mean": mean,
+            "Standard Deviation": std,
+            "Coefficient of Variation": std / mean,
+            "Min": np.nanmin(matrix, axis=1),
+            "Max": np.nanmax(matrix, axis=1),
+            "Median": median,
+            "SEM": std / np.sqrt(n),
+            "MAD": np.nanmedian(np.abs(matrix - median[:, None]), axis=1),
+        }
+
+    results = []
+    for i in range(len(samples)):
+        if n[i] == 0:
+            results.append(dict(NO_DATA))
+            continue
+        stats = {name: float(values[i]) for name, values in columns.items()}
+        stats["n"] = int(n[i])
+        results.append(stats)
+    return results
+
+
+class GroupStatistics:
+    """Current statistics of the cell groups of one plate, recomputed only for groups that changed."""
+
+    def __init__(self):
+        self._members = {}  # group name -> ((cell labels, plate columns, plate shape), flat positions)
+        self._results = {}  # group name -> (gathered values as bytes, stats)
+
+    def compute(self, plate: PlateReading, cell_groups: dict) -> dict:
+        """
+        Statistics of every group of `cell_groups` over the values of `plate`.
+
+        Returns:
+            dict: group name -> stats (see batch_statistics), in group order.
+        """
+        names = list(cell_groups)
+        for name in set(self._members) - set(names):
+            self._members.pop(name, None)
+            self._results.pop(name, None)
+        if not names:
+            return {}
+
+        positions = [self._positions(plate, name, cell_groups[name].get("cells", [])) for name in names]
+        flat = plate.values.ravel()
+        samples = np.split(flat.take(np.concatenate(positions)), np.cumsum([len(p) for p in positions])[:-1])
+
+        changed = []
+        for name, sample in zip(names, samples):
+            cached = self._results.get(name)
+            if cached is None or cached[0] != sample.tobytes():
+                changed.append((name, sample))
+        for (name, sample), stats in zip(changed, batch_statistics([sample for _, sample in changed])):
+            self._results[name] = (sample.tobytes(), stats)
+
+        return {name: self._results[name][1] for name in names}
+
+    def _positions(self, plate: PlateReading, name: str, cells: list[dict]) -> np.ndarray:
+        labels = [(cell.get("row"), cell.get("column")) for cell in cells]
+        # Positions depend on the plate's headers and shape as much as on the cells
+        key = (labels, tuple(plate.column_labels), plate.shape)
+        cached = self._members.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        n_rows, n_cols = plate.shape
+        rows = np.fromiter((_row_index(row) for row, _ in labels), dtype=np.int64, count=len(labels))
+        cols = np.fromiter((plate.column_position(column) for _, column in labels), dtype=np.int64, count=len(labels))
+        inside = (rows >= 0) & (rows < n_rows) & (cols >= 0)
+        positions = rows[inside] * n_cols + cols[inside]
+        self._members[name] = (key, positions)
+        return positions
+
+
+def group_statistics(plate: PlateReading | None, cell_groups: dict) -> dict:
+    """
+    One-off current statistics of every group (see GroupStatistics).
+    Groups keep their saved stats if there is no plate to compute them on.
+    """
+    if plate is None:
+        return {name: group.get("stats", {}) for name, group in cell_groups.items()}
+    return GroupStatistics().compute(plate, cell_groups)
+
+
+def with_current_statistics(plate: PlateReading | None, cell_groups: dict) -> dict:
+    """A copy of `cell_groups` whose "stats" are computed from `plate`."""
+    current = group_statistics(plate, cell_groups)
+    return {name: {**group, "stats": current[name]} for name, group in cell_groups.items()}
+
+
+def _row_index(label) -> int:
+    if label is None:
+        return -1
+    label = str(label).strip().upper()
+    idx = ROW_LABEL_INDEX.get(label)
+    return letter_to_index(label) if idx is None else idx
@@ -0,0 +1,158 @@
+"""
+Highlighting of grouped cells, shared by the Editor (pandas Styler) and the
+report (HTML / PDF table).
+
+The cell groups of a table are resolved once into row and column index
+arrays, which fill a (rows x columns) matrix of color indices with NumPy
+fancy indexing. Masks are cached on a hash of the groups and the table's
+shape, so redrawing a table whose groups did not change costs a hash and a lookup.
+"""
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+import numpy as np
+from src.models.plate_layout import ROW_LABEL_INDEX, letter_to_index
+
+# Fallback colors, by group position, for groups saved without one
+DEFAULT_PALETTE = [
+    "#FFB3BA", "#FFDFBA", "#FFFFBA", "#BAFFC9", "#BAE1FF",
+    "#E6B3FF", "#FFD9E6", "#C2FFAD", "#BFFCC6", "#AFCBFF",
+    "#FFE6AA", "#FFBFA3", "#F3B0C3", "#A3F7BF", "#B2F0E6",
+    "#F6E6B4", "#E0C3FC", "#FFD5CD", "#C9FFD5", "#D5F4E6",
+    "#A1EAFB", "#FFCCE5", "#D1C4E9", "#C5E1A5", "#F8BBD0",
+    "#FFF59D", "#B39DDB", "#80CBC4", "#FFAB91", "#CE93D8"
+]
+
+CACHE_SIZE = 256  # Masks kept, least recently used dropped first
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class HighlightMask:
+    """
+    Color of every cell of a table: ``index[row, column]`` is a position in
+    ``colors``, or -1 for cells no group covers. Masks are shared through
+    the cache and must not be modified.
+    """
+
+    __slots__ = ("colors", "index")
+
+    def __init__(self, colors: list[str], index: np.ndarray):
+        self.colors = colors
+        self.index = index
+
+    def color_at(self, row: int, column: int) -> str | None:
+        """Color of one cell by position, or None if it is not highlighted."""
+        idx = self.index[row, column]
+        return None if idx < 0 else self.colors[idx]
+
+    def css(self, prefix: str = "background-color: ") -> np.ndarray:
+        """Matrix of CSS declarations, "" for cells that are not highlighted."""
+        styles = np.array([""] + [f"{prefix}{color}" for color in self.colors], dtype=object)
+        return styles[self.index + 1]
+
+
+def highlight_mask(cell_groups: dict, columns, n_rows: int,
+                   default_color: str | None = None, fuzzy_columns: bool = False) -> HighlightMask:
+    """
+    The highlight mask of a table with `columns` and `n_rows` rows (RangeIndex).
+
+    Args:
+        cell_groups (dict): Groups as saved by the Editor; each has a "color" and
+            "cells", a list of {"row": <row letter or number>, "column": <label>} dicts.
+        columns: The table's column labels, compared as stripped strings.
+        n_rows (int): Number of rows of the table.
+        default_color (str | None): Color of groups saved without one; None picks
+            from DEFAULT_PALETTE by group position.
+        fuzzy_columns (bool): Also match a cell's column to the first label that
+            contains it, when no label is equal to it.
+
+    Returns:
+        HighlightMask: Later groups win where groups overlap.
+    """
+    labels = tuple(str(column).strip() for column in columns)
+    # Equal pickles mean equal groups (equal groups may rarely pickle differently: a cache miss)
+    key = (
+        hashlib.blake2b(pickle.dumps(cell_groups, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16).digest(),
+        labels, n_rows, default_color, fuzzy_columns,
+    )
+    with _cache_lock:
+        mask = _cache.get(key)
+        if mask is not None:
+            _cache.move_to_end(key)
+            return mask
+
+    mask = _build_mask(cell_groups, labels, n_rows, default_color, fuzzy_columns)
+    with _cache_lock:
+        _cache[key] = mask
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return mask
+
+
+def _build_mask(cell_groups: dict, labels: tuple, n_rows: int,
+                default_color: str | None, fuzzy_columns: bool) -> HighlightMask:
+    positions = {}
+    for j, label in enumerate(labels):
+        positions.setdefault(label, j)  # Duplicate labels: the first one
+
+    # Every cell of every group, with its labels resolved once per distinct label
+    row_of, column_of = {}, {}
+    rows, cols, owners, colors = [], [], [], []
+    for i, group in enumerate(cell_groups.values()):
+        cells = group.get("cells", [])
+        for cell in cells:
+            row, column = cell.get("row"), cell.get("column")
+            r = row_of.get(row)
+            if r is None:
+                r = row_of[row] = _row_index(row)
+            c = column_of.get(column)
+            if c is None:
+                c = column_of[column] = _column_index(column, positions, labels, fuzzy_columns)
+            rows.append(r)
+            cols.append(c)
+        owners.append(np.full(len(cells), len(colors), dtype=np.int16))
+        colors.append(group.get("color", default_color or DEFAULT_PALETTE[i % len(DEFAULT_PALETTE)]))
+
+    index = np.full((n_rows, len(labels)), -1, dtype=np.int16)
+    if rows:
+        rows, cols = np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+        owners = np.concatenate(owners)
+        inside = (rows >= 0) & (rows < n_rows) & (cols >= 0)
+        flat = (rows * len(labels) + cols)[inside]
+        owners = owners[inside]
+        # Later groups win: keep the last occurrence of every cell
+        _, last = np.unique(flat[::-1], return_index=True)
+        keep = len(flat) - 1 - last
+        index.ravel()[flat[keep]] = owners[keep]
+
+    index.setflags(write=False)
+    return HighlightMask(colors, index)
+
+
+def _row_index(label) -> int:
+    """Row position of a stored row label: a letter ("B"), or a row number."""
+    if label is None or isinstance(label, bool):
+        return -1
+    if isinstance(label, int):
+        return label
+    label = str(label).strip()
+    if label.isalpha():
+        idx = ROW_LABEL_INDEX.get(label.upper())
+        return letter_to_index(label) if idx is None else idx
+    try:
+        return int(label)
+    except ValueError:
+        return -1
+
+
+def _column_index(column, positions: dict, labels: tuple, fuzzy: bool) -> int:
+    if column is None:
+        return -1
+    column = str(column).strip()
+    j = positions.get(column, -1)
+    if j < 0 and fuzzy:
+        j = next((k for k, label in enumerate(labels) if column in label), -1)
+    return j
@@ -0,0 +1,153 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Plate formats as (rows, columns), smallest first
+PLATE_FORMATS = {
+    "12 wells": (3, 4),
+    "24 wells": (4, 6),
+    "48 wells": (6, 8),
+    "96 wells": (8, 12),
+    "384 wells": (16, 24),
+    "1536 wells": (32, 48),
+}
+
+DEFAULT_PLATE_FORMAT = "96 wells"
+DEFAULT_ROWS = PLATE_FORMATS[DEFAULT_PLATE_FORMAT][0]
+MAX_PLATE_ROWS = max(rows for rows, _ in PLATE_FORMATS.values())
+
+# A row label on its own ("B", "AF") or a well id ("B7", "AF48")
+ROW_LABEL_PATTERN = re.compile(r"^([A-Z]{1,2})\d{0,2}$")
+
+
+def index_to_letter(idx: int) -> str:
+    """Convert a 0-based row index to its Excel-style letter label (0 -> A, 26 -> AA)."""
+    letters = ""
+    while idx >= 0:
+        letters = chr(65 + (idx % 26)) + letters
+        idx = (idx // 26) - 1
+    return letters
+
+
+def letter_to_index(label: str) -> int:
+    """Inverse of index_to_letter ("A" -> 0, "AA" -> 26). Returns -1 for anything else."""
+    label = str(label).strip().upper()
+    if not label.isalpha() or not label.isascii():
+        return -1
+    idx = 0
+    for char in label:
+        idx = idx * 26 + (ord(char) - 64)
+    return idx - 1
+
+
+# Precomputed row-label index covering every row of the largest plate
+ROW_LABEL_INDEX = {index_to_letter(i): i for i in range(MAX_PLATE_ROWS)}
+
+# Row labels per plate format, e.g. "96 wells" -> ["A", ..., "H"]
+PLATE_ROW_LABELS = {
+    name: [index_to_letter(i) for i in range(rows)] for name, (rows, _) in PLATE_FORMATS.items()
+}
+
+
+def row_index_of(label) -> int:
+    """
+    Plate row index of a first-column cell, or -1 if it is not a row label.
+    """
+    match = ROW_LABEL_PATTERN.match(str(label).strip())
+    if match is None:
+        return -1
+    return ROW_LABEL_INDEX.get(match.group(1), -1)
+
+
+def row_codes(first_column: pd.Series) -> np.ndarray:
+    """
+    Row index (or -1) for every cell of a sheet's first column.
+
+    The column is factorized first, so label parsing runs once per distinct
+    value; the per-row work is a single integer gather.
+    """
+    codes, uniques = pd.factorize(first_column.to_numpy(dtype=object), use_na_sentinel=False)
+    if len(uniques) == 0:
+        return np.empty(0, dtype=np.int16)
+    unique_rows = np.fromiter((row_index_of(v) for v in uniques), dtype=np.int16, count=len(uniques))
+    return unique_rows[codes]
+
+
+def detect_plate_format(codes: np.ndarray) -> str | None:
+    """
+    Plate format of a sheet from the row codes of its first column, or None if
+    there are no row labels.
+
+    Formats larger than 96 wells are only picked when a full run of their rows
+    (A..P, A..AF) occurs in order, so isolated labels such as a "T0" sample name
+    cannot promote the sheet. Otherwise the smallest format holding the row
+    labels A..H seen is used, and labels past H are ignored.
+    """
+    run = longest_row_run(codes)
+    for name, (n_rows, _) in reversed(PLATE_FORMATS.items()):
+        if n_rows <= DEFAULT_ROWS:
+            break
+        if run >= n_rows:
+            return name
+    small = codes[(codes >= 0) & (codes < DEFAULT_ROWS)]
+    if small.size == 0:
+        return None
+    return plate_format_for_max_row(int(small.max()))
+
+
+def longest_row_run(codes: np.ndarray) -> int:
+    """Length of the longest run of consecutive row codes starting at A (0, 1, 2, ...)."""
+    labels = codes[codes >= 0]  # Rows without a label do not break a run
+    if labels.size == 0:
+        return 0
+    breaks = np.concatenate(([True], labels[1:] != labels[:-1] + 1))
+    lengths = np.diff(np.append(np.flatnonzero(breaks), labels.size))
+    from_a = labels[breaks] == 0
+    return int(lengths[from_a].max()) if from_a.any() else 0
+
+
+def plate_format_for_max_row(max_row: int) -> str | None:
+    """Smallest plate format with more than `max_row` rows."""
+    if max_row < 0:
+        return None
+    for name, (n_rows, _) in PLATE_FORMATS.items():
+        if max_row < n_rows:
+            return name
+    return None
+
+
+def find_plate_blocks(codes: np.ndarray, n_rows: int) -> list[np.ndarray]:
+    """
+    Locate every plate from the row codes of the first column.
+
+    The first row label opens a block, the last one closes it, and rows in
+    between are kept only while a block is open. A closing row with no open
+    block becomes a block of its own.
+
+    Returns:
+        list of integer row-position arrays, one per plate, in sheet order
+    """
+    if codes.size == 0:
+        return []
+
+    is_start = codes == 0
+    is_end = codes == n_rows - 1
+    is_member = (codes > 0) & (codes < n_rows - 1)
+
+    # Whether a block is open *before* each row: forward-fill the last start/end event
+    events = np.where(is_start, 1, np.where(is_end, 0, -1))
+    last_event_at = np.maximum.accumulate(np.where(events >= 0, np.arange(codes.size), -1))
+    is_open_after = np.where(last_event_at >= 0, events[np.maximum(last_event_at, 0)] == 1, False)
+    is_open = np.concatenate(([False], is_open_after[:-1]))
+
+    keep = is_start | is_end | (is_member & is_open)
+
+    # Each start row begins a block; so does the first row after an end row
+    after_end = np.concatenate(([False], is_end[:-1]))
+    block_ids = np.cumsum(is_start | after_end)
+
+    positions = np.flatnonzero(keep)
+    if positions.size == 0:
+        return []
+    cuts = np.flatnonzero(np.diff(block_ids[positions])) + 1
+    return np.split(positions, cuts)
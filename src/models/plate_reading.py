@@ -0,0 +1,278 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from src.models.plate_layout import letter_to_index
+
+# Stored subdatasets carry this tag; anything else is read as legacy records
+STORED_FORMAT = "plate"
+
+
+class PlateReading:
+    """
+    Dense, typed representation of one plate (sub-dataset).
+
+    Numeric cells live in a single (rows x columns) float matrix, the first
+    sheet column is kept as the row-label array and the remaining headers as
+    the column-label array. The rare non-numeric cells (e.g. "OVRFLW") are
+    kept in a small ``text`` map so that nothing is lost on the way back to
+    a DataFrame.
+    """
+
+    __slots__ = ("values", "row_labels", "column_labels", "label_column", "text")
+
+    def __init__(self, values: np.ndarray, row_labels: np.ndarray, column_labels: list,
+                 label_column="Well", text: dict | None = None):
+        self.values = values
+        self.row_labels = row_labels
+        self.column_labels = list(column_labels)
+        self.label_column = label_column
+        self.text = text or {}
+
+    # ---- CONSTRUCTION ----
+    @classmethod
+    def from_frame(cls, df: DataFrame, dtype=np.float64) -> 'PlateReading':
+        """
+        Build a PlateReading from a sub-dataset DataFrame whose first column holds the row labels.
+        """
+        if df.shape[1] == 0:
+            return cls(np.empty((len(df), 0), dtype=dtype), np.empty(len(df), dtype=object), [], None)
+
+        row_labels = df.iloc[:, 0].to_numpy(dtype=object)
+        body = df.iloc[:, 1:]
+        values = np.empty(body.shape, dtype=dtype)
+        text = {}
+        for j in range(body.shape[1]):
+            column = body.iloc[:, j]
+            numeric = pd.to_numeric(column, errors="coerce")
+            values[:, j] = numeric.to_numpy(dtype=dtype, na_value=np.nan)
+            # Cells that held something other than a number
+            for i in np.flatnonzero(numeric.isna().to_numpy() & column.notna().to_numpy()):
+                text[(int(i), j)] = str(column.iat[i])
+
+        return cls(values, row_labels, list(body.columns), df.columns[0], text)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PlateReading':
+        """Inverse of to_dict."""
+        dtype = np.dtype(data.get("dtype", "float64"))
+        columns = data.get("columns", [])
+        values = np.array(
+            [[np.nan if v is None else v for v in row] for row in data.get("values", [])],
+            dtype=dtype,
+        ).reshape(len(data.get("rows", [])), len(columns))
+        text = {(int(i), int(j)): s for i, j, s in data.get("text", [])}
+        return cls(values, np.array(data.get("rows", []), dtype=object), columns,
+                   data.get("label_column"), text)
+
+    @classmethod
+    def load(cls, stored) -> 'PlateReading | None':
+        """
+        Read a stored sub-dataset, either the compact dict written by to_dict or
+        legacy ``to_dict(orient="records")`` output. Returns None if nothing is stored.
+        """
+        if not stored:
+            return None
+        if isinstance(stored, dict) and stored.get("format") == STORED_FORMAT:
+            return cls.from_dict(stored)
+        return cls.from_frame(pd.DataFrame(stored))
+
+    # ---- CONVERSION ----
+    def to_frame(self) -> DataFrame:
+        """Rebuild the sub-dataset DataFrame (label column first, fresh RangeIndex)."""
+        if self.label_column is None:
+            return pd.DataFrame(index=range(len(self.row_labels)))
+
+        data = {0: self.row_labels}
+        text_columns = {j for _, j in self.text}
+        for j in range(len(self.column_labels)):
+            column = self.values[:, j]
+            if j in text_columns:
+                column = column.astype(object)
+                for (i, tj), s in self.text.items():
+                    if tj == j:
+                        column[i] = s
+            data[j + 1] = column
+
+        # Build by position so duplicate column labels survive
+        df = DataFrame(data)
+        df.columns = [self.label_column] + self.column_labels
+        return df
+
+    def to_dict(self) -> dict:
+        """
+        JSON-ready form: one label per row and column plus a nested value
+        list, instead of repeating every column name in every row.
+        """
+        values = self.values.astype(object)
+        values[np.isnan(self.values)] = None
+        return {
+            "format": STORED_FORMAT,
+            "dtype": self.values.dtype.name,
+            "label_column": self.label_column,
+            "columns": self.column_labels,
+            "rows": [None if pd.isna(r) else r for r in self.row_labels.tolist()],
+            "values": values.tolist(),
+            "text": [[i, j, s] for (i, j), s in sorted(self.text.items())],
+        }
+
+    # ---- ACCESS ----
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the value matrix and label arrays."""
+        return self.values.nbytes + self.row_labels.nbytes
+
+    def __len__(self) -> int:
+        return len(self.row_labels)
+
+    def __repr__(self) -> str:
+        rows, cols = self.shape
+        return f"PlateReading({rows}x{cols}, dtype={self.values.dtype})"
+
+    def column_position(self, column) -> int:
+        """Position of a column label in the value matrix, or -1."""
+        try:
+            return self.column_labels.index(column)
+        except ValueError:
+            return -1
+
+    def cell(self, row: int, column: int):
+        """JSON-ready value of one cell by DataFrame position (column 0 is the label column)."""
+        if column == 0:
+            label = self.row_labels[row]
+            if pd.isna(label):
+                return None
+            return label.item() if isinstance(label, np.generic) else label
+        text = self.text.get((row, column - 1))
+        if text is not None:
+            return text
+        value = self.values[row, column - 1]
+        return None if np.isnan(value) else value.item()
+
+    # ---- PATCHES ----
+    def diff(self, other: 'PlateReading') -> list[dict] | None:
+        """
+        Cell-level patch set turning this plate into `other`, as
+        {"row", "column", "old", "new"} dicts with DataFrame positions.
+        Returns None if the shapes differ (no cell-level patch is possible).
+        """
+        if other.shape != self.shape:
+            return None
+
+        a, b = self.values, other.values
+        changed = ~((a == b) | (np.isnan(a) & np.isnan(b)))
+        cells = {(int(i), int(j) + 1) for i, j in zip(*np.nonzero(changed))}
+        for key in self.text.keys() | other.text.keys():
+            if self.text.get(key) != other.text.get(key):
+                cells.add((key[0], key[1] + 1))
+        for i in range(len(self)):
+            if self.cell(i, 0) != other.cell(i, 0):
+                cells.add((i, 0))
+
+        return [
+            {"row": i, "column": c, "old": self.cell(i, c), "new": other.cell(i, c)}
+            for i, c in sorted(cells)
+        ]
+
+    def apply_patches(self, patches: list[dict]) -> 'PlateReading':
+        """New PlateReading with a patch set (see diff) applied; this plate is left untouched."""
+        plate = PlateReading(self.values.copy(), self.row_labels.copy(), self.column_labels,
+                             self.label_column, dict(self.text))
+        for patch in patches:
+            plate.set_cell(int(patch["row"]), int(patch["column"]), patch.get("new"))
+        return plate
+
+    def set_cell(self, row: int, column: int, value):
+        """Set one cell in place, by DataFrame position (column 0 is the label column)."""
+        if column == 0:
+            self.row_labels[row] = np.nan if value is None else value
+            return
+        value = cell_input(value)
+        self.text.pop((row, column - 1), None)
+        if isinstance(value, str):
+            self.text[(row, column - 1)] = value
+            self.values[row, column - 1] = np.nan
+        else:
+            self.values[row, column - 1] = np.nan if value is None else value
+
+    def cell_values(self, cells: list[dict]) -> np.ndarray:
+        """
+        Numeric values of selected cells, given as {"row": "B", "column": ...}
+        dicts as stored in the cell groups. Cells that are missing or not
+        numeric are skipped.
+        """
+        rows = np.fromiter((letter_to_index(c.get("row", "")) for c in cells), dtype=np.int64, count=len(cells))
+        cols = np.fromiter((self.column_position(c.get("column")) for c in cells), dtype=np.int64, count=len(cells))
+        inside = (rows >= 0) & (rows < self.values.shape[0]) & (cols >= 0)
+        picked = self.values[rows[inside], cols[inside]]
+        return picked[~np.isnan(picked)]
+
+
+def cell_input(value):
+    """
+    A value typed into a data cell, read the way from_frame reads a column:
+    numbers stay numbers, numeric text becomes a number, empty cells None.
+    """
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return value
+    if isinstance(value, (int, float, np.number)):
+        return None if np.isnan(value) else value.item() if isinstance(value, np.generic) else value
+    return value
+
+
+def as_frame(stored) -> DataFrame:
+    """DataFrame view of a stored sub-dataset (compact or legacy records); empty if none."""
+    plate = PlateReading.load(stored)
+    return plate.to_frame() if plate is not None else pd.DataFrame()
+
+
+# ---- EDITOR TRACKER ENTRIES ----
+# A sub-dataset entry stores the plate once, as "index_subdataset_original", and the
+# user's edits as a "patches" list (see PlateReading.diff). Older entries instead hold
+# the whole edited plate as "index_subdataset".
+
+def modified_plate(sub_data: dict) -> 'PlateReading | None':
+    """The edited plate of a sub-dataset entry, materialized from its patch set."""
+    if "patches" not in sub_data:
+        return PlateReading.load(sub_data.get("index_subdataset"))
+    original = PlateReading.load(sub_data.get("index_subdataset_original"))
+    if original is None:
+        return None
+    return original.apply_patches(sub_data["patches"]) if sub_data["patches"] else original
+
+
+def modified_frame(sub_data: dict) -> DataFrame:
+    """DataFrame view of the edited plate of a sub-dataset entry; empty if none."""
+    plate = modified_plate(sub_data)
+    return plate.to_frame() if plate is not None else pd.DataFrame()
+
+
+def patch_cells(original: PlateReading, patches: list[dict], cells: dict) -> list[dict]:
+    """
+    A patch set with single cells ({(row, column): value}, DataFrame positions)
+    changed on top, without materializing any plate. Cells set back to their
+    original value lose their patch.
+    """
+    merged = {(p["row"], p["column"]): p for p in patches}
+    for (row, column), value in cells.items():
+        old, new = original.cell(row, column), value if column == 0 else cell_input(value)
+        if new == old:
+            merged.pop((row, column), None)
+        else:
+            merged[(row, column)] = {"row": row, "column": column, "old": old, "new": new}
+    return [merged[cell] for cell in sorted(merged)]
+
+
+def has_edits(sub_data: dict) -> bool:
+    """Whether the user changed any cell of a sub-dataset entry."""
+    if "patches" in sub_data:
+        return bool(sub_data["patches"])
+    return sub_data.get("index_subdataset") != sub_data.get("index_subdataset_original")
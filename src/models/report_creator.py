@@ -7,6 +7,9 @@ from weasyprint import HTML
 import datetime
 import re
 import html as _html
+from src.models.highlight import highlight_mask
+from src.models.plate_reading import as_frame
+from src.helpers.tracker_store import get_tracker_store
 
 
 class ExperimentReportManager:
@@ -27,9 +30,10 @@ class ExperimentReportManager:
             report_metadata_file (str): Path to the report metadata tracker JSON file.
         """
 
-        # File paths to tracker JSON files
+        # Tracker locations; their directory selects the tracker store
         self.tracker_file = tracker_file
         self.report_metadata_file = report_metadata_file
+        self.tracker_store = get_tracker_store(os.path.dirname(report_metadata_file))
         self.editor_data = {}
         self.report_data = {}
 
@@ -85,6 +89,77 @@ class ExperimentReportManager:
             st.error(f"An error occurred while saving {os.path.basename(target_path)}: {e}")
 
 
+    # === Tracker Methods ===
+
+    def list_experiments(self):
+        """
+        Experiments the Editor tracker holds entries for, without reading the entries.
+
+        Returns:
+            list[str]: Experiment paths, or an empty list if the tracker cannot be read.
+        """
+        try:
+            return self.tracker_store.tracked_paths("editor")
+        except Exception as e:
+            st.error(f"Unexpected error loading the editor tracker: {e}")
+            return []
+
+    def load_editor_entry(self, experiment):
+        """
+        Loads the Editor tracker entry of one experiment (only that one is read).
+
+        Returns:
+            dict: Sub-datasets, edits and groups of the experiment, or empty dictionary.
+        """
+        try:
+            return self.tracker_store.load_entry("editor", experiment) or {}
+        except Exception as e:
+            st.error(f"Unexpected error loading the editor tracker: {e}")
+            return {}
+
+    def load_report_entry(self, experiment):
+        """
+        Loads the report metadata of one experiment.
+
+        Returns:
+            dict: General and sub-dataset metadata of the experiment, or empty dictionary.
+        """
+        try:
+            return self.tracker_store.load_entry("report", experiment) or {}
+        except Exception as e:
+            st.error(f"Unexpected error loading the report metadata tracker: {e}")
+            return {}
+
+    def save_report_entry(self, experiment, entry):
+        """
+        Saves the report metadata of one experiment; the other experiments are not rewritten.
+
+        Args:
+            experiment (str): Experiment path.
+            entry (dict): General and sub-dataset metadata of the experiment.
+        """
+        try:
+            self.tracker_store.put("report", experiment, entry)
+        except TypeError as e:
+            st.error(f"Serialization error saving report metadata: {e}")
+            st.json(entry)
+        except Exception as e:
+            st.error(f"An error occurred while saving report metadata: {e}")
+
+    def load_report_data(self):
+        """
+        Loads the report metadata tracker.
+
+        Returns:
+            dict: Report metadata per experiment, or empty dictionary if it cannot be read.
+        """
+        try:
+            return self.tracker_store.load("report")
+        except Exception as e:
+            st.error(f"Unexpected error loading the report metadata tracker: {e}")
+            return {}
+
+
     # === Display Methods ===
 
     def run(self):
@@ -104,8 +179,7 @@ class ExperimentReportManager:
             st.session_state.selected_experiment_key_for_report = None
 
         # experiment_keys = list(self.editor_data.keys())
-        editor_data = self.load_json_file(self.tracker_file)
-        experiment_keys = list(editor_data.keys())
+        experiment_keys = self.list_experiments()
 
         initial_select_index = 0
 
@@ -202,44 +276,9 @@ class ExperimentReportManager:
             return "<p>No data available.</p>"
 
         try:
-            base_df = base_df.reset_index(drop=True).copy()
-            highlight_map = {}  # (row_idx:int, col_label:str) -> color hex
-
-            for gname, ginfo in groups.items():
-                color = ginfo.get("color", "#FFDDAA")
-                for cell in ginfo.get("cells", []):
-                    row_label = cell.get("row")
-                    col_label = cell.get("column")
-                    if row_label is None or col_label is None:
-                        continue
-                    try:
-                        # Convert row label
-                        if isinstance(row_label, int):
-                            r_idx = int(row_label)
-                        else:
-                            r_label_str = str(row_label).strip()
-                            if len(r_label_str) == 1 and r_label_str.isalpha():
-                                r_idx = ord(r_label_str.upper()) - 65
-                            else:
-                                if r_label_str in base_df.index.astype(str).tolist():
-                                    r_idx = int(base_df.index.astype(str).tolist().index(r_label_str))
-                                else:
-                                    try:
-                                        r_idx = int(r_label_str)
-                                    except Exception:
-                                        continue
-
-                        # Match column name
-                        c_label = str(col_label).strip()
-                        matching_cols = [c for c in map(str, base_df.columns) if c.strip() == c_label]
-                        if not matching_cols:
-                            matching_cols = [c for c in map(str, base_df.columns) if c_label in c]
-
-                        if matching_cols and 0 <= r_idx < len(base_df):
-                            col_actual = matching_cols[0]
-                            highlight_map[(r_idx, col_actual)] = color
-                    except Exception:
-                        continue
+            base_df = base_df.reset_index(drop=True)
+            mask = highlight_mask(groups, base_df.columns, len(base_df),
+                                  default_color="#FFDDAA", fuzzy_columns=True)
 
             # Build HTML table manually
             table_html = "<table class='dataframe'><thead><tr>"
@@ -247,16 +286,15 @@ class ExperimentReportManager:
                 table_html += f"<th>{self._escape_html(str(col))}</th>"
             table_html += "</tr></thead><tbody>"
 
-            for i, row in base_df.iterrows():
+            for i, row in enumerate(base_df.itertuples(index=False, name=None)):
                 table_html += "<tr>"
-                for col in base_df.columns:
-                    cell_value = row[col]
+                for j, cell_value in enumerate(row):
                     cell_text = self._escape_html("" if pd.isna(cell_value) else str(cell_value))
                     if cell_text == "":
                         cell_text = "&nbsp;"  # render empty cell visibly
 
-                    if (i, str(col)) in highlight_map:
-                        color = highlight_map[(i, str(col))]
+                    color = mask.color_at(i, j)
+                    if color is not None:
                         table_html += f"<td><span style='background-color:{color};'>{cell_text}</span></td>"
                     else:
                         table_html += f"<td>{cell_text}</td>"
@@ -276,14 +314,14 @@ class ExperimentReportManager:
 
         Args:
             title (str): Title displayed above the expander.
-            data (dict or list): Data to convert to a DataFrame.
+            data (dict or list): Stored sub-dataset (compact plate dict or records) to convert to a DataFrame.
 
         Returns:
             pd.DataFrame: The displayed DataFrame, or empty DataFrame if input is empty.
         """
 
         if data:
-            df = pd.DataFrame(data)
+            df = as_frame(data)
             with st.markdown(f"📊 {title}"):
                 st.dataframe(df)
             return df
@@ -443,6 +481,8 @@ class ExperimentReportManager:
                 - "original_df": original pandas DataFrame
                 - "modified_df": modified pandas DataFrame
                 - "cell_groups": dict of group statistics and cells
+                - "patches" (optional): the sub-dataset's cell patch set; when given,
+                  the sub-dataset counts as modified iff it is not empty
 
             experiment_metadata (dict, optional): Dictionary of general experiment-level metadata.
 
@@ -521,7 +561,9 @@ class ExperimentReportManager:
             html += f"<h3>Original Subdataset {idx + 1}</h3>"
             html += orig_df.to_html(index=False, escape=False, classes='dataframe') if not orig_df.empty else "<p>No data.</p>"
 
-            has_been_modified = not orig_df.equals(mod_df)
+            # Sub-datasets stored as a patch set are modified iff the set is not empty
+            patches = sub.get("patches")
+            has_been_modified = bool(patches) if patches is not None else not orig_df.equals(mod_df)
 
 
             # --- Conditional logic ---
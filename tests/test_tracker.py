@@ -1,5 +1,7 @@
 import os
+import re
 import json
+import zipfile
 import pytest
 import pandas as pd
 import streamlit as st
@@ -7,9 +9,23 @@ from datetime import datetime
 from unittest import mock
 
 # Import the classes from your src/models directory
+from src.file_manager.excell_importer.excell_importer import ExcellImporter
 from src.models.editorial import Editor
-from src.models.experiment import Experiment, PLATE_ROW_RANGES
+from src.models.experiment import Experiment, LazyExperiment, PLATE_ROW_RANGES
 from src.models.report_creator import ExperimentReportManager
+from src.helpers.parse_cache import ParseCache
+from src.helpers.figure_cache import FigureCache
+from src.helpers.tracker_codec import TrackerSerializer
+from src.helpers.tracker_store import (
+    CachedTrackerStore, JournalTrackerStore, JsonTrackerStore, ShardedTrackerStore, SqliteTrackerStore,
+    get_tracker_store, open_tracker_store
+)
+from src.models.file_selector import Selector
+from src.models.edit_history import EditHistory
+from src.models.highlight import DEFAULT_PALETTE, highlight_mask
+from src.models.group_stats import GroupStatistics, STAT_NAMES
+from src.models.cell_selection import SelectionError, select_cells
+from src.models.plate_reading import PlateReading, as_frame, has_edits, modified_frame
 
 # --- Fixtures for common test setup ---
 
@@ -132,6 +148,78 @@ def test_experiment_save_and_load(tmp_path, sample_excel_file):
     assert loaded_exp.last_modified != exp.creation_date # last_modified should be updated on save
 
 
+def test_experiment_save_binary_sidecar_and_legacy_json(tmp_path, sample_excel_file):
+    """Test the binary sidecar layout, reading legacy JSON files, and migrating them."""
+    from src.helpers.migrate_experiments import migrate_experiments
+
+    exp = Experiment.create_experiment_from_file(sample_excel_file)
+    exp.filepath = str(tmp_path / "binary_experiment.json")
+    exp.save()
+
+    with open(exp.filepath) as f:
+        sidecar = json.load(f)
+    assert sidecar["storage"] == "npy"
+    assert isinstance(sidecar["dataframe"], dict) # Layout only, no embedded data
+    assert os.path.isdir(tmp_path / "binary_experiment.data")
+    pd.testing.assert_frame_equal(Experiment.load(exp.filepath).dataframe, exp.dataframe)
+
+    legacy = Experiment.create_experiment_from_file(sample_excel_file)
+    legacy.filepath = str(tmp_path / "legacy_experiment.json")
+    legacy.save(storage="json")
+    assert Experiment.is_legacy_file(legacy.filepath)
+    pd.testing.assert_frame_equal(Experiment.load(legacy.filepath).dataframe, legacy.dataframe)
+
+    assert migrate_experiments(str(tmp_path)) == [legacy.filepath]
+    assert not Experiment.is_legacy_file(legacy.filepath)
+    migrated = Experiment.load(legacy.filepath)
+    assert migrated.last_modified == legacy.last_modified # Migration keeps timestamps
+    pd.testing.assert_frame_equal(migrated.dataframe, legacy.dataframe)
+
+
+def test_experiment_binary_sidecar_keeps_timestamps(tmp_path):
+    """Test that dates and times in object and datetime columns round-trip as such, not as strings."""
+    import datetime as dt
+    df = pd.DataFrame({
+        "Well": ["Read time", "A", "B"],
+        "1": [pd.Timestamp("2023-03-08 14:05:09.5"), 1.5, None],
+        "2": [dt.time(0, 30), dt.date(2023, 3, 8), pd.Timedelta(minutes=90)],
+        "Read at": pd.to_datetime(["2023-03-08 14:05", "2023-03-08 14:35", None]),
+    })
+    exp = Experiment(name="kinetic", dataframe=df, filepath=str(tmp_path / "kinetic.json"))
+    exp.save()
+
+    loaded = Experiment.load(exp.filepath).dataframe
+    pd.testing.assert_frame_equal(loaded, df)
+    assert isinstance(loaded["1"][0], pd.Timestamp) and isinstance(loaded["2"][0], dt.time)
+
+
+def test_lazy_experiment_metadata_only(tmp_path):
+    """Test that a LazyExperiment defers data loading and renames without rewriting data."""
+    labels = ["1h", "A", "B", "C", "D", "E", "F", "G", "H", "2h", "A", "B", "C", "D", "E", "F", "G", "H"]
+    df = pd.DataFrame({"Well": labels, "Value": [float(i) for i in range(len(labels))]})
+    exp = Experiment(name="lazy", dataframe=df, filepath=str(tmp_path / "lazy.json"))
+    exp.save()
+
+    data_file = next((tmp_path / "lazy.data").glob("block_*.npy"))
+    data_mtime = os.stat(data_file).st_mtime_ns
+
+    lazy = LazyExperiment.open(exp.filepath)
+    assert lazy.name == "lazy" and not lazy.is_loaded
+
+    assert lazy.plate_count == 2
+    pd.testing.assert_frame_equal(lazy.plate(1), df.iloc[10:18])
+    assert not lazy.is_loaded # Single plates do not materialize the full frame
+
+    lazy.rename("renamed")
+    lazy.update_note("checked")
+    assert os.path.exists(tmp_path / "renamed.json") and not os.path.exists(tmp_path / "lazy.json")
+    assert os.stat(tmp_path / "renamed.data" / data_file.name).st_mtime_ns == data_mtime
+
+    [listed] = LazyExperiment.scan(str(tmp_path))
+    assert (listed.name, listed.note) == ("renamed", "checked")
+    pd.testing.assert_frame_equal(listed.dataframe, df)
+
+
 def test_experiment_split_into_subdatasets_96_wells(sample_excel_file_96_wells):
     """Test splitting a 96-well plate into subdatasets."""
     exp = Experiment.create_experiment_from_file(sample_excel_file_96_wells)
@@ -168,8 +256,732 @@ def test_experiment_split_into_subdatasets_empty_df():
     assert valid_rows == PLATE_ROW_RANGES["96 wells"] # Default if no rows found
 
 
+def test_experiment_split_into_subdatasets_stacked_plates():
+    """Test that stacked plates are split on their boundaries and keep numeric dtypes."""
+    labels = ["gain70", "1h", "A", "B", "C", "D", "E", "F", "G", "H", None,
+              "2h", "A", "B", "average", "C", "D", "E", "F", "G", "H"]
+    df = pd.DataFrame({"Well": labels, "Value": [float(i) for i in range(len(labels))]})
+
+    subdatasets, valid_rows = Experiment.split_into_subdatasets(df)
+
+    assert valid_rows == PLATE_ROW_RANGES["96 wells"]
+    assert len(subdatasets) == 2
+    assert list(subdatasets[0]["Well"]) == list("ABCDEFGH")
+    assert list(subdatasets[1]["Well"]) == list("ABCDEFGH") # "average" row is skipped
+    assert list(subdatasets[0].index) == list(range(2, 10)) # Original row labels are kept
+    assert subdatasets[1]["Value"].dtype == float
+
+
+def test_experiment_split_into_subdatasets_high_density_plates():
+    """Test that 384 and 1536 well plates are detected from their row labels."""
+    rows_1536 = PLATE_ROW_RANGES["1536 wells"]
+    labels = ["t0"] + rows_1536 + ["t1"] + rows_1536
+    df = pd.DataFrame({"Well": labels, "Value": range(len(labels))})
+
+    subdatasets, valid_rows = Experiment.split_into_subdatasets(df)
+
+    assert valid_rows[-1] == "AF"
+    assert len(subdatasets) == 2
+    assert list(subdatasets[1]["Well"]) == rows_1536
+
+    df_384 = pd.DataFrame({"Well": PLATE_ROW_RANGES["384 wells"], "Value": range(16)})
+    subdatasets, valid_rows = Experiment.split_into_subdatasets(df_384)
+    assert valid_rows == PLATE_ROW_RANGES["384 wells"]
+    assert len(subdatasets) == 1
+
+
+def test_experiment_split_ignores_timepoint_labels_between_plates(tmp_path):
+    """Test that labels such as "T0" between plates do not promote the sheet to a larger format."""
+    rows = PLATE_ROW_RANGES["96 wells"]
+    labels = ["T0"] + rows + ["T24"] + rows + ["Z"]
+    df = pd.DataFrame({"Well": labels, "Value": range(len(labels))})
+
+    subdatasets, valid_rows = Experiment.split_into_subdatasets(df)
+    assert valid_rows == rows
+    assert [len(sub) for sub in subdatasets] == [8, 8]
+
+    file_path = tmp_path / "timepoints.xlsx"
+    df.to_excel(file_path, index=False)
+    streamed, streamed_rows = Experiment.stream_subdatasets_from_file(str(file_path))
+    assert (streamed_rows, len(streamed)) == (rows, 2)
+    selector = Selector(filepath=str(file_path))
+    assert selector.is_experiment()
+    assert selector.plate_type == "96 wells"
+
+
+def test_experiment_stream_subdatasets_matches_split(sample_excel_file_96_wells):
+    """Test that the streaming importer yields the same plates as read_excel + split."""
+    exp = Experiment.create_experiment_from_file(sample_excel_file_96_wells)
+    expected, expected_rows = Experiment.split_into_subdatasets(exp.dataframe)
+
+    streamed, streamed_rows = Experiment.stream_subdatasets_from_file(sample_excel_file_96_wells)
+
+    assert streamed_rows == expected_rows
+    assert len(streamed) == len(expected)
+    for got, want in zip(streamed, expected):
+        pd.testing.assert_frame_equal(got, want, check_dtype=False)
+
+
+def test_experiment_import_appended_subdatasets(tmp_path):
+    """Test that a re-import only reads plates appended since the last one, plus a still-open plate."""
+    rows = PLATE_ROW_RANGES["12 wells"]
+    file_path = tmp_path / "kinetic.xlsx"
+
+    def write(labels):
+        pd.DataFrame({"Well": labels, "1": range(len(labels))}).to_excel(file_path, index=False)
+
+    write(["t0"] + rows + ["t1"] + rows[:2]) # Second plate still being written
+    start, plates, state = Experiment.import_appended_subdatasets(str(file_path))
+    assert (start, len(plates), state["plates"]) == (0, 2, 1)
+
+    assert Experiment.import_appended_subdatasets(str(file_path), state)[1] == [] # Unchanged file
+
+    write(["t0"] + rows + ["t1"] + rows + ["t2"] + rows)
+    start, plates, state = Experiment.import_appended_subdatasets(str(file_path), state)
+    assert (start, len(plates), state["plates"]) == (1, 2, 3)
+    assert list(plates[0]["Well"]) == rows
+    assert list(plates[1].index) == [9, 10, 11] # Sheet positions are kept
+
+
+# --- Tests for src.models.plate_reading.py (PlateReading class) ---
+
+def test_plate_reading_round_trip_and_legacy_records():
+    """Test that a plate survives the compact dict form and that legacy records still load."""
+    df = pd.DataFrame({"Well": ["A", "B", "C"], "1": [1.5, None, 3.0], "2": [4.0, "OVRFLW", 6.0]})
+
+    plate = PlateReading.from_frame(df)
+    assert plate.shape == (3, 2)
+    assert plate.text == {(1, 1): "OVRFLW"}
+
+    stored = json.loads(json.dumps(plate.to_dict()))
+    pd.testing.assert_frame_equal(PlateReading.load(stored).to_frame(), df, check_dtype=False)
+    pd.testing.assert_frame_equal(as_frame(df.to_dict(orient="records")), df, check_dtype=False)
+    assert as_frame(None).empty
+
+    cells = [{"row": "A", "column": "1"}, {"row": "B", "column": "1"}, {"row": "C", "column": "2"}]
+    assert plate.cell_values(cells).tolist() == [1.5, 6.0]
+
+
+def test_plate_reading_patch_set_round_trip():
+    """Test that edits are stored as a cell-level patch set and materialized back on demand."""
+    original = PlateReading.from_frame(pd.DataFrame({"Well": ["A", "B"], "1": [1.0, 2.0], "2": [3.0, None]}))
+    edited_df = pd.DataFrame({"Well": ["A", "B"], "1": [1.0, 5.0], "2": ["OVRFLW", None]})
+
+    patches = original.diff(PlateReading.from_frame(edited_df))
+    assert patches == [
+        {"row": 0, "column": 2, "old": 3.0, "new": "OVRFLW"},
+        {"row": 1, "column": 1, "old": 2.0, "new": 5.0},
+    ]
+    sub_data = json.loads(json.dumps({"index_subdataset_original": original.to_dict(), "patches": patches}))
+    assert has_edits(sub_data)
+    pd.testing.assert_frame_equal(modified_frame(sub_data), edited_df, check_dtype=False)
+
+    assert original.diff(original) == [] and not has_edits({**sub_data, "patches": []})
+    assert original.diff(PlateReading.from_frame(edited_df.iloc[:1])) is None
+
+
+# --- Tests for src.models.edit_history.py (EditHistory class) ---
+
+def test_edit_history_undo_redo_and_time_travel():
+    """Test that each step keeps only the cells it changed and any step can be restored."""
+    def patch(row, column, new):
+        return {"row": row, "column": column, "old": 0.0, "new": new}
+
+    history = EditHistory()
+    first = [patch(0, 1, 5.0)]
+    second = first + [patch(3, 2, 7.0)]
+    third = [patch(0, 1, 6.0), patch(3, 2, 7.0)]
+    assert history.record(first) and history.record(second) and history.record(third)
+    assert not history.record(third)  # Unchanged: no step
+    assert history.step_sizes() == [1, 1, 1]
+    assert history.patches()[1] is third[1]  # Unchanged patches are shared, not copied
+
+    assert history.undo() == second and history.undo() == first
+    assert history.redo() == second
+    assert history.goto(0) == [] and not history.can_undo
+    assert history.goto(3) == third and not history.can_redo
+
+    history.goto(1)
+    assert history.record([patch(5, 5, 1.0)]) and len(history) == 2  # Undone steps are dropped
+    assert history.undo() == first
+
+
+# --- Tests for src.models.highlight.py (highlight_mask) ---
+
+def test_highlight_mask_resolves_groups_and_is_cached():
+    """Test that groups become one color-index matrix, later groups winning, reused while unchanged."""
+    columns = ["Well", "1", "2", " 3 "]
+    groups = {
+        "ctrl": {"color": "#111111", "cells": [{"row": "A", "column": "1"}, {"row": "B", "column": "3"}]},
+        "drug": {"cells": [{"row": "B", "column": "3"}, {"row": 2, "column": "2"}, {"row": "Z", "column": "1"}]},
+    }
+    mask = highlight_mask(groups, columns, 3)
+
+    assert mask.colors == ["#111111", DEFAULT_PALETTE[1]]
+    assert mask.index.tolist() == [[-1, 0, -1, -1], [-1, -1, -1, 1], [-1, -1, 1, -1]]
+    assert mask.css()[0, 1] == "background-color: #111111" and mask.css()[0, 0] == ""
+    assert highlight_mask(json.loads(json.dumps(groups)), columns, 3) is mask
+    assert highlight_mask(groups, columns, 3, default_color="#FFDDAA").colors[1] == "#FFDDAA"
+    fuzzy = highlight_mask({"g": {"cells": [{"row": "A", "column": "3"}]}}, ["Well", "3 (uM)"], 1, fuzzy_columns=True)
+    assert fuzzy.color_at(0, 1) == DEFAULT_PALETTE[0]
+
+
+# --- Tests for src.models.group_stats.py (GroupStatistics class) ---
+
+def test_group_statistics_follow_edits_and_recompute_changed_groups_only():
+    """Test that group stats come from the current plate values, adding median, SEM, MAD and n."""
+    plate = PlateReading.from_frame(pd.DataFrame({"Well": ["A", "B", "C"], "1": [1.0, 2.0, 6.0], "2": [4.0, None, 8.0]}))
+    groups = {
+        "ctrl": {"cells": [{"row": "A", "column": "1"}, {"row": "B", "column": "1"}, {"row": "C", "column": "1"}]},
+        "drug": {"cells": [{"row": "A", "column": "2"}, {"row": "B", "column": "2"}]},
+        "none": {"cells": [{"row": "Z", "column": "1"}]},
+    }
+    engine = GroupStatistics()
+    stats = engine.compute(plate, groups)
+
+    values = pd.Series([1.0, 2.0, 6.0])
+    assert list(stats["ctrl"]) == STAT_NAMES
+    assert stats["ctrl"]["Mean"] == pytest.approx(values.mean())
+    assert stats["ctrl"]["Standard Deviation"] == pytest.approx(values.std())
+    assert stats["ctrl"]["SEM"] == pytest.approx(values.sem())
+    assert (stats["ctrl"]["Median"], stats["ctrl"]["MAD"], stats["ctrl"]["n"]) == (2.0, 1.0, 3)
+    assert stats["drug"]["n"] == 1 and stats["drug"]["Mean"] == 4.0  # Empty cells are skipped
+    assert stats["none"] == {"Error": "No numerical data found for statistics"}
+
+    plate.set_cell(2, 1, 3.0)  # An edit in the data editor
+    updated = engine.compute(plate, groups)
+    assert updated["ctrl"]["Max"] == 3.0
+    assert updated["drug"] is stats["drug"]  # Untouched group: not recomputed
+
+    # Same engine, plate with other headers: cells resolve against the new columns
+    swapped = PlateReading.from_frame(pd.DataFrame({"Well": ["A", "B", "C"], "2": [4.0, None, 8.0], "1": [1.0, 2.0, 6.0]}))
+    assert engine.compute(swapped, groups)["ctrl"]["Mean"] == pytest.approx(values.mean())
+
+
+# --- Tests for src.models.cell_selection.py (select_cells) ---
+
+def test_select_cells_ranges_rows_columns_and_patterns():
+    """Test that ranges, whole rows/columns and column patterns resolve to cell positions in one step."""
+    columns = ["Well", "ctrl_a", "ctrl_b", "drug_a", "drug_b"]
+
+    def cells(text):
+        return list(zip(*(a.tolist() for a in select_cells(text, columns, 4))))
+
+    assert cells("B2:C3") == [(1, 2), (1, 3), (2, 2), (2, 3)]
+    assert cells("row d") == [(3, 1), (3, 2), (3, 3), (3, 4)]
+    assert cells("columns 3-4 rows B-C") == cells("B3:C4")
+    assert cells("every _a rows A") == [(0, 1), (0, 3)]
+    assert cells("cols drug_*; col ctrl_a rows A,C") == [(0, 1), (0, 3), (0, 4), (1, 3), (1, 4), (2, 1), (2, 3),
+                                                         (2, 4), (3, 3), (3, 4)]
+    assert len(cells("all")) == 16  # The label column is never selected
+
+    for bad in ["", "rows Z", "columns 9", "every _c", "B2 to C3"]:
+        with pytest.raises(SelectionError):
+            select_cells(bad, columns, 4)
+
+
+def test_editor_adds_cell_ranges_to_current_group_once():
+    """Test that range selections skip cells already in the unsaved group (set-backed membership)."""
+    class State(dict):
+        __getattr__ = dict.get
+        __setattr__ = dict.__setitem__
+
+    df = pd.DataFrame({"Well": ["A", "B"], "1": [1.0, 2.0], "2": [3.0, 4.0]})
+    editor = Editor.__new__(Editor)
+    with mock.patch('streamlit.session_state', new=State(current_group=[])):
+        assert len(editor.add_cells_to_group(df, *select_cells("row A", list(df.columns), 2))) == 2
+        added = editor.add_cells_to_group(df, *select_cells("all", list(df.columns), 2))
+        assert [(c["row"], c["column"], c["value"]) for c in added] == [("B", "1", 2.0), ("B", "2", 4.0)]
+        assert len(st.session_state.current_group) == 4
+
+        st.session_state.current_group = []  # Cleared elsewhere: the index follows
+        with mock.patch.object(pd.DataFrame, "to_numpy", side_effect=AssertionError("whole plate read")):
+            assert len(editor.add_cells_to_group(df, [0], [1])) == 1  # A click reads one column only
+
+
+# --- Tests for src.helpers.parse_cache.py (ParseCache class) ---
+
+def test_parse_cache_hit_miss_and_invalidation(tmp_path, sample_excel_file_12_wells, sample_excel_file_96_wells):
+    """Test that the parse cache serves repeat loads and re-parses changed files."""
+    cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+
+    df = cache.load(sample_excel_file_12_wells)
+    assert cache.stats()["misses"] == 1
+
+    with mock.patch.object(cache, "_save_index") as save_index:
+        cached_df = cache.load(sample_excel_file_12_wells)
+    assert cache.stats()["hits"] == 1
+    save_index.assert_not_called() # Hits only touch the in-memory LRU order
+    pd.testing.assert_frame_equal(cached_df, df)
+    cache.flush()
+
+    # A new cache instance reuses the entries on disk
+    pd.testing.assert_frame_equal(ParseCache(cache_dir=str(tmp_path / "cache")).load(sample_excel_file_12_wells), df)
+
+    # Overwriting the source file invalidates its entry
+    with open(sample_excel_file_96_wells, "rb") as src, open(sample_excel_file_12_wells, "wb") as dst:
+        dst.write(src.read())
+    assert len(cache.load(sample_excel_file_12_wells)) == len(pd.read_excel(sample_excel_file_96_wells))
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_parse_cache_drops_entries_of_older_parser(tmp_path, sample_excel_file_12_wells):
+    """Test that a new PARSER_VERSION re-parses files and drops the entries parsed the old way."""
+    cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+    cache.load(sample_excel_file_12_wells)
+
+    with mock.patch("src.helpers.parse_cache.PARSER_VERSION", "next"):
+        cache.load(sample_excel_file_12_wells)
+    assert (cache.stats()["misses"], cache.stats()["entries"]) == (2, 1)
+
+
+def test_parse_cache_evicts_least_recently_used(tmp_path, sample_excel_file_12_wells, sample_excel_file_96_wells):
+    """Test that entries beyond max_bytes are evicted, oldest first."""
+    cache = ParseCache(cache_dir=str(tmp_path / "cache"), max_bytes=1)
+    cache.load(sample_excel_file_12_wells)
+    cache.load(sample_excel_file_96_wells)
+
+    assert cache.stats()["entries"] == 1
+    cache.load(sample_excel_file_96_wells)
+    assert cache.stats()["hits"] == 1
+
+
+# --- Tests for src.helpers.figure_cache.py (FigureCache class) ---
+
+def test_figure_cache_renders_once_per_change_and_evicts():
+    """Test that charts are rendered once per change of stats or colors and evicted LRU by size."""
+    import matplotlib.pyplot as plt
+    cache = FigureCache()
+    rows = [{"Group": "ctrl", "color": "#FFB3BA", "Mean": 2.0, "Max": 3.0},
+            {"Group": "drug", "color": None, "Mean": 4.0, "Max": 5.0}]
+
+    png = cache.combined_chart(rows, ["Mean", "Max"])
+    assert png.startswith(b"\x89PNG") and cache.combined_chart(rows, ["Mean", "Max"]) is png
+    assert cache.metric_chart(rows, "Mean", fmt="svg").lstrip().startswith(b"<?xml")
+    assert cache.stats()["misses"] == 2 and cache.stats()["hits"] == 1
+    assert plt.get_fignums() == []  # Nothing left registered with pyplot
+
+    recolored = [dict(rows[0], color="#000000"), rows[1]]
+    assert cache.combined_chart(recolored, ["Mean", "Max"]) is not png
+
+    cache.max_bytes = len(png) + 1
+    cache.metric_chart(rows, "Max")
+    assert cache.stats()["entries"] == 1 and cache.stats()["bytes"] <= cache.max_bytes
+
+
+# --- Tests for src.helpers.tracker_codec.py (TrackerSerializer class) ---
+
+@pytest.mark.parametrize("fmt", ["pretty", "compact", "msgpack"])
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_tracker_serializer_round_trip(fmt, compression):
+    """Test that every serializer round-trips tracker data and that decoding sniffs the format."""
+    if fmt == "msgpack":
+        pytest.importorskip("msgpack")
+    data = {"a.xlsx": {"n": [0, 127, 128, -1, -33, 70000, -70000, 2 ** 40], "x": 1.5, "ok": True,
+                       "none": None, "s": "é" * 40, "rows": [[1.0, None]] * 20, "m": {str(i): i for i in range(20)}}}
+    payload = TrackerSerializer(fmt, compression).encode(data)
+    assert TrackerSerializer().decode(payload) == data
+
+    if fmt == "msgpack" and compression == "none":
+        assert TrackerSerializer("msgpack").encode({"a": [1, -1, None, True]}) == b"\x81\xa1a\x94\x01\xff\xc0\xc3"
+
+
+def test_json_tracker_store_switches_serializer(tmp_path):
+    """Test that a tracker written in one format is read and rewritten by a store using another one."""
+    files = {"a.xlsx": {"note": "", "is_experiment": True}}
+    JsonTrackerStore(str(tmp_path)).save("files", files)
+
+    store = JsonTrackerStore(str(tmp_path), TrackerSerializer("compact", "gzip"))
+    assert store.load("files") == files
+    store.save("files", files)
+    assert os.listdir(tmp_path) == ["file_tracker.json.gz"]
+    assert JsonTrackerStore(str(tmp_path)).load("files") == files
+
+
+# --- Tests for src.helpers.tracker_store.py (SqliteTrackerStore class) ---
+
+def test_sqlite_tracker_store_row_writes_and_json_round_trip(tmp_path):
+    """Test that the SQLite store imports the JSON trackers, writes changed rows only, and exports back."""
+    files = {"a.xlsx": {"note": "", "is_experiment": True}, "b.xlsx": {"note": "", "is_experiment": False}}
+    editor = {"a.xlsx": {"plate_type": "96 wells", "0": {"index_subdataset": [], "cell_groups": {"g1": {"cells": []}}}}}
+    legacy = JsonTrackerStore(str(tmp_path))
+    legacy.save("files", files)
+    legacy.save("editor", editor)
+
+    store = SqliteTrackerStore(str(tmp_path / "trackers.db"), import_from=str(tmp_path))
+    assert store.load("files") == files
+    assert JsonTrackerStore(str(tmp_path)).load("files") == files # Source left untouched on first use
+    assert store.experiment_paths() == ["a.xlsx"]
+
+    data = store.load("editor")
+    data["a.xlsx"]["0"]["cell_groups"]["g2"] = {"cells": [{"row": "A", "column": "1"}]}
+    before = store._conn.total_changes
+    store.save("editor", data)
+    assert store._conn.total_changes - before == 1 # Only the new group row
+    assert list(store.load("editor")["a.xlsx"]["0"]["cell_groups"]) == ["g1", "g2"]
+
+    store.delete_files(["a.xlsx"])
+    assert store.load("editor") == {} and list(store.load("files")) == ["b.xlsx"]
+
+    export_dir = tmp_path / "export"
+    store.export_json(str(export_dir))
+    assert JsonTrackerStore(str(export_dir)).load("files") == {"b.xlsx": files["b.xlsx"]}
+    store.close()
+
+    # The explicit migration archives the files it imported
+    from src.helpers.migrate_trackers import import_trackers
+    assert import_trackers(str(export_dir)) == ["files", "editor", "report"]
+    assert sorted(name for name in os.listdir(export_dir) if "json" in name) == [
+        "editor_file_tracker.json.imported", "file_tracker.json.imported", "report_metadata_tracker.json.imported"
+    ]
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "sharded"])
+def test_tracker_store_bulk_delete_cascades(tmp_path, backend):
+    """Test that deleting several files removes them from every tracker, legacy report sections included."""
+    JsonTrackerStore(str(tmp_path)).save("report", {
+        "a.xlsx": {"general_metadata": {}, "subdataset_metadata": {"0": {"k": "v"}}},
+        "subdataset_metadata": {"a.xlsx_0": {}, "b.xlsx_1": {}, "c.xlsx_0": {}},
+    })
+    store = CachedTrackerStore(open_tracker_store(str(tmp_path), backend))
+    for name in ("a.xlsx", "b.xlsx", "c.xlsx"):
+        store.put("files", name, {"note": "", "is_experiment": True})
+        store.put("editor", name, {"plate_type": "96 wells", "0": {"cell_groups": {"g": {"cells": []}}}})
+
+    store.delete_files(["a.xlsx", "b.xlsx"])
+    for reader in (store, CachedTrackerStore(open_tracker_store(str(tmp_path), backend))):
+        assert list(reader.load("files")) == ["c.xlsx"] and list(reader.load("editor")) == ["c.xlsx"]
+        assert reader.load("report") == {"subdataset_metadata": {"c.xlsx_0": {}}}
+    store.close()
+
+
+def test_sqlite_tracker_store_encodes_rows_with_serializer(tmp_path):
+    """Test that the SQLite store writes rows with its serializer and reads rows of any encoding."""
+    files = {"a.xlsx": {"note": "", "is_experiment": True}}
+    db_path = str(tmp_path / "trackers.db")
+    SqliteTrackerStore(db_path, serializer=TrackerSerializer()).save("files", files)
+
+    store = SqliteTrackerStore(db_path, serializer=TrackerSerializer("compact", "gzip"))
+    assert store.load("files") == files # JSON text rows are still read
+    files["b.xlsx"] = {"note": "new", "is_experiment": False}
+    store.save("files", files)
+    records = dict(store._conn.execute("SELECT filepath, record FROM files"))
+    assert all(isinstance(record, bytes) for record in records.values()) # Re-encoded on save
+    store.close()
+
+    assert SqliteTrackerStore(db_path, serializer=TrackerSerializer()).load("files") == files
+
+
+# --- Tests for src.helpers.tracker_store.py (ShardedTrackerStore class) ---
+
+def test_sharded_tracker_store_migrates_and_loads_one_experiment(tmp_path):
+    """Test that single-file trackers are split into shards and single experiments load on their own."""
+    editor = {f"exp{i}.xlsx": {"plate_type": "96 wells", "0": {"patches": []}} for i in range(3)}
+    JsonTrackerStore(str(tmp_path)).save("editor", editor)
+
+    store = CachedTrackerStore(ShardedTrackerStore(str(tmp_path)))
+    assert store.tracked_paths("editor") == list(editor)
+    assert store.load("editor") == editor
+
+    with mock.patch.object(store.backend, "load", wraps=store.backend.load) as load:
+        assert store.load_entry("editor", "exp1.xlsx") == editor["exp1.xlsx"]
+        store.put("editor", "exp1.xlsx", {"plate_type": "384 wells"})
+        assert store.load_entry("editor", "exp1.xlsx") == {"plate_type": "384 wells"}
+        assert store.load_entry("editor", "missing.xlsx") is None
+        assert load.call_count == 0  # The whole tracker is never read
+
+    assert len(os.listdir(tmp_path / "editor_shards")) == 4  # Index + one shard per experiment
+    assert ShardedTrackerStore(str(tmp_path)).load("editor")["exp1.xlsx"] == {"plate_type": "384 wells"}
+
+
+def test_sharded_tracker_store_saves_against_snapshot_and_archived_sources(tmp_path, caplog):
+    """Test that saves compare with the shards in memory and that archived single files are still imported."""
+    editor = {f"exp{i}.xlsx": {"plate_type": "96 wells", "0": {"patches": []}} for i in range(3)}
+    JsonTrackerStore(str(tmp_path)).save("editor", editor)
+    from src.helpers.migrate_trackers import shard_trackers
+    assert shard_trackers(str(tmp_path)) == ["editor"]
+    assert os.path.exists(tmp_path / "editor_file_tracker.json.imported")
+
+    store = ShardedTrackerStore(str(tmp_path))
+    data = store.load("editor")
+    data["exp1.xlsx"]["plate_type"] = "384 wells"
+    with mock.patch.object(store, "load_entry", side_effect=AssertionError("shard read back")):
+        store.save("editor", data)
+    assert ShardedTrackerStore(str(tmp_path)).load("editor") == data
+
+    # Another process rewrote a shard: it is read back instead of trusting the snapshot
+    ShardedTrackerStore(str(tmp_path)).put("editor", "exp0.xlsx", {"plate_type": "12 wells"})
+    store.save("editor", data)
+    assert ShardedTrackerStore(str(tmp_path)).load_entry("editor", "exp0.xlsx") == editor["exp0.xlsx"]
+
+    # Without shards or plain files, the archived copy is imported with a warning
+    fresh = tmp_path / "fresh"
+    fresh.mkdir()
+    os.replace(tmp_path / "editor_file_tracker.json.imported", fresh / "editor_file_tracker.json.imported")
+    with caplog.at_level("WARNING"):
+        assert ShardedTrackerStore(str(fresh)).load("editor") == editor
+    assert "archived copy" in caplog.text
+
+
+@pytest.mark.parametrize("store_class", [JsonTrackerStore, ShardedTrackerStore])
+def test_file_tracker_stores_finish_interrupted_bulk_delete(tmp_path, store_class):
+    """Test that a bulk delete cut off after its intent was recorded is finished when the store reopens."""
+    store = store_class(str(tmp_path))
+    store.save("files", {"a.xlsx": {"is_experiment": True}, "b.xlsx": {"is_experiment": True}})
+    store.put("editor", "a.xlsx", {"plate_type": "96 wells"})
+    store.put("editor", "b.xlsx", {"plate_type": "96 wells"})
+
+    with mock.patch.object(store_class, "_delete_files", side_effect=OSError("crash")):
+        with pytest.raises(OSError):
+            store.delete_files(["a.xlsx"]) # Before any tracker was written
+    assert os.path.exists(tmp_path / "pending_delete.json")
+
+    reopened = store_class(str(tmp_path))
+    assert list(reopened.load("files")) == ["b.xlsx"]
+    assert list(reopened.load("editor")) == ["b.xlsx"]
+    assert not os.path.exists(tmp_path / "pending_delete.json")
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+# --- Tests for src.helpers.tracker_store.py (CachedTrackerStore class) ---
+
+def test_cached_tracker_store_reuses_parsed_trackers_and_isolates_views(tmp_path):
+    """Test that loads are served from memory until the stored tracker changes, as copy-on-write views."""
+    db_path = str(tmp_path / "trackers.db")
+    backend = SqliteTrackerStore(db_path)
+    backend.save("files", {"a.xlsx": {"note": "", "is_experiment": True}})
+    store = CachedTrackerStore(backend)
+
+    with mock.patch.object(backend, "load", wraps=backend.load) as load:
+        first, second = store.load("files"), store.load("files")
+        first["a.xlsx"]["note"] = "only in this session"
+        assert second["a.xlsx"]["note"] == "" and store.load("files")["a.xlsx"]["note"] == ""
+        assert load.call_count == 1
+
+        store.save("files", first)
+        assert store.load("files")["a.xlsx"]["note"] == "only in this session"
+        assert store.experiment_paths() == ["a.xlsx"] and load.call_count == 1
+
+        other = SqliteTrackerStore(db_path)  # Another connection commits a change
+        other.put("files", "b.xlsx", {"note": "", "is_experiment": False})
+        other.close()
+        assert list(store.load("files")) == ["a.xlsx", "b.xlsx"]
+        assert load.call_count == 2
+    backend.close()
+
+
+# --- Tests for src.helpers.tracker_store.py (JournalTrackerStore class) ---
+
+def test_journal_tracker_store_replay_and_background_compaction(tmp_path):
+    """Test that saves append only their mutations, survive a restart, and get compacted into the snapshot."""
+    JsonTrackerStore(str(tmp_path)).save("files", {"a.xlsx": {"note": "", "is_experiment": True}})
+    store = JournalTrackerStore(str(tmp_path), compact_bytes=1024 * 1024)
+
+    files = store.load("files")
+    files["a.xlsx"]["note"] = "checked"
+    store.save("files", files)
+    store.put("editor", "a.xlsx", {"plate_type": "96 wells", "0": {"cell_groups": {}}})
+    editor = store.load("editor")
+    editor["a.xlsx"]["0"]["cell_groups"]["g1"] = {"cells": [{"row": "A", "column": "1"}]}
+    store.save("editor", editor)
+
+    with open(store.journal_path, encoding="utf-8") as file:
+        records = [json.loads(line) for line in file]
+    assert [record["path"] for record in records] == [
+        ["a.xlsx", "note"], ["a.xlsx"], ["a.xlsx", "0", "cell_groups", "g1"]
+    ]
+    store.close()
+
+    store = JournalTrackerStore(str(tmp_path), compact_bytes=1)
+    assert store.load("editor") == editor and store.load("files")["a.xlsx"]["note"] == "checked"
+    store.delete_files(["a.xlsx"])  # Passes the threshold: compaction runs in the background
+    store.close()
+    assert os.path.getsize(store.journal_path) == 0
+    assert JsonTrackerStore(str(tmp_path)).load("files") == {}
+    assert JournalTrackerStore(str(tmp_path)).load("editor") == {}
+
+
+# --- Tests for src.models.file_selector.py (Selector class) ---
+
+def test_selector_import_batch(tmp_path, sample_excel_file_12_wells):
+    """Test batch import: valid workbooks are tracked in one write, failures are reported."""
+    tracker = tmp_path / "file_tracker.json"
+    tracker.write_text(json.dumps({}))
+    (tmp_path / "notes.xlsx").write_bytes(b"not a workbook")
+    (tmp_path / "~$test_12_well_experiment.xlsx").write_bytes(b"lock file")
+
+    selector = Selector(tracker_file=str(tracker))
+    progress = []
+    result = selector.import_batch(str(tmp_path), max_workers=2, progress=lambda *args: progress.append(args))
+
+    valid_path = os.path.abspath(sample_excel_file_12_wells)
+    assert result["added"] == [valid_path]
+    assert list(result["failed"]) == [str(tmp_path / "notes.xlsx")]
+    assert len(progress) == 2 # Lock file is never submitted
+
+    tracked = get_tracker_store(str(tmp_path)).load("files")
+    assert tracked[valid_path]["is_experiment"] is True
+    assert tracked[valid_path]["plate_type"] == "12 wells"
+
+    # Running again skips files that are already tracked
+    assert selector.import_batch(str(tmp_path))["skipped"] == [valid_path]
+
+
+def test_selector_is_experiment_sniffs_first_plate(tmp_path):
+    """Test that validation stops at the first complete plate and reports its format."""
+    rows_384 = PLATE_ROW_RANGES["384 wells"]
+    labels = ["t0"] + rows_384 + ["t1"] + rows_384
+    file_path = tmp_path / "stacked_384.xlsx"
+    pd.DataFrame({"Well": labels, "1": range(len(labels))}).to_excel(file_path, index=False)
+
+    selector = Selector(filepath=str(file_path))
+    assert selector.is_experiment()
+    assert (selector.plate_type, selector.plates) == ("384 wells", 1)
+
+    empty_path = tmp_path / "empty.xlsx"
+    pd.DataFrame({"Well": ["x", "y"]}).to_excel(empty_path, index=False)
+    assert not Selector(filepath=str(empty_path)).is_experiment()
+
+
+@pytest.mark.parametrize("dimension", ["A1", None])
+def test_selector_sniffs_workbook_with_stale_dimension(tmp_path, dimension):
+    """Test that a missing or "A1" dimension record does not hide the rows of the sheet."""
+    rows_96 = PLATE_ROW_RANGES["96 wells"]
+    labels = ["t0"] + rows_96 + ["t1"] + rows_96
+    written_path = tmp_path / "stacked_96.xlsx"
+    pd.DataFrame({"Well": labels, "1": range(len(labels))}).to_excel(written_path, index=False)
+
+    file_path = tmp_path / "no_dimension.xlsx"
+    with zipfile.ZipFile(written_path) as source, zipfile.ZipFile(file_path, "w") as target:
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                replacement = f'<dimension ref="{dimension}"/>' if dimension else ""
+                content = re.sub(rb'<dimension ref="[^"]*" ?/>', replacement.encode(), content)
+            target.writestr(item, content)
+
+    importer = ExcellImporter(str(file_path))
+    assert importer.sniff()["complete"] is False # Stops early, after the first plate
+    assert importer.sniff()["rows"] >= 10
+    assert importer.sniff(stop_after=None)["rows"] == len(labels) + 1
+
+    selector = Selector(filepath=str(file_path))
+    assert selector.is_experiment()
+    assert (selector.plate_type, selector.plates) == ("96 wells", 1)
+
+
 # --- Tests for src.models.editorial.py (Editor class) ---
 
+def test_editor_flush_tracker_writes_changed_experiments_once(tmp_path):
+    """Test that save_tracker() only marks the tracker dirty and flush_tracker() skips unchanged content."""
+    store = SqliteTrackerStore(str(tmp_path / "trackers.db"))
+    store.save("editor", {"a.xlsx": {"plate_type": "96 wells"}, "b.xlsx": {"plate_type": "96 wells"}})
+
+    editor = Editor.__new__(Editor)
+    editor.tracker_store = store
+    editor.file_data = store.load("editor")
+    editor._dirty, editor._snapshots, editor._bases = False, {}, {}
+    editor._loaded_experiments = set(editor.file_data)
+    editor.track_experiment("a.xlsx")
+
+    with mock.patch.object(store, "update", wraps=store.update) as update:
+        editor.file_data["a.xlsx"]["0"] = {"subdataset_name": "1h"}
+        editor.save_tracker()
+        editor.save_tracker()
+        assert update.call_count == 0  # Nothing is written before the flush
+        editor.flush_tracker()
+        assert update.call_count == 1 and list(update.call_args.args[1]) == ["a.xlsx"]
+
+        editor.save_tracker()  # Same content as the last flush
+        editor.flush_tracker()
+        assert update.call_count == 1
+
+        del editor.file_data["b.xlsx"]
+        editor.save_tracker()
+        editor.flush_tracker()
+        assert update.call_args.args[1] == {"b.xlsx": None}
+
+    assert store.load("editor") == {
+        "a.xlsx": {"plate_type": "96 wells", "0": {"subdataset_name": "1h", "version": 1}, "version": 1}
+    }
+    store.close()
+
+
+def test_editor_concurrent_sessions_merge_edits(tmp_path):
+    """Test that two sessions saving the same experiment keep each other's plates, cells and groups."""
+    store = CachedTrackerStore(SqliteTrackerStore(str(tmp_path / "trackers.db")))
+    plate = {"subdataset_name": "1h", "patches": [], "cell_groups": {}}
+    store.save("editor", {"a.xlsx": {"plate_type": "96 wells", "0": dict(plate), "1": dict(plate)}})
+
+    def session():
+        editor = Editor.__new__(Editor)
+        editor.tracker_store = store
+        editor.file_data, editor._dirty, editor._snapshots, editor._bases = {}, True, {}, {}
+        editor._loaded_experiments = set()
+        editor.track_experiment("a.xlsx")
+        return editor
+
+    first, second = session(), session()
+    first.file_data["a.xlsx"]["0"]["patches"] = [{"row": 0, "column": 1, "old": 1, "new": 5}]
+    first.file_data["a.xlsx"]["0"]["cell_groups"]["ctrl"] = {"cells": [[0, 1]]}
+    second.file_data["a.xlsx"]["0"]["patches"] = [{"row": 2, "column": 3, "old": 4, "new": 9}]
+    second.file_data["a.xlsx"]["1"]["subdataset_name"] = "2h"
+    first.flush_tracker()
+    second.flush_tracker()
+
+    stored = store.load_entry("editor", "a.xlsx")
+    assert [(p["row"], p["column"]) for p in stored["0"]["patches"]] == [(0, 1), (2, 3)]
+    assert stored["0"]["cell_groups"] == {"ctrl": {"cells": [[0, 1]]}}
+    assert stored["1"]["subdataset_name"] == "2h"
+    assert second.file_data["a.xlsx"] == stored
+    assert stored["0"]["version"] > 1  # Newer than both sessions' own version of the plate
+
+    # A session that started before the merged write still sees it as changed
+    first.file_data["a.xlsx"]["1"]["subdataset_name"] = "3h"
+    first._dirty = True
+    first.flush_tracker()
+    stored = store.load_entry("editor", "a.xlsx")
+    assert stored["1"]["subdataset_name"] == "3h" and len(stored["0"]["patches"]) == 2
+    store.close()
+
+
+def test_editor_stores_data_editor_delta_as_patches():
+    """Test that only the cells reported in the data editor's edited_rows are patched and stored."""
+    original = PlateReading.from_frame(pd.DataFrame({"Well": ["A", "B"], "1": [1.0, 2.0], "2": [3.0, 4.0]}))
+    sub_data = {"index_subdataset_original": original.to_dict(), "patches": [], "renamed_columns": {}}
+    editor = Editor.__new__(Editor)
+    editor._dirty = False
+
+    with mock.patch('streamlit.session_state', new={}):
+        plate = editor.editor_plate("editor_0_a", sub_data, 0)
+        st.session_state["editor_0_a"] = {"edited_rows": {1: {"1": 5.0}, 0: {"2": "OVRFLW"}}}
+        edited_plate = editor.store_editor_delta("editor_0_a", sub_data, plate, edited_df=None)
+
+        assert editor._dirty and sub_data["patches"] == [
+            {"row": 0, "column": 2, "old": 3.0, "new": "OVRFLW"},
+            {"row": 1, "column": 1, "old": 2.0, "new": 5.0},
+        ]
+        assert edited_plate is plate["plate"] and edited_plate.cell(1, 1) == 5.0
+        assert editor.editor_plate("editor_0_a", sub_data, 0) is plate  # Reused on the next rerun
+
+        # Typing the original value back drops the patch
+        st.session_state["editor_0_a"]["edited_rows"][1]["1"] = "2"
+        editor.store_editor_delta("editor_0_a", sub_data, plate, edited_df=None)
+        assert [p["row"] for p in sub_data["patches"]] == [0]
+
+        # Reverting a cell in the widget removes it from edited_rows: the plate follows the patches
+        del st.session_state["editor_0_a"]["edited_rows"][0]
+        edited_plate = editor.store_editor_delta("editor_0_a", sub_data, plate, edited_df=None)
+        assert sub_data["patches"] == [] and edited_plate.cell(0, 2) == 3.0
+        assert original.apply_patches(sub_data["patches"]).diff(edited_plate) == []
+
+        # Patches changed elsewhere (undo, another session): rebuilt, stale widget state dropped
+        sub_data["patches"] = [{"row": 1, "column": 1, "old": 2.0, "new": 9.0}]
+        assert editor.editor_plate("editor_0_a", sub_data, 0) is not plate
+        assert "editor_0_a" not in st.session_state
+
+
 # Mock streamlit functions that interact with UI directly
 @mock.patch('streamlit.selectbox')
 @mock.patch('streamlit.button')